@@ -1,13 +1,28 @@
+import functools
 import json
+import re
+import sys
+import unicodedata
+from collections import defaultdict
 from pathlib import Path
-from typing import Dict, List
-from fastapi import FastAPI, HTTPException, Query
+from typing import Annotated, Any, Dict, List, Optional
+from fastapi import FastAPI, Header, HTTPException, Query
+from pydantic import BaseModel, Field
 from starlette.middleware.base import BaseHTTPMiddleware
 from rapidfuzz import process, fuzz
 
 BASE_DIR = Path(__file__).resolve().parents[1]
 ASSETS = BASE_DIR / "assets"
 
+# helper modules live next to this file; the leading underscore keeps Vercel from
+# deploying them as functions of their own
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+import _skill_conditions as skill_conditions
+import _race_planner as race_planner
+import _executor as executor
+import _admission as admission
+import _json_stream as json_stream
+
 app = FastAPI()
 
 class StripPathPrefix(BaseHTTPMiddleware):
@@ -26,15 +41,11 @@ app.add_middleware(StripPathPrefix, prefixes=("/api", "/index", "/api/index"))
 
 def _json_load_bom_tolerant(path: Path):
     """
-    Load JSON allowing for optional UTF-8 BOM.
-    Tries utf-8-sig first; falls back to utf-8 for safety.
+    Load JSON allowing for optional UTF-8 BOM. utf-8-sig strips a BOM and reads plain
+    UTF-8 unchanged, so one read covers both (a decode error would recur with utf-8).
     """
-    try:
-        with path.open(encoding="utf-8-sig") as f:
-            return json.load(f)
-    except json.JSONDecodeError:
-        with path.open(encoding="utf-8") as f:
-            return json.load(f)
+    with path.open(encoding="utf-8-sig") as f:
+        return json.load(f)
 
 def _split_lines(s: str) -> List[str]:
     return [ln.strip() for ln in str(s).replace("\r\n", "\n").split("\n") if ln.strip()]
@@ -52,8 +63,7 @@ def _load_support_or_ura(path: Path, events: Dict[str, Dict]) -> None:
     Load flat list shaped like:
     [{ "EventName": "...", "EventOptions": { "Top Option": "..." } }, ...]
     """
-    data = _json_load_bom_tolerant(path)
-    for row in data:
+    for row in json_stream.iter_array(path):
         ev_name = (row.get("EventName") or "").strip()
         opts = row.get("EventOptions") or {}
         if not ev_name or not isinstance(opts, dict):
@@ -66,9 +76,10 @@ def _load_uma_data(path: Path, events: Dict[str, Dict]) -> None:
     """
     Load list of Umas with UmaEvents similar to support entries:
     { "UmaName": "...", "UmaEvents": [ { "EventName": "...", "EventOptions": {...} }, ... ] }
+    Streamed one character at a time: stats, objectives etc. are dropped as soon as the
+    character's events are read instead of being held for the whole file.
     """
-    data = _json_load_bom_tolerant(path)
-    for uma in data:
+    for uma in json_stream.iter_array(path):
         uma_events = uma.get("UmaEvents") or []
         for row in uma_events:
             ev_name = (row.get("EventName") or "").strip()
@@ -109,6 +120,125 @@ def load_all_events() -> List[Dict]:
 EVENTS = load_all_events()
 EVENT_MAP = {e["event_name"]: e for e in EVENTS}
 EVENT_NAMES = list(EVENT_MAP.keys())
+executor.register_choices("events", EVENT_NAMES)
+
+# ---------- Event alias fast path ----------
+# A clean OCR read or a typed title usually differs from the stored name only in case,
+# spacing, punctuation or the (❯)/(❯❯) chain markers support_card.json puts in front.
+# Each name is indexed under progressively looser normalizations; a query is tried at
+# each level in turn and only falls through to the fuzzy scan when none hits.
+_MARKER_RE = re.compile(r"\(\s*❯+\s*\)|❯+")
+_ELIDE_RE = re.compile(r"['’‘ʼ`´\"“”]")  # dropped: "Year's" must meet "years", not "year s"
+_PUNCT_RE = re.compile(r"[^\w\s]")
+
+def _norm_casefold(s: str) -> str:
+    return " ".join(unicodedata.normalize("NFKC", s).casefold().split())
+
+def _norm_markers(s: str) -> str:
+    return " ".join(_MARKER_RE.sub(" ", _norm_casefold(s)).split())
+
+def _norm_punctuation(s: str) -> str:
+    return " ".join(_PUNCT_RE.sub(" ", _ELIDE_RE.sub("", _norm_markers(s))).split())
+
+ALIAS_LEVELS = (("casefold", _norm_casefold), ("markers", _norm_markers), ("punctuation", _norm_punctuation))
+
+def build_event_aliases(names: List[str]) -> Dict[str, Dict[str, List[str]]]:
+    """level -> normalized key -> event names (usually one)."""
+    aliases: Dict[str, Dict[str, List[str]]] = {level: defaultdict(list) for level, _ in ALIAS_LEVELS}
+    for name in names:
+        for level, norm in ALIAS_LEVELS:
+            key = norm(name)
+            if key:
+                aliases[level][key].append(name)
+    return {level: dict(keys) for level, keys in aliases.items()}
+
+EVENT_ALIASES = build_event_aliases(EVENT_NAMES)
+
+def lookup_event_alias(query: str):
+    """(path, candidate names) for an exact/normalized hit, else None."""
+    if query in EVENT_MAP:
+        return "exact", [query]
+    for level, norm in ALIAS_LEVELS:
+        hit = EVENT_ALIASES[level].get(norm(query))
+        if hit:
+            return level, hit
+    return None
+
+EXECUTOR = executor.MatchExecutor()  # MATCH_STRATEGY / MATCH_THREADS / ... (see api/_executor.py)
+EVENT_ADMISSION = admission.AdmissionController("event_by_name")  # ADMISSION_* (see api/_admission.py)
+
+# ---------- Skill hint inverted index ----------
+# "Competitive Spirit ○ hint +1", "It's On! hint +1/+3",
+# "Escape Artist hint +1/+3 or Fast-Paced hint +1"
+_HINT_RE = re.compile(r"^\s*(?:\(random\)\s*)?(.+?)\s+hint\s+\+(\d+)(?:/\+(\d+))?\s*$", re.I)
+_HINT_MARKS = "○◎×"
+
+def _hint_key(name: str) -> str:
+    return re.sub(r"\s+", " ", str(name or "")).strip().lower()
+
+def _hint_base(name: str) -> str:
+    return _hint_key(re.sub(f"[{_HINT_MARKS}]", "", str(name or "")))
+
+def build_hint_index(events: List[Dict], support_hints: List[Dict]):
+    """skill key -> {"skill", "events": [...], "cards": [...]}, plus base name (no ○/◎) -> keys."""
+    index: Dict[str, Dict[str, Any]] = {}
+    by_base: Dict[str, set] = defaultdict(set)
+
+    def entry(name: str) -> Dict[str, Any]:
+        key = _hint_key(name)
+        if key not in index:
+            index[key] = {"skill": name.strip(), "events": [], "cards": []}
+            by_base[_hint_base(name)].add(key)
+        return index[key]
+
+    for ev in events:
+        for label, groups in ev["options"].items():
+            for lines in groups:
+                for line in lines:
+                    alternatives = line.split(" or ")
+                    for alt in alternatives:
+                        m = _HINT_RE.match(alt)
+                        if not m:
+                            continue
+                        levels = [int(m.group(2))] + ([int(m.group(3))] if m.group(3) else [])
+                        source = {"event_name": ev["event_name"], "option": label, "levels": levels,
+                                  "either_or": len(alternatives) > 1}
+                        sources = entry(m.group(1))["events"]
+                        if source not in sources:  # an option lists the same reward once per outcome group
+                            sources.append(source)
+    for card in support_hints:
+        for h in card.get("SupportHints") or []:
+            if not h.get("Name"):
+                continue
+            source = {
+                "SupportSlug": card.get("SupportSlug"), "SupportName": card.get("SupportName"),
+                "SupportRarity": card.get("SupportRarity"), "SkillId": h.get("SkillId") or None,
+                "HintLevel": h.get("HintLevel"), "Section": h.get("Section"),
+            }
+            sources = entry(h["Name"])["cards"]
+            if source not in sources:
+                sources.append(source)
+    return index, {b: sorted(keys) for b, keys in by_base.items()}
+
+HINT_INDEX, HINT_BASES = build_hint_index(EVENTS, _json_load_bom_tolerant(ASSETS / "support_hints.json"))
+HINT_NAMES = [v["skill"] for v in HINT_INDEX.values()]
+executor.register_choices("hints", HINT_NAMES)
+
+@app.get("/hints")
+async def where_to_get_hint(
+    skill: str = Query(..., description="Skill name, e.g. 'Competitive Spirit ○' (○/◎ optional)"),
+    min_score: float = Query(80, ge=0, le=100, description="Fuzzy fallback threshold when no exact name matches"),
+):
+    if _hint_key(skill) in HINT_INDEX:
+        keys, how = [_hint_key(skill)], "exact"
+    else:
+        keys, how = HINT_BASES.get(_hint_base(skill), []), "base"  # same skill with ○/◎ ignored
+    if not keys:
+        hit = await EXECUTOR.extract_one("hints", skill, scorer="WRatio", score_cutoff=min_score)
+        if not hit:
+            raise HTTPException(status_code=404, detail="No hint sources found")
+        keys, how = [_hint_key(hit[0])], "fuzzy"
+    return {"query": skill, "match": how, "results": [HINT_INDEX[k] for k in keys]}
 
 @app.get("/events")
 async def list_events():
@@ -119,9 +249,25 @@ async def get_event_by_name(
     event_name: str = Query(..., description="Event name to lookup"),
     limit: int = Query(5, description="Maximum number of fuzzy matches to return"),
     min_score: float = Query(0, ge=0, le=100, description="Minimum score threshold for matches"),
+    x_deadline_ms: Optional[float] = Header(None, gt=0, description="Give up (503/429) if not started within this many ms"),
 ):
-    matches = process.extract(event_name, EVENT_NAMES, scorer=fuzz.ratio, limit=limit)
-    filtered = [m for m in matches if m[1] >= min_score]
+    alias = lookup_event_alias(event_name)
+    if alias:
+        # O(1) and certain: no admission control, no scan. The top name scores 100; names
+        # that collide with it on a looser normalization keep their real scores
+        matched_by, names = alias
+        scored = sorted(((n, fuzz.ratio(event_name, n)) for n in names), key=lambda m: -m[1])
+        filtered = [(scored[0][0], 100.0, None)] + [(n, s, None) for n, s in scored[1:] if s >= min_score]
+        filtered = filtered[:max(1, limit)]
+    else:
+        matched_by = "fuzzy"
+        try:
+            async with EVENT_ADMISSION.admit(deadline_ms=x_deadline_ms):
+                query = unicodedata.normalize("NFKC", event_name)
+                matches = await EXECUTOR.extract("events", query, scorer="ratio", limit=limit)
+        except admission.Shed as e:
+            raise HTTPException(status_code=e.status, detail=e.detail, headers=e.headers)
+        filtered = [m for m in matches if m[1] >= min_score]
     if not filtered:
         raise HTTPException(status_code=404, detail="No matches found")
 
@@ -135,9 +281,130 @@ async def get_event_by_name(
             "score": float(top_score),
             "data": top_event,
         },
+        "matched_by": matched_by,  # exact | casefold | markers | punctuation | fuzzy
         "other_matches": other_matches,
     }
 
+class SkillMatchRequest(BaseModel):
+    context: Dict[str, Any] = Field(default_factory=dict, description="Race variables, e.g. {'distance_type': 'medium', 'running_style': 2, 'phase': 1}")
+    require_known: bool = Field(False, description="Only return groups whose every variable was given in context")
+    limit: int = Field(500, ge=1, le=2000)
+
+@app.post("/skills/match")
+async def match_skills(req: SkillMatchRequest):
+    try:
+        ctx = skill_conditions.normalize_context(req.context)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    index = skill_conditions.get_index(ASSETS / "skills_all.json", _json_load_bom_tolerant)
+    skills, stats = await EXECUTOR.run(index.match, ctx, require_known=req.require_known)
+    return {"context": ctx, "stats": stats, "skills": skills[:req.limit]}
+
+@functools.lru_cache(maxsize=1)
+def _uma_by_key() -> Dict[str, Dict]:
+    return {u["UmaKey"]: u for u in _json_load_bom_tolerant(ASSETS / "uma_data.json") if u.get("UmaKey")}
+
+class RacePlanRequest(BaseModel):
+    uma: str = Field(..., description="UmaKey from uma_data.json (fuzzy matched)")
+    max_consecutive: int = Field(2, ge=1, le=72, description="Most races allowed back to back")
+    fan_target: Optional[int] = Field(None, ge=0, description="Reach at least this many fans with as few races as possible")
+    min_aptitude: str = Field("B", pattern="^[SABCDEFGsabcdefg]$", description="Lowest surface/distance aptitude to race on")
+    include_objectives: bool = Field(True, description="Force the character's race objectives and check fan/count objectives")
+    debut_fans: int = Field(race_planner.DEBUT_FANS, ge=0)
+
+@app.post("/races/plan")
+async def plan_races(req: RacePlanRequest):
+    umas = _uma_by_key()
+    key = req.uma if req.uma in umas else None
+    if key is None:
+        hit = process.extractOne(req.uma, list(umas), scorer=fuzz.WRatio, score_cutoff=70)
+        if not hit:
+            raise HTTPException(status_code=404, detail="Unknown character")
+        key = hit[0]
+    uma = umas[key]
+    planner = race_planner.get_planner(lambda: _json_load_bom_tolerant(ASSETS / "races.json"))
+    objectives = race_planner.parse_objectives(uma.get("UmaObjectives")) if req.include_objectives else []
+    plan = await EXECUTOR.run(planner.plan, uma.get("UmaAptitudes") or {}, objectives,
+                              max_consecutive=req.max_consecutive, fan_target=req.fan_target,
+                              min_aptitude=req.min_aptitude, debut_fans=req.debut_fans)
+    return {"uma": key, **plan}
+
+class Rect(BaseModel):
+    x: float = Field(..., ge=0, le=1)
+    y: float = Field(..., ge=0, le=1)
+    w: float = Field(..., gt=0, le=1)
+    h: float = Field(..., gt=0, le=1)
+
+class LocateRequest(BaseModel):
+    width: int = Field(..., ge=1, le=4096)
+    height: int = Field(..., ge=1, le=4096)
+    data: str = Field(..., description="base64 of width*height uint8 grayscale pixels, row-major")
+    downscale: float = Field(1.0, gt=0, le=4, description="Sent pixels per original frame pixel; the template is scaled to match")
+    search: Optional[Rect] = Field(None, description="Fractional rect to search; default ocr.js PROBE_REGION")
+    scales: Optional[List[Annotated[float, Field(ge=0.5, le=2)]]] = Field(
+        None, min_length=1, max_length=9, description="Template scales tried around downscale, each 0.5-2")
+    threshold: float = Field(0.85, ge=-1, le=1)
+
+def _unscale(rect: Optional[Dict[str, int]], k: float) -> Optional[Dict[str, int]]:
+    return None if rect is None else {a: round(v / k) for a, v in rect.items()}
+
+@app.post("/ocr/locate")
+async def locate_title(req: LocateRequest):
+    """Optional offload of ocr.js's probe match; coordinates come back in sent and original frame pixels."""
+    try:
+        import _title_locator as title_locator  # numpy only loads for this endpoint
+    except ImportError:
+        raise HTTPException(status_code=501, detail="numpy is not installed")
+    try:
+        frame = title_locator.decode_gray(req.data, req.width, req.height)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    res = await EXECUTOR.run(
+        title_locator.get_locator().locate, frame, search=req.search.model_dump() if req.search else None,
+        base_scale=req.downscale, scales=req.scales or title_locator.DEFAULT_SCALES, threshold=req.threshold)
+    res["original"] = {k: _unscale(res[k], req.downscale) for k in ("match", "search_rect", "event_rect")}
+    return res
+
+class CardImage(BaseModel):
+    width: int = Field(..., ge=8, le=1024)
+    height: int = Field(..., ge=8, le=1024)
+    data: str = Field(..., description="base64 of width*height uint8 grayscale pixels, row-major")
+
+class IdentifyRequest(BaseModel):
+    cards: List[CardImage] = Field(..., min_length=1, max_length=12, description="Cropped support card images")
+    k: int = Field(3, ge=1, le=20)
+    max_distance: int = Field(23, ge=0, le=128, description="Hamming distance on the 128-bit pHash+dHash key")
+
+def _card_hash_sources():
+    doc = _json_load_bom_tolerant(ASSETS / "support_hashes.json")
+    cards = {Path(c.get("SupportImage") or "").stem or c.get("SupportSlug"): c
+             for c in _json_load_bom_tolerant(ASSETS / "support_hints.json")}
+    return doc, cards
+
+@app.post("/cards/identify")
+async def identify_cards(req: IdentifyRequest):
+    try:
+        import _card_hash as card_hash
+        import _title_locator as title_locator
+    except ImportError:
+        raise HTTPException(status_code=501, detail="numpy is not installed")
+    try:
+        index = card_hash.get_index(_card_hash_sources)
+    except FileNotFoundError:
+        raise HTTPException(status_code=503, detail="support_hashes.json missing; run build_assets.py")
+    grays = []
+    for i, card in enumerate(req.cards):
+        try:
+            grays.append(title_locator.decode_gray(card.data, card.width, card.height))
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=f"cards[{i}]: {e}")
+    results = await EXECUTOR.run(lambda: [index.identify(g, k=req.k, max_distance=req.max_distance) for g in grays])
+    return {"results": results}
+
+@app.get("/stats")
+async def stats():
+    return {"executor": EXECUTOR.stats(), "admission": {"event_by_name": EVENT_ADMISSION.stats()}}
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=3000)
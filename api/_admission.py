@@ -0,0 +1,197 @@
+"""
+Per-process admission control: a concurrency limit with a small, deadline-aware queue.
+
+At most `max_concurrent` requests run; up to `max_queue` more wait. A request that
+would wait longer than its latency budget (the configured one, or a shorter
+X-Deadline-Ms from the client) is rejected at once with Retry-After instead of
+being answered after the event it asked about has left the screen. The expected wait
+is estimated from the queue position and an EWMA of recent service times; a request
+that was admitted to the queue but still isn't running when its budget runs out is
+shed as well.
+
+Under MATCH_STRATEGY=auto most scans run inline and never suspend, so admit() yields
+to the loop once after taking a slot: requests that arrived in the same tick then see
+it in flight, and queue or shed behind it, instead of each finding the limiter idle.
+
+    python api/_admission.py --bench     # burst against /event_by_name, default strategy
+"""
+import asyncio
+import math
+import os
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, Deque, Dict, Optional
+
+
+class Shed(Exception):
+    def __init__(self, status: int, reason: str, retry_after: int, detail: str):
+        super().__init__(detail)
+        self.status, self.reason, self.retry_after, self.detail = status, reason, retry_after, detail
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        return {"Retry-After": str(self.retry_after)}
+
+
+def _env(key: str, default: float) -> float:
+    try:
+        return float(os.environ.get(key, default))
+    except ValueError:
+        return default
+
+
+class AdmissionController:
+    def __init__(self, name: str, max_concurrent: Optional[int] = None, max_queue: Optional[int] = None,
+                 budget_ms: Optional[float] = None, shed_status: Optional[int] = None):
+        self.name = name
+        self.max_concurrent = max(1, int(max_concurrent or _env("ADMISSION_MAX_CONCURRENT", 4)))
+        self.max_queue = max(0, int(max_queue if max_queue is not None else _env("ADMISSION_MAX_QUEUE", 16)))
+        self.budget_ms = float(budget_ms or _env("ADMISSION_BUDGET_MS", 250))
+        self.shed_status = int(shed_status or _env("ADMISSION_SHED_STATUS", 503))
+        if self.shed_status not in (429, 503):
+            raise ValueError("ADMISSION_SHED_STATUS must be 429 or 503")
+        self._lock = threading.Lock()
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._granted = set()   # waiters handed a slot whose wake-up may still be pending
+        self.in_flight = 0
+        self.ewma_ms = 5.0
+        self.counters = {"admitted": 0, "admitted_after_wait": 0, "shed_queue_full": 0,
+                         "shed_over_budget": 0, "shed_deadline": 0}
+        self.max_wait_ms = 0.0
+
+    def expected_wait_ms(self, position: int) -> float:
+        """Rough wait for the request at queue `position` (0 = next to run)."""
+        return (position // self.max_concurrent + 1) * self.ewma_ms
+
+    def _shed(self, reason: str, wait_ms: float, detail: str) -> Shed:
+        self.counters[f"shed_{reason}"] += 1
+        return Shed(self.shed_status, reason, max(1, math.ceil(wait_ms / 1000)), detail)
+
+    def _release(self) -> None:
+        with self._lock:
+            while self._waiters:
+                w = self._waiters.popleft()
+                if not w.done():
+                    # hand the slot straight to the next waiter; in_flight is unchanged
+                    self._granted.add(w)
+                    w.get_loop().call_soon_threadsafe(lambda w=w: w.done() or w.set_result(None))
+                    return
+            self.in_flight -= 1
+
+    @asynccontextmanager
+    async def admit(self, deadline_ms: Optional[float] = None):
+        """Run the body within the limit, or raise Shed without doing any work."""
+        budget = min(self.budget_ms, deadline_ms) if deadline_ms else self.budget_ms
+        t0 = time.perf_counter()
+        waited = False
+        with self._lock:
+            if self.in_flight < self.max_concurrent and not self._waiters:
+                self.in_flight += 1
+                fut = None
+            else:
+                position = len(self._waiters)
+                expected = self.expected_wait_ms(position)
+                if position >= self.max_queue:
+                    raise self._shed("queue_full", expected, f"{self.name}: queue full ({position} waiting)")
+                if expected > budget:
+                    raise self._shed("over_budget", expected,
+                                     f"{self.name}: expected wait {expected:.0f} ms exceeds {budget:.0f} ms budget")
+                fut = asyncio.get_running_loop().create_future()
+                self._waiters.append(fut)
+        if fut is not None:
+            waited = True
+            try:
+                await asyncio.wait_for(asyncio.shield(fut), timeout=budget / 1000)
+            except BaseException as e:   # budget ran out, or the request was cancelled while queued
+                with self._lock:
+                    handed = fut in self._granted
+                    self._granted.discard(fut)
+                    if not handed:
+                        fut.cancel()
+                        try:
+                            self._waiters.remove(fut)
+                        except ValueError:
+                            pass
+                if handed:
+                    self._release()   # got the slot just as it gave up; pass it on
+                if not isinstance(e, asyncio.TimeoutError):
+                    raise
+                with self._lock:
+                    raise self._shed("deadline", self.expected_wait_ms(len(self._waiters)),
+                                     f"{self.name}: not started within {budget:.0f} ms")
+        started = time.perf_counter()
+        with self._lock:
+            if fut is not None:
+                self._granted.discard(fut)
+            self.counters["admitted"] += 1
+            if waited:
+                self.counters["admitted_after_wait"] += 1
+            self.max_wait_ms = max(self.max_wait_ms, (started - t0) * 1000)
+        try:
+            await asyncio.sleep(0)  # let same-tick arrivals see this slot taken (inline bodies never yield)
+            yield
+        finally:
+            took = (time.perf_counter() - started) * 1000
+            with self._lock:
+                self.ewma_ms = 0.8 * self.ewma_ms + 0.2 * took
+            self._release()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            shed = sum(v for k, v in self.counters.items() if k.startswith("shed_"))
+            return {"max_concurrent": self.max_concurrent, "max_queue": self.max_queue,
+                    "budget_ms": self.budget_ms, "shed_status": self.shed_status,
+                    "in_flight": self.in_flight, "waiting": len(self._waiters),
+                    "service_ewma_ms": round(self.ewma_ms, 3), "max_wait_ms": round(self.max_wait_ms, 3),
+                    "shed": shed, **self.counters}
+
+
+# ---------- benchmark ----------
+
+async def _burst(app_mod, n: int, deadline_ms: Optional[float]) -> Dict[str, int]:
+    import random
+    import httpx
+    rng = random.Random(7)
+    # misspelled names: alias hits never reach admission, only fuzzy lookups do
+    queries = ["".join(c for c in name if rng.random() > 0.15) + " x" for name in rng.sample(app_mod.EVENT_NAMES, n)]
+    headers = {"X-Deadline-Ms": str(deadline_ms)} if deadline_ms else {}
+    transport = httpx.ASGITransport(app=app_mod.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as c:
+        rs = await asyncio.gather(*(c.get("/event_by_name", params={"event_name": q}, headers=headers) for q in queries))
+    out: Dict[str, int] = {}
+    for r in rs:
+        out[str(r.status_code)] = out.get(str(r.status_code), 0) + 1
+    return out
+
+
+def run_benchmark(sizes=(4, 20, 200), deadline_ms: Optional[float] = None) -> None:
+    import importlib.util
+    import warnings
+    from pathlib import Path
+    warnings.simplefilter("ignore")
+    spec = importlib.util.spec_from_file_location("api_app", Path(__file__).with_name("[...path].py"))
+    app_mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(app_mod)
+    print(f"[bench] MATCH_STRATEGY={app_mod.EXECUTOR.strategy}, deadline {deadline_ms or 'default'} ms")
+    for n in sizes:
+        app_mod.EVENT_ADMISSION = ctl = app_mod.admission.AdmissionController("event_by_name")
+        codes = asyncio.run(_burst(app_mod, n, deadline_ms))
+        st = ctl.stats()
+        print(f"[bench] burst {n:>4}: {codes}  admitted {st['admitted']} ({st['admitted_after_wait']} after wait)  "
+              f"shed queue_full {st['shed_queue_full']} over_budget {st['shed_over_budget']} deadline {st['shed_deadline']}  "
+              f"in_flight {st['in_flight']} waiting {st['waiting']}  calls {app_mod.EXECUTOR.stats()['calls']}")
+
+
+if __name__ == "__main__":
+    import argparse
+    ap = argparse.ArgumentParser(description="Admission control burst benchmark")
+    ap.add_argument("--bench", action="store_true")
+    ap.add_argument("--sizes", default="4,20,200")
+    ap.add_argument("--deadline-ms", type=float, default=None)
+    a = ap.parse_args()
+    if a.bench:
+        run_benchmark(tuple(int(x) for x in a.sizes.split(",")), a.deadline_ms)
+    else:
+        ap.print_help()
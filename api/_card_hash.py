@@ -0,0 +1,288 @@
+"""
+Perceptual hashes of support card thumbnails, and nearest-card lookup.
+
+Every image (thumbnail at build time, screenshot crop at query time) goes through the
+same steps: grayscale with ocr.js's weights, drop a small inset (rounded transparent
+corners, card frames), exact area-average downscale, then two 64-bit hashes:
+
+    dHash  9x8 grid, one bit per horizontal gradient sign
+    pHash  32x32 DCT-II, low 8x8 coefficients against their median (DC excluded)
+
+The key is the 128-bit concatenation, so Hamming distance on it is the sum of both
+hash distances and still a metric. Pools up to LINEAR_SCAN_MAX keys are searched with
+one vectorized popcount scan; larger ones go through multi-index hash tables
+(MultiIndexHamming), so a query only verifies the few keys sharing a near-identical
+16-bit chunk with it. Measured top-3 lookups (--bench, 1 CPU): at today's 168 cards the
+scan takes ~0.04 ms and the tables ~0.26 ms; they cross at ~1.7k keys (~0.28 ms each);
+at 10k the tables take ~0.37 ms against ~1.6 ms, at 100k ~1.3 ms against ~15 ms, so
+not sub-millisecond at that size.
+
+    python build_assets.py                 # writes assets/support_hashes.json
+    python api/_card_hash.py --bench       # chunk tables vs linear scan on growing pools
+"""
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+HASH_VERSION = 1
+INSET = 0.08
+_GRAY_WEIGHTS = (0.299, 0.587, 0.114)
+
+
+def to_gray(rgb: np.ndarray) -> np.ndarray:
+    """RGB(A) uint8 -> float gray; alpha is composited over white first."""
+    if rgb.ndim == 2:
+        return rgb.astype(np.float64)
+    f = rgb.astype(np.float64)
+    if f.shape[2] == 4:
+        a = f[..., 3:4] / 255.0
+        f = f[..., :3] * a + 255.0 * (1 - a)
+    return np.floor(f[..., 0] * _GRAY_WEIGHTS[0] + f[..., 1] * _GRAY_WEIGHTS[1] + f[..., 2] * _GRAY_WEIGHTS[2])
+
+
+def _area_matrix(src: int, dst: int) -> np.ndarray:
+    """dst x src weights: output cell i averages the source pixels it covers (fractionally at the edges)."""
+    edges = np.arange(dst + 1) * (src / dst)
+    j = np.arange(src)
+    lo = np.maximum(edges[:-1, None], j[None, :])
+    hi = np.minimum(edges[1:, None], j[None, :] + 1)
+    m = np.clip(hi - lo, 0, None)
+    return m / m.sum(axis=1, keepdims=True)
+
+
+def area_resize(gray: np.ndarray, out_h: int, out_w: int) -> np.ndarray:
+    h, w = gray.shape
+    return _area_matrix(h, out_h) @ gray @ _area_matrix(w, out_w).T
+
+
+def _inset(gray: np.ndarray, inset: float) -> np.ndarray:
+    h, w = gray.shape
+    dy, dx = int(round(h * inset)), int(round(w * inset))
+    return gray[dy:h - dy, dx:w - dx] if h - 2 * dy >= 8 and w - 2 * dx >= 8 else gray
+
+
+def _pack(bits: np.ndarray) -> int:
+    out = 0
+    for b in bits.ravel():
+        out = (out << 1) | int(b)
+    return out
+
+
+def dhash(gray: np.ndarray) -> int:
+    g = area_resize(gray, 8, 9)
+    return _pack(g[:, 1:] > g[:, :-1])
+
+
+_DCT32 = np.cos(np.pi * (2 * np.arange(32)[None, :] + 1) * np.arange(32)[:, None] / 64)
+
+def phash(gray: np.ndarray) -> int:
+    g = area_resize(gray, 32, 32)
+    low = (_DCT32 @ g @ _DCT32.T)[:8, :8].ravel()
+    return _pack(low > np.median(low[1:]))
+
+
+def card_hashes(gray: np.ndarray, inset: float = INSET) -> Tuple[int, int]:
+    """(pHash, dHash) of a grayscale card image."""
+    g = _inset(np.asarray(gray, dtype=np.float64), inset)
+    return phash(g), dhash(g)
+
+
+def key_of(ph: int, dh: int) -> int:
+    return (ph << 64) | dh
+
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+CHUNKS = 8                 # 128-bit key -> 8 x 16-bit chunk tables
+CHUNK_BITS = 128 // CHUNKS
+MAX_CHUNK_RADIUS = 2       # exact for distance <= CHUNKS * 3 - 1 = 23 from the tables alone
+MATCH_RADIUS = 23          # screenshot crops land <= ~16 from their thumbnail; distinct cards are >= 26 apart
+LINEAR_SCAN_MAX = 1_500    # up to this a plain scan beats the tables (see the module docstring)
+_POPCOUNT8 = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint16)
+_FLIPS = [np.array([m for m in range(1 << CHUNK_BITS) if bin(m).count("1") == r], dtype=np.int64)
+          for r in range(MAX_CHUNK_RADIUS + 1)]
+
+
+class MultiIndexHamming:
+    """
+    Multi-index hashing (Norouzi et al.): the key is cut into CHUNKS substrings with a
+    table each. Two keys within distance d agree to within d // CHUNKS bits on at least
+    one chunk, so after probing every table at chunk radius s, every key within
+    CHUNKS * (s + 1) - 1 has been seen; candidates are verified with a popcount over
+    their rows only. The 16-bit chunks are direct-addressed (CSR offsets per chunk
+    value), so one radius level of all tables is a single numpy gather. Wider queries
+    than the tables can answer, and pools of at most `linear_max` keys (no tables are
+    built for those), use one vectorized scan of the pool.
+    """
+
+    def __init__(self, keys: List[int], linear_max: int = LINEAR_SCAN_MAX):
+        self.size = len(keys)
+        self.linear = self.size <= linear_max
+        self.rows = np.frombuffer(b"".join(k.to_bytes(16, "big") for k in keys), dtype=np.uint8).reshape(-1, 16) \
+            if keys else np.zeros((0, 16), dtype=np.uint8)
+        if self.linear:
+            return
+        chunks = self.rows.reshape(-1, CHUNKS, CHUNK_BITS // 8).astype(np.int64)
+        chunks = (chunks[..., 0] << 8) | chunks[..., 1]
+        span = 1 << CHUNK_BITS
+        # table j occupies ids[j * size:(j + 1) * size]; offsets[j, v]:offsets[j, v + 1] holds chunk value v
+        self.offsets = np.zeros((CHUNKS, span + 1), dtype=np.int64)
+        self.ids = np.empty(CHUNKS * self.size, dtype=np.int64)
+        for j in range(CHUNKS):
+            col = chunks[:, j]
+            self.ids[j * self.size:(j + 1) * self.size] = np.argsort(col, kind="stable")
+            self.offsets[j, 1:] = np.cumsum(np.bincount(col, minlength=span)) + j * self.size
+            self.offsets[j, 0] = j * self.size
+
+    def distances(self, key: int, ids: Optional[np.ndarray] = None) -> np.ndarray:
+        q = np.frombuffer(key.to_bytes(16, "big"), dtype=np.uint8)
+        rows = self.rows if ids is None else self.rows[ids]
+        return _POPCOUNT8[rows ^ q].sum(axis=1)
+
+    def _probe(self, qc: np.ndarray, flips: np.ndarray) -> np.ndarray:
+        """Row ids whose chunk j equals qc[j] ^ f for some j and flip f."""
+        vals = qc[:, None] ^ flips[None, :]
+        j = np.arange(CHUNKS)[:, None]
+        lo, hi = self.offsets[j, vals].ravel(), self.offsets[j, vals + 1].ravel()
+        n = hi - lo
+        keep = n > 0
+        lo, n = lo[keep], n[keep]
+        if not len(n):
+            return n
+        # expand the [lo, lo + n) ranges without a Python loop
+        steps = np.ones(int(n.sum()), dtype=np.int64)
+        starts = np.cumsum(n)[:-1]
+        steps[0] = lo[0]
+        steps[starts] = lo[1:] - (lo[:-1] + n[:-1] - 1)
+        return self.ids[np.cumsum(steps)]
+
+    def nearest(self, key: int, k: int = 1, max_distance: int = MATCH_RADIUS) -> Tuple[List[Tuple[int, int]], str]:
+        """Up to k (distance, row) pairs within max_distance, closest first, and "tables" or "scan"."""
+        if self.linear:
+            return self._scan(key, k, max_distance), "scan"
+        qc = np.array([(key >> (128 - CHUNK_BITS * (j + 1))) & ((1 << CHUNK_BITS) - 1) for j in range(CHUNKS)],
+                      dtype=np.int64)
+        seen = np.zeros(self.size, dtype=bool)
+        found: List[Tuple[int, int]] = []
+        for s in range(MAX_CHUNK_RADIUS + 1):
+            ids = self._probe(qc, _FLIPS[s])
+            if len(ids):
+                ids = np.unique(ids)
+                ids = ids[~seen[ids]]
+                seen[ids] = True
+                d = self.distances(key, ids)
+                close = d <= max_distance
+                found.extend(zip(d[close].tolist(), ids[close].tolist()))
+                found.sort()
+            complete = CHUNKS * (s + 1) - 1   # every key this close has been seen
+            if complete >= max_distance or (len(found) >= k and found[k - 1][0] <= complete):
+                return found[:k], "tables"
+        return self._scan(key, k, max_distance), "scan"
+
+    def _scan(self, key: int, k: int, max_distance: int) -> List[Tuple[int, int]]:
+        d = self.distances(key)
+        order = np.argsort(d, kind="stable")[:k]
+        return [(int(d[i]), int(i)) for i in order if d[i] <= max_distance]
+
+
+class CardHashIndex:
+    def __init__(self, doc: Dict[str, Any], cards: Optional[Dict[str, Dict[str, Any]]] = None):
+        self.inset = float(doc.get("inset", INSET))
+        self.entries: Dict[str, Tuple[int, int]] = {
+            slug: (int(h["phash"], 16), int(h["dhash"], 16)) for slug, h in (doc.get("cards") or {}).items()}
+        self.slugs = sorted(self.entries)
+        self.index = MultiIndexHamming([key_of(*self.entries[slug]) for slug in self.slugs])
+        self.cards = cards or {}
+
+    def identify(self, gray: np.ndarray, k: int = 3, max_distance: int = MATCH_RADIUS) -> Dict[str, Any]:
+        t0 = time.perf_counter()
+        ph, dh = card_hashes(gray, self.inset)
+        t1 = time.perf_counter()
+        hits, method = self.index.nearest(key_of(ph, dh), k=k, max_distance=max_distance)
+        t2 = time.perf_counter()
+        matches = []
+        for d, row in hits:
+            slug = self.slugs[row]
+            eph, edh = self.entries[slug]
+            card = self.cards.get(slug, {})
+            matches.append({"slug": slug, "id": card.get("SupportId"), "name": card.get("SupportName"),
+                            "rarity": card.get("SupportRarity"), "distance": d,
+                            "phash_distance": hamming(ph, eph), "dhash_distance": hamming(dh, edh)})
+        return {"phash": f"{ph:016x}", "dhash": f"{dh:016x}", "matches": matches,
+                "method": method, "pool": self.index.size,
+                "timing_ms": {"hash": round((t1 - t0) * 1000, 3), "search": round((t2 - t1) * 1000, 4)}}
+
+
+_INDEX: Optional[CardHashIndex] = None
+_INDEX_LOCK = threading.Lock()
+
+def get_index(loader) -> CardHashIndex:
+    """loader() -> (support_hashes.json document, {slug: support_hints card})."""
+    global _INDEX
+    if _INDEX is None:
+        with _INDEX_LOCK:
+            if _INDEX is None:
+                _INDEX = CardHashIndex(*loader())
+    return _INDEX
+
+
+# ---------- benchmark ----------
+
+def run_benchmark(hashes_path: str, pools=(168, 1_000, 10_000, 100_000), queries: int = 500) -> None:
+    """
+    Real thumbnail keys padded with synthetic cards (a real key with 28-40 random bits
+    flipped, as far apart as distinct card art is), queried with real keys after 0-16 bit
+    flips (what a screenshot crop costs). Tables against the full numpy popcount scan.
+    """
+    import json
+    with open(hashes_path, encoding="utf-8") as f:
+        doc = json.load(f)
+    real = [key_of(int(h["phash"], 16), int(h["dhash"], 16)) for h in doc["cards"].values()]
+    rng = np.random.default_rng(11)
+
+    def flip(key: int, n: int) -> int:
+        for b in rng.choice(128, size=n, replace=False):
+            key ^= 1 << int(b)
+        return key
+
+    print(f"[bench] {len(real)} thumbnail keys from {hashes_path}, {queries} queries per pool")
+    for n in pools:
+        keys = real + [flip(real[i % len(real)], int(rng.integers(28, 41))) for i in range(max(0, n - len(real)))]
+        t0 = time.perf_counter()
+        tables = MultiIndexHamming(keys, linear_max=0)
+        build_ms = (time.perf_counter() - t0) * 1000
+        linear = MultiIndexHamming(keys, linear_max=len(keys))
+        qs = [(int(i), flip(real[i], int(rng.integers(0, 17)))) for i in rng.integers(0, len(real), size=queries)]
+
+        row = []
+        for label, index in (("tables", tables), ("linear", linear)):
+            ok = scans = 0
+            lat = []
+            for want, q in qs:
+                t0 = time.perf_counter()
+                hits, method = index.nearest(q, k=3)
+                lat.append(time.perf_counter() - t0)
+                ok += bool(hits) and hits[0][1] == want
+                scans += method == "scan" and index is tables
+            lat_ms = np.array(lat) * 1000
+            row.append(f"{label} mean {lat_ms.mean():.4f} ms p99 {np.percentile(lat_ms, 99):.4f} ms (top-1 {ok}/{queries})")
+        used = "linear" if n <= LINEAR_SCAN_MAX else "tables"
+        print(f"[bench] pool {n:>7,}: {'  '.join(row)}  table fallbacks {scans}, build {build_ms:.0f} ms  -> uses {used}")
+
+
+if __name__ == "__main__":
+    import argparse
+    from pathlib import Path
+    ap = argparse.ArgumentParser(description="Support card hash index benchmark")
+    ap.add_argument("--bench", action="store_true")
+    ap.add_argument("--hashes", default=str(Path(__file__).resolve().parents[1] / "assets" / "support_hashes.json"))
+    ap.add_argument("--queries", type=int, default=500)
+    a = ap.parse_args()
+    if a.bench:
+        run_benchmark(a.hashes, queries=a.queries)
+    else:
+        ap.print_help()
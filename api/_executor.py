@@ -0,0 +1,224 @@
+"""
+Where CPU-bound lookups run, so they don't stall the event loop for everyone else.
+
+Every endpoint is `async def`, so anything synchronous inside one (a rapidfuzz scan,
+a skill-condition sweep, an FFT) blocks every other in-flight request until it is
+done. Strategies (MATCH_STRATEGY):
+
+    auto     small fuzzy scans inline, larger scans and batch work on the thread pool
+    inline   everything on the event loop (the old behaviour)
+    thread   everything on a bounded thread pool (MATCH_THREADS)
+    process  fuzzy scans on a process pool (MATCH_PROCESSES), batch work on threads
+
+rapidfuzz's process.extract holds the GIL for the whole scan, so pooled scans use
+process.cdist (which releases it) plus a stable top-k; for the same scorer that gives
+exactly extract's results and order. Process workers get the registered choice lists
+once, in their initializer, instead of with every call.
+
+    python api/_executor.py --bench      # p50/p99 under concurrent load, per strategy
+"""
+import asyncio
+import functools
+import os
+import threading
+from concurrent.futures import Executor as _PoolExecutor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from rapidfuzz import fuzz, process
+
+STRATEGIES = ("auto", "inline", "thread", "process")
+
+# Relative cost per (choice x query character) against fuzz.ratio, measured on the event list.
+SCORER_COST = {"ratio": 1, "partial_ratio": 8, "token_set_ratio": 6, "WRatio": 25}
+# ~0.25 ms of fuzz.ratio: a 70-character OCR line against ~1,400 event names stays inline.
+DEFAULT_INLINE_MAX_WORK = 100_000
+
+Match = Tuple[str, float, int]
+
+_CHOICES: Dict[str, List[str]] = {}
+
+
+def register_choices(name: str, choices: List[str]) -> None:
+    """Name a choice list once so scans (and process workers) can refer to it by name."""
+    _CHOICES[name] = list(choices)
+
+
+def _init_worker(choices: Dict[str, List[str]]) -> None:
+    _CHOICES.update(choices)
+
+
+def scan(name: str, query: str, scorer: str, limit: Optional[int], score_cutoff: Optional[float]) -> List[Match]:
+    """process.extract's result via cdist (GIL released); runs in pool threads and worker processes."""
+    import numpy as np
+    choices = _CHOICES[name]
+    scores = process.cdist([query], choices, scorer=getattr(fuzz, scorer), dtype=np.float64,
+                           workers=1, score_cutoff=score_cutoff)[0]
+    order = np.argsort(-scores, kind="stable")
+    if limit is not None:
+        order = order[:limit]
+    out = [(choices[i], float(scores[i]), int(i)) for i in order]
+    return [m for m in out if m[1] >= score_cutoff] if score_cutoff is not None else out
+
+
+def scan_inline(name: str, query: str, scorer: str, limit: Optional[int], score_cutoff: Optional[float]) -> List[Match]:
+    return process.extract(query, _CHOICES[name], scorer=getattr(fuzz, scorer), limit=limit, score_cutoff=score_cutoff)
+
+
+def _env_int(key: str, default: int) -> int:
+    try:
+        return int(os.environ.get(key, default))
+    except ValueError:
+        return default
+
+
+class MatchExecutor:
+    def __init__(self, strategy: Optional[str] = None, threads: Optional[int] = None,
+                 processes: Optional[int] = None, inline_max_work: Optional[int] = None):
+        self.strategy = (strategy or os.environ.get("MATCH_STRATEGY") or "auto").lower()
+        if self.strategy not in STRATEGIES:
+            raise ValueError(f"MATCH_STRATEGY must be one of {STRATEGIES}, not {self.strategy!r}")
+        cpus = os.cpu_count() or 1
+        self.threads = threads or _env_int("MATCH_THREADS", min(4, cpus + 1))
+        self.processes = processes or _env_int("MATCH_PROCESSES", min(2, cpus))
+        self.inline_max_work = inline_max_work if inline_max_work is not None else \
+            _env_int("MATCH_INLINE_MAX_WORK", DEFAULT_INLINE_MAX_WORK)
+        self._lock = threading.Lock()
+        self._thread_pool: Optional[ThreadPoolExecutor] = None
+        self._process_pool: Optional[ProcessPoolExecutor] = None
+        self.calls = {"inline": 0, "thread": 0, "process": 0}
+
+    def _pool(self, mode: str) -> _PoolExecutor:
+        with self._lock:
+            if mode == "process":
+                if self._process_pool is None:
+                    self._process_pool = ProcessPoolExecutor(self.processes, initializer=_init_worker,
+                                                             initargs=(dict(_CHOICES),))
+                return self._process_pool
+            if self._thread_pool is None:
+                self._thread_pool = ThreadPoolExecutor(self.threads, thread_name_prefix="match")
+            return self._thread_pool
+
+    def _count(self, mode: str) -> None:
+        with self._lock:
+            self.calls[mode] += 1
+
+    def scan_mode(self, work: int) -> str:
+        if self.strategy == "auto":
+            return "inline" if work <= self.inline_max_work else "thread"
+        return self.strategy
+
+    async def extract(self, name: str, query: str, scorer: str = "ratio", limit: Optional[int] = 5,
+                      score_cutoff: Optional[float] = None) -> List[Match]:
+        work = len(_CHOICES[name]) * max(1, len(query)) * SCORER_COST.get(scorer, 10)
+        mode = self.scan_mode(work)
+        self._count(mode)
+        if mode == "inline":
+            return scan_inline(name, query, scorer, limit, score_cutoff)
+        call = functools.partial(scan, name, query, scorer, limit, score_cutoff)
+        return await asyncio.get_running_loop().run_in_executor(self._pool(mode), call)
+
+    async def extract_one(self, name: str, query: str, scorer: str = "ratio",
+                          score_cutoff: Optional[float] = None) -> Optional[Match]:
+        hits = await self.extract(name, query, scorer, limit=1, score_cutoff=score_cutoff)
+        return hits[0] if hits else None
+
+    async def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Batch/CPU work that closes over in-process state: inline only under "inline", else threads."""
+        mode = "inline" if self.strategy == "inline" else "thread"
+        self._count(mode)
+        if mode == "inline":
+            return fn(*args, **kwargs)
+        return await asyncio.get_running_loop().run_in_executor(self._pool(mode), functools.partial(fn, *args, **kwargs))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"strategy": self.strategy, "inline_max_work": self.inline_max_work,
+                    "threads": self.threads, "processes": self.processes, "calls": dict(self.calls)}
+
+    def shutdown(self) -> None:
+        with self._lock:
+            pools, self._thread_pool, self._process_pool = (self._thread_pool, self._process_pool), None, None
+        for p in pools:
+            if p is not None:
+                p.shutdown(wait=True, cancel_futures=True)
+
+
+# ---------- benchmark ----------
+
+async def _load(app_mod, seconds: float, clients: int, probe_every_ms: float) -> Dict[str, Any]:
+    import random
+    import time
+    import httpx
+
+    rng = random.Random(5)
+    names = app_mod.EVENT_NAMES
+    def ocr_line() -> str:
+        # what OCR sends for a two-line ribbon: the title plus noise
+        base = rng.choice(names) + " " + rng.choice(names)
+        return "".join(c if rng.random() > 0.1 else rng.choice("Il1|.,") for c in base)
+    heavy = [
+        lambda c: c.get("/event_by_name", params={"event_name": ocr_line()}),
+        lambda c: c.get("/hints", params={"skill": "Corner " + rng.choice(["Adept", "Recovry", "Acceleraton"]) + " ◎x",
+                                           "min_score": 60}),
+        lambda c: c.post("/skills/match", json={"context": {"distance_type": rng.randint(1, 4)}}),
+    ]
+    lat: Dict[str, List[float]] = {"probe": [], "heavy": []}
+    stop = time.perf_counter() + seconds
+    transport = httpx.ASGITransport(app=app_mod.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as c:
+        async def worker():
+            while time.perf_counter() < stop:
+                t0 = time.perf_counter()
+                r = await rng.choice(heavy)(c)
+                if r.status_code >= 500:
+                    raise RuntimeError(r.text)
+                lat["heavy"].append(time.perf_counter() - t0)
+
+        async def prober():
+            # the cheap call every page makes; should never wait behind someone else's scan
+            while time.perf_counter() < stop:
+                t0 = time.perf_counter()
+                await c.get("/event_by_name", params={"event_name": rng.choice(names), "limit": 1})
+                lat["probe"].append(time.perf_counter() - t0)
+                await asyncio.sleep(probe_every_ms / 1000)
+
+        await asyncio.gather(prober(), *(worker() for _ in range(clients)))
+    return lat
+
+
+def run_benchmark(seconds: float = 4.0, clients: int = 8, strategies=STRATEGIES) -> None:
+    import importlib.util
+    import warnings
+    from pathlib import Path
+
+    import numpy as np
+    warnings.simplefilter("ignore")
+    spec = importlib.util.spec_from_file_location("api_app", Path(__file__).with_name("[...path].py"))
+    app_mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(app_mod)
+    app_mod.skill_conditions.get_index(app_mod.ASSETS / "skills_all.json", app_mod._json_load_bom_tolerant)
+    print(f"[bench] {clients} heavy clients + 1 probe, {seconds:.0f}s per strategy, {os.cpu_count()} CPU(s)")
+    for s in strategies:
+        # the app's own copy of this module holds the registered choices (this one is __main__)
+        app_mod.EXECUTOR = app_mod.executor.MatchExecutor(strategy=s)
+        asyncio.run(_load(app_mod, 0.5, clients, 2))   # warm pools and caches
+        lat = asyncio.run(_load(app_mod, seconds, clients, 2))
+        app_mod.EXECUTOR.shutdown()
+        p = {k: np.array(v) * 1000 for k, v in lat.items()}
+        print(f"[bench] {s:<8} probe p50 {np.percentile(p['probe'], 50):6.2f} ms  p99 {np.percentile(p['probe'], 99):7.2f} ms"
+              f"  | heavy p50 {np.percentile(p['heavy'], 50):6.2f} ms  p99 {np.percentile(p['heavy'], 99):7.2f} ms"
+              f"  | {len(lat['heavy']) / seconds:6.0f} heavy req/s")
+
+
+if __name__ == "__main__":
+    import argparse
+    ap = argparse.ArgumentParser(description="Event-loop offload benchmark")
+    ap.add_argument("--bench", action="store_true")
+    ap.add_argument("--seconds", type=float, default=4.0)
+    ap.add_argument("--clients", type=int, default=8)
+    ap.add_argument("--strategies", default=",".join(STRATEGIES))
+    a = ap.parse_args()
+    if a.bench:
+        run_benchmark(a.seconds, a.clients, tuple(a.strategies.split(",")))
+    else:
+        ap.print_help()
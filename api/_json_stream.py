@@ -0,0 +1,148 @@
+"""
+Incremental reader for the top-level JSON arrays in assets/.
+
+json.load materializes the whole document before the caller can drop anything; for
+uma_data.json that is every character's stats, objectives and aptitudes when the
+event table only wants UmaEvents. iter_array() reads the file in chunks, decodes
+UTF-8 incrementally (the BOM is dropped once, by the utf-8-sig decoder) and hands out
+one array element at a time via JSONDecoder.raw_decode, so peak memory is what the
+caller keeps plus one element.
+
+    python api/_json_stream.py --bench     # cold-start peak RSS / time, json.load vs streaming
+"""
+import codecs
+import json
+import re
+from pathlib import Path
+from typing import Any, Iterator
+
+CHUNK_BYTES = 64 * 1024
+_WS = " \t\n\r"
+_DECODER = json.JSONDecoder()
+_SCALAR_END = re.compile(r"[,\]\s]")
+
+
+def iter_array(path: Path, chunk_bytes: int = CHUNK_BYTES) -> Iterator[Any]:
+    """Yield the elements of the JSON array in `path` one by one."""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    with open(path, "rb") as f:
+        buf, pos, eof = "", 0, False
+
+        def more() -> bool:
+            nonlocal buf, pos, eof
+            if eof:
+                return False
+            raw = f.read(chunk_bytes)
+            eof = not raw
+            buf = buf[pos:] + decoder.decode(raw, final=eof)
+            pos = 0
+            return True
+
+        def skip_ws() -> None:
+            nonlocal pos
+            while True:
+                while pos < len(buf) and buf[pos] in _WS:
+                    pos += 1
+                if pos < len(buf) or not more():
+                    return
+
+        skip_ws()
+        if buf[pos:pos + 1] != "[":
+            raise ValueError(f"{path}: expected a top-level JSON array")
+        pos += 1
+        first = True
+        while True:
+            skip_ws()
+            if pos >= len(buf):
+                raise ValueError(f"{path}: unterminated array")
+            if buf[pos] == "]":
+                return
+            if not first:
+                if buf[pos] != ",":
+                    raise ValueError(f"{path}: expected ',' at char {pos} of the current window")
+                pos += 1
+                skip_ws()
+            first = False
+            if buf[pos] not in '{["':
+                # numbers and literals have no closing delimiter: get the whole token into the window
+                while _SCALAR_END.search(buf, pos) is None and more():
+                    pass
+            while True:
+                try:
+                    value, end = _DECODER.raw_decode(buf, pos)
+                except json.JSONDecodeError:
+                    if not more():
+                        raise
+                    continue
+                break
+            pos = end
+            yield value
+
+
+# ---------- benchmark ----------
+
+def _measure(mode: str, files) -> dict:
+    import resource
+    import time
+    import tracemalloc
+    trace = mode.endswith("+trace")
+    if trace:
+        tracemalloc.start()
+    base = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    t0 = time.perf_counter()
+    kept = []
+    for path, nested in files:
+        if mode.startswith("eager"):
+            with open(path, encoding="utf-8-sig") as fh:
+                rows = json.load(fh)
+        else:
+            rows = iter_array(Path(path))
+        for row in rows:
+            for ev in (row.get(nested) or []) if nested else [row]:
+                kept.append((ev.get("EventName"), ev.get("EventOptions")))
+            del row
+        rows = None
+    out = {"ms": (time.perf_counter() - t0) * 1000, "events": len(kept),
+           "rss_delta_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - base}
+    if trace:
+        out["heap_peak_kb"] = tracemalloc.get_traced_memory()[1] // 1024
+    return out
+
+
+def run_benchmark(assets: Path, runs: int = 5) -> None:
+    """Each measurement in a fresh interpreter: ru_maxrss only ever grows."""
+    import statistics
+    import subprocess
+    import sys
+    files = [(str(assets / "support_card.json"), None), (str(assets / "uma_data.json"), "UmaEvents"),
+             (str(assets / "career.json"), None)]
+    arg = json.dumps(files)
+    results = {}
+    for mode in ("eager", "stream", "eager+trace", "stream+trace"):
+        samples = []
+        for _ in range(runs if "trace" not in mode else 1):
+            r = subprocess.run([sys.executable, __file__, "--measure", mode, arg], capture_output=True, text=True, check=True)
+            samples.append(json.loads(r.stdout))
+        results[mode] = samples
+    for mode in ("eager", "stream"):
+        s = results[mode]
+        print(f"[bench] {mode:<6} {s[0]['events']} events  time median {statistics.median(x['ms'] for x in s):7.1f} ms  "
+              f"peak RSS +{statistics.median(x['rss_delta_kb'] for x in s) / 1024:5.1f} MiB  "
+              f"heap peak {results[mode + '+trace'][0]['heap_peak_kb'] / 1024:5.1f} MiB")
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+    ap = argparse.ArgumentParser(description="Streaming JSON loader benchmark")
+    ap.add_argument("--bench", action="store_true")
+    ap.add_argument("--runs", type=int, default=5)
+    ap.add_argument("--measure", nargs=2, metavar=("MODE", "FILES"), help=argparse.SUPPRESS)
+    a = ap.parse_args()
+    if a.measure:
+        print(json.dumps(_measure(a.measure[0], json.loads(a.measure[1]))))
+    elif a.bench:
+        run_benchmark(Path(__file__).resolve().parents[1] / "assets", a.runs)
+    else:
+        ap.print_help()
+        sys.exit(0)
@@ -0,0 +1,258 @@
+"""
+Career race schedule planner over races.json.
+
+A career is 72 turns: three years x twelve months x Early/Late. Every race sits on
+one turn (its Schedule). The solver is a forward DP over turns whose state is
+(consecutive races so far, progress on the active "N races" objective, races run)
+and whose value is the maximum fan count reachable in that state; more fans never
+hurts (entry requirements, fan objectives), so max-fans dominance is exact. Per
+turn only three moves exist: rest, the best-paying race the fans allow, and the
+best race that also counts for the active objective.
+"""
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+TURNS = 72
+YEARS = ("Junior", "Classic", "Senior")
+MONTHS = ("Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec")
+GRADE_RANK = {"Pre-OP": 1, "OP": 2, "G3": 3, "G2": 4, "G1": 5}
+APTITUDE_RANK = {a: i for i, a in enumerate("GFEDCBAS")}
+DEFAULT_DEBUT_TURN = 12
+DEBUT_RACE = "Junior Make Debut"
+DEBUT_FANS = 700   # races.json lists the debut as "Varies"; every later race needs >= 350 fans
+
+_SCHEDULE_RE = re.compile(r"^(Junior|Classic|Senior) Year (Early|Late) (\w{3})")
+_TURN_RE = re.compile(r"Turn\s+(\d+)")
+_COUNT_OBJ_RE = re.compile(r" in (\d+) (.+?) (?:or higher )?races?$", re.I)
+_FANS_OBJ_RE = re.compile(r"Have at least ([\d,]+) fans", re.I)
+_RACE_OBJ_RE = re.compile(r" in (?:the )?(.+)$")
+
+
+def turn_of(schedule: str) -> Optional[int]:
+    """'Classic Year Late May' -> 34 (1-based turn); None for Pre-Debut and unknown slots."""
+    m = _SCHEDULE_RE.match(schedule or "")
+    if not m or m.group(3) not in MONTHS:
+        return None
+    return YEARS.index(m.group(1)) * 24 + MONTHS.index(m.group(3)) * 2 + (m.group(2) == "Late") + 1
+
+
+def slot_label(turn: int) -> str:
+    t = turn - 1
+    return f"{YEARS[t // 24]} Year {'Late' if t % 2 else 'Early'} {MONTHS[(t % 24) // 2]}"
+
+
+def _int_prefix(s: Any) -> int:
+    m = re.match(r"\s*([\d,]+)", str(s or ""))
+    return int(m.group(1).replace(",", "")) if m else 0
+
+
+@dataclass(frozen=True)
+class Race:
+    name: str
+    turn: int
+    grade: str
+    terrain: str
+    distance: str
+    fans: int          # fans for 1st place
+    required: int      # fans needed to enter
+
+    @property
+    def rank(self) -> int:
+        return GRADE_RANK.get(self.grade, 0)
+
+
+@dataclass
+class Objective:
+    turn: int
+    text: str
+    kind: str                       # "race" | "fans" | "count"
+    race: Optional[str] = None      # kind == race
+    fans: int = 0                   # kind == fans
+    count: int = 0                  # kind == count
+    min_rank: int = 0               # kind == count
+    since: int = 0                  # kind == count: races after this turn count
+
+
+def parse_races(rows: List[Dict[str, Any]]) -> List[Race]:
+    out = []
+    for r in rows:
+        turn = turn_of(r.get("Schedule", ""))
+        if turn is None:
+            continue
+        out.append(Race(name=r.get("RaceName", ""), turn=turn, grade=r.get("Grade", ""),
+                        terrain=r.get("Terrain", ""), distance=r.get("DistanceType", ""),
+                        fans=_int_prefix(r.get("FansGained")), required=_int_prefix(r.get("FansRequired"))))
+    return out
+
+
+def parse_objectives(objs: List[Dict[str, Any]]) -> List[Objective]:
+    out: List[Objective] = []
+    prev = 0
+    for o in objs or []:
+        m = _TURN_RE.search(o.get("Turn", ""))
+        if not m:
+            continue
+        turn = int(m.group(1))
+        text = re.sub(r"^\d+\.\s*", "", o.get("ObjectiveName", "")).strip()
+        if (f := _FANS_OBJ_RE.search(text)):
+            out.append(Objective(turn, text, "fans", fans=int(f.group(1).replace(",", ""))))
+        elif (c := _COUNT_OBJ_RE.search(text)):
+            grade = c.group(2).strip()
+            out.append(Objective(turn, text, "count", count=int(c.group(1)),
+                                 min_rank=GRADE_RANK.get(grade, 1), since=prev))
+        elif (r := _RACE_OBJ_RE.search(text)):
+            out.append(Objective(turn, text, "race", race=r.group(1).strip()))
+        prev = turn
+    return out
+
+
+class RacePlanner:
+    def __init__(self, race_rows: List[Dict[str, Any]]):
+        self.races = parse_races(race_rows)
+        self._slots_cache: Dict[Tuple, List[List[Race]]] = {}
+        self._lock = threading.Lock()
+
+    def slots(self, surfaces: Tuple[str, ...], distances: Tuple[str, ...]) -> List[List[Race]]:
+        """Per-turn candidate lists (index = turn), best fans first; cached per aptitude profile."""
+        key = (surfaces, distances)
+        with self._lock:
+            hit = self._slots_cache.get(key)
+        if hit is not None:
+            return hit
+        slots: List[List[Race]] = [[] for _ in range(TURNS + 1)]
+        for r in self.races:
+            if r.terrain in surfaces and r.distance in distances:
+                slots[r.turn].append(r)
+        for s in slots:
+            s.sort(key=lambda r: (-r.fans, -r.rank, r.name))
+        with self._lock:
+            self._slots_cache[key] = slots
+        return slots
+
+    def race_in_slot(self, name: str, turn: int) -> Optional[Race]:
+        for r in self.races:
+            if r.turn == turn and r.name == name:
+                return r
+        return None
+
+    def plan(self, aptitudes: Dict[str, Any], objectives: List[Objective], max_consecutive: int = 2,
+             fan_target: Optional[int] = None, min_aptitude: str = "B",
+             debut_fans: int = DEBUT_FANS) -> Dict[str, Any]:
+        t0 = time.perf_counter()
+        floor = APTITUDE_RANK.get(min_aptitude.upper(), APTITUDE_RANK["B"])
+        ok = lambda grp: tuple(sorted(k for k, v in (aptitudes.get(grp) or {}).items()
+                                      if APTITUDE_RANK.get(str(v).upper(), 0) >= floor))
+        slots = self.slots(ok("Surface"), ok("Distance"))
+
+        forced: Dict[int, Optional[Race]] = {}
+        unresolved: List[str] = []
+        debut_turn = DEFAULT_DEBUT_TURN
+        for ob in objectives:
+            if ob.kind != "race":
+                continue
+            if ob.race == DEBUT_RACE:
+                debut_turn = ob.turn
+                forced[ob.turn] = Race(DEBUT_RACE, ob.turn, "Pre Debut", "", "", debut_fans, 0)
+                continue
+            race = self.race_in_slot(ob.race, ob.turn)
+            if race is None:
+                unresolved.append(ob.text)
+            forced[ob.turn] = race  # None: still a race turn, fans unknown
+        fan_checks = {ob.turn: ob.fans for ob in objectives if ob.kind == "fans"}
+        counts = [ob for ob in objectives if ob.kind == "count"]
+
+        def active_count(turn: int) -> Optional[Objective]:
+            for ob in counts:
+                if ob.since < turn <= ob.turn:
+                    return ob
+            return None
+
+        # state (consecutive, progress, races) -> (fans, back pointer)
+        layer: Dict[Tuple[int, int, int], Tuple[int, Any]] = {(0, 0, 0): (0, None)}
+        for turn in range(1, TURNS + 1):
+            cobj = active_count(turn)
+            nxt: Dict[Tuple[int, int, int], Tuple[int, Any]] = {}
+
+            def push(key, fans, back):
+                cur = nxt.get(key)
+                if cur is None or fans > cur[0]:
+                    nxt[key] = (fans, back)
+
+            for (consec, prog, n), (fans, back) in layer.items():
+                if turn in forced:
+                    moves: List[Optional[Race]] = [forced[turn]]
+                    must_race = True
+                elif turn < debut_turn:
+                    moves, must_race = [], False
+                else:
+                    eligible = [r for r in slots[turn] if r.required <= fans]
+                    moves = eligible[:1]
+                    if cobj and prog < cobj.count:
+                        q = next((r for r in eligible if r.rank >= cobj.min_rank), None)
+                        if q is not None and q not in moves:
+                            moves.append(q)
+                    must_race = False
+                if not must_race:
+                    push((0, prog, n), fans, (back, turn, None))
+                for race in moves:
+                    if consec + 1 > max_consecutive:
+                        continue
+                    gain = race.fans if race else 0
+                    p = prog
+                    if cobj and race is not None and race.rank >= cobj.min_rank:
+                        p = min(prog + 1, cobj.count)
+                    push((consec + 1, p, n + 1), fans + gain, (back, turn, race or "objective"))
+
+            # end-of-turn objective checks
+            if turn in fan_checks:
+                nxt = {k: v for k, v in nxt.items() if v[0] >= fan_checks[turn]}
+            if cobj and turn == cobj.turn:
+                nxt = {(c, 0, n): v for (c, p, n), v in nxt.items() if p >= cobj.count}
+            layer = nxt
+            if not layer:
+                return {"feasible": False, "failed_at_turn": turn, "failed_slot": slot_label(turn),
+                        "unresolved_objectives": unresolved,
+                        "solve_ms": round((time.perf_counter() - t0) * 1000, 2)}
+
+        finals = [(v[0], k[2], v[1]) for k, v in layer.items()]
+        if fan_target is not None and any(f >= fan_target for f, _, _ in finals):
+            fans, n, back = min((x for x in finals if x[0] >= fan_target), key=lambda x: (x[1], -x[0]))
+            target_met = True
+        else:
+            fans, n, back = max(finals, key=lambda x: (x[0], -x[1]))
+            target_met = fan_target is None
+        schedule = []
+        objective_turns = {ob.turn: ob.text for ob in objectives}
+        while back is not None:
+            back, turn, race = back
+            if race is None:
+                continue
+            entry: Dict[str, Any] = {"turn": turn, "slot": slot_label(turn)}
+            if isinstance(race, Race):
+                entry.update(race=race.name, grade=race.grade, fans=race.fans)
+            else:
+                entry.update(race=None, grade=None, fans=0)
+            if turn in objective_turns:
+                entry["objective"] = objective_turns[turn]
+            schedule.append(entry)
+        schedule.reverse()
+        return {
+            "feasible": True, "total_fans": fans, "races": n, "fan_target_met": target_met,
+            "schedule": schedule, "unresolved_objectives": unresolved,
+            "solve_ms": round((time.perf_counter() - t0) * 1000, 2),
+        }
+
+
+_PLANNER: Optional[RacePlanner] = None
+_PLANNER_LOCK = threading.Lock()
+
+def get_planner(rows_loader) -> RacePlanner:
+    global _PLANNER
+    if _PLANNER is None:
+        with _PLANNER_LOCK:
+            if _PLANNER is None:
+                _PLANNER = RacePlanner(rows_loader())
+    return _PLANNER
@@ -0,0 +1,255 @@
+"""
+Skill activation conditions from skills_all.json, compiled once.
+
+Expressions look like `distance_type==3&phase_random==1@order_rate<=50`: `&` binds
+tighter than `@` (OR), every term is `<variable><op><int>`. Each skill's
+condition_groups are parsed into tuples of (variable, op, value) alternatives and
+indexed on the discrete race variables (distance, style, surface, ...) so a query
+only evaluates skills that can still apply to the given race.
+"""
+import operator
+import re
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+OPS: Dict[str, Callable[[int, int], bool]] = {
+    "==": operator.eq, "!=": operator.ne, ">=": operator.ge,
+    "<=": operator.le, ">": operator.gt, "<": operator.lt,
+}
+_TERM_RE = re.compile(r"^\s*([A-Za-z_][A-Za-z0-9_]*)\s*(==|!=|>=|<=|>|<)\s*(-?\d+)\s*$")
+
+# Race-level variables fixed for the whole race: these are indexed, everything else
+# (phase, order, corner, ...) changes during the race and is only evaluated.
+INDEXED_VARS = ("distance_type", "running_style", "ground_type", "ground_condition",
+                "season", "weather", "rotation", "track_id", "course_distance")
+
+# Friendly names accepted in a context, mapped to the game's integer codes.
+VALUE_ALIASES: Dict[str, Dict[str, int]] = {
+    "distance_type": {"short": 1, "sprint": 1, "mile": 2, "medium": 3, "middle": 3, "long": 4},
+    "running_style": {"front": 1, "runner": 1, "front_runner": 1, "pace": 2, "pace_chaser": 2,
+                      "late": 3, "late_surger": 3, "end": 4, "closer": 4, "end_closer": 4},
+    "ground_type": {"turf": 1, "dirt": 2},
+    "ground_condition": {"firm": 1, "good": 2, "soft": 3, "heavy": 4},
+    "season": {"spring": 1, "summer": 2, "autumn": 3, "fall": 3, "winter": 4, "cherry": 5},
+    "weather": {"sunny": 1, "cloudy": 2, "rainy": 3, "snowy": 4},
+    "rotation": {"clockwise": 1, "right": 1, "counterclockwise": 2, "left": 2},
+}
+
+Term = Tuple[str, Callable[[int, int], bool], int]
+Clause = Tuple[Term, ...]          # AND of terms
+Expr = Tuple[Clause, ...]          # OR of clauses; () means "always true"
+
+
+def parse_condition(expr: Optional[str]) -> Expr:
+    """Parse an `&`/`@` expression into OR-of-AND term tuples. Empty -> always true."""
+    if not expr or not expr.strip():
+        return ()
+    clauses = []
+    for alt in expr.split("@"):
+        terms = []
+        for raw in alt.split("&"):
+            m = _TERM_RE.match(raw)
+            if not m:
+                raise ValueError(f"bad condition term {raw!r} in {expr!r}")
+            terms.append((m.group(1), OPS[m.group(2)], int(m.group(3))))
+        clauses.append(tuple(terms))
+    return tuple(clauses)
+
+
+def _clause_state(clause: Clause, ctx: Dict[str, int], assumed: Set[str]) -> bool:
+    """False if a known term fails; unknown variables are recorded in `assumed` and treated as satisfiable."""
+    for var, op, val in clause:
+        have = ctx.get(var)
+        if have is None:
+            assumed.add(var)
+        elif not op(have, val):
+            return False
+    return True
+
+
+def evaluate(expr: Expr, ctx: Dict[str, int]) -> Optional[FrozenSet[str]]:
+    """None if `expr` cannot hold for ctx, else the variables that had to be assumed (empty = certain)."""
+    if not expr:
+        return frozenset()
+    best: Optional[Set[str]] = None
+    for clause in expr:
+        assumed: Set[str] = set()
+        if _clause_state(clause, ctx, assumed) and (best is None or len(assumed) < len(best)):
+            best = assumed
+            if not best:
+                break
+    return None if best is None else frozenset(best)
+
+
+def _allows(expr: Expr, var: str) -> Optional[Callable[[int], bool]]:
+    """Predicate over `var` alone (other variables ignored), or None when `var` never constrains expr."""
+    if not expr:
+        return None
+    per_clause = []
+    for clause in expr:
+        terms = [(op, val) for v, op, val in clause if v == var]
+        if not terms:
+            return None  # some alternative doesn't mention var -> unconstrained
+        per_clause.append(terms)
+    return lambda x: any(all(op(x, val) for op, val in terms) for terms in per_clause)
+
+
+def _equality_set(expr: Expr, var: str) -> Optional[Set[int]]:
+    """The finite set of values allowed for `var` when every alternative pins it with `==`."""
+    vals: Set[int] = set()
+    for clause in expr:
+        eq = [val for v, op, val in clause if v == var and op is operator.eq]
+        if not eq:
+            return None
+        if any(v == var and op is not operator.eq for v, op, _ in clause):
+            return None
+        if len(set(eq)) == 1:
+            vals.add(eq[0])
+    return vals
+
+
+@dataclass
+class CompiledGroup:
+    condition: str
+    precondition: str
+    effects: List[Dict[str, Any]]
+    base_time: Optional[int]
+    expr: Expr
+    pre_expr: Expr
+
+
+@dataclass
+class CompiledSkill:
+    idx: int
+    id: Any
+    name: str
+    rarity: Any
+    cost: Optional[int]
+    groups: List[CompiledGroup] = field(default_factory=list)
+
+
+class SkillIndex:
+    """
+    Compiled skills plus, per indexed variable, value -> skills that pin it with `==`,
+    skills that don't constrain it at all, and skills with range/`!=` constraints
+    (checked with a one-variable predicate instead of a full evaluation).
+    """
+    def __init__(self, rows: Iterable[Dict[str, Any]]):
+        self.skills: List[CompiledSkill] = []
+        self.bad_terms = 0
+        for row in rows:
+            sk = CompiledSkill(
+                idx=len(self.skills), id=row.get("id"),
+                name=row.get("name_en") or row.get("enname") or "",
+                rarity=row.get("rarity"),
+                cost=row.get("cost", (row.get("gene_version") or {}).get("cost")),
+            )
+            for g in row.get("condition_groups") or []:
+                try:
+                    expr = parse_condition(g.get("condition"))
+                    pre = parse_condition(g.get("precondition"))
+                except ValueError:
+                    self.bad_terms += 1
+                    continue
+                sk.groups.append(CompiledGroup(
+                    condition=g.get("condition") or "", precondition=g.get("precondition") or "",
+                    effects=g.get("effects") or [], base_time=g.get("base_time"), expr=expr, pre_expr=pre,
+                ))
+            if sk.groups:
+                self.skills.append(sk)
+
+        everyone = set(range(len(self.skills)))
+        self.by_value: Dict[str, Dict[int, Set[int]]] = {v: {} for v in INDEXED_VARS}
+        self.free: Dict[str, Set[int]] = {v: set(everyone) for v in INDEXED_VARS}
+        self.ranged: Dict[str, Dict[int, Callable[[int], bool]]] = {v: {} for v in INDEXED_VARS}
+        for sk in self.skills:
+            for var in INDEXED_VARS:
+                self._index_skill(sk, var)
+
+    def _index_skill(self, sk: CompiledSkill, var: str) -> None:
+        preds, eq_sets = [], []
+        for g in sk.groups:
+            p_cond, p_pre = _allows(g.expr, var), _allows(g.pre_expr, var)
+            if p_cond is None and p_pre is None:
+                return  # this group ignores var, so the skill is free on it
+            eq = [_equality_set(e, var) for e in (g.expr, g.pre_expr) if _allows(e, var) is not None]
+            eq_sets.append(set.intersection(*eq) if all(s is not None for s in eq) else None)
+            preds.append((p_cond, p_pre))
+        self.free[var].discard(sk.idx)
+        if all(s is not None for s in eq_sets):
+            for val in set().union(*eq_sets):
+                self.by_value[var].setdefault(val, set()).add(sk.idx)
+        else:
+            self.ranged[var][sk.idx] = lambda x: any(
+                (pc is None or pc(x)) and (pp is None or pp(x)) for pc, pp in preds)
+
+    def candidates(self, ctx: Dict[str, int]) -> Set[int]:
+        cand: Optional[Set[int]] = None
+        for var in INDEXED_VARS:
+            if var not in ctx:
+                continue
+            x = ctx[var]
+            ok = self.free[var] | self.by_value[var].get(x, set())
+            ok |= {i for i, pred in self.ranged[var].items() if pred(x)}
+            cand = ok if cand is None else cand & ok
+            if not cand:
+                break
+        return set(range(len(self.skills))) if cand is None else cand
+
+    def match(self, ctx: Dict[str, int], require_known: bool = False) -> Tuple[List[Dict[str, Any]], Dict[str, int]]:
+        cand = self.candidates(ctx)
+        out = []
+        for i in sorted(cand):
+            sk = self.skills[i]
+            groups = []
+            for g in sk.groups:
+                a = evaluate(g.pre_expr, ctx)
+                b = evaluate(g.expr, ctx) if a is not None else None
+                if b is None:
+                    continue
+                assumed = sorted(a | b)
+                if require_known and assumed:
+                    continue
+                groups.append({"condition": g.condition, "precondition": g.precondition,
+                               "effects": g.effects, "base_time": g.base_time, "assumed": assumed})
+            if groups:
+                out.append({"id": sk.id, "name": sk.name, "rarity": sk.rarity, "cost": sk.cost, "groups": groups})
+        stats = {"skills": len(self.skills), "candidates": len(cand),
+                 "skipped_by_index": len(self.skills) - len(cand), "matched": len(out)}
+        return out, stats
+
+
+def normalize_context(raw: Dict[str, Any]) -> Dict[str, int]:
+    """Integer-code a request context; accepts VALUE_ALIASES names (e.g. distance_type='medium')."""
+    ctx: Dict[str, int] = {}
+    for var, val in (raw or {}).items():
+        if val is None:
+            continue
+        if isinstance(val, bool):
+            ctx[var] = int(val)
+        elif isinstance(val, (int, float)):
+            ctx[var] = int(val)
+        else:
+            s = str(val).strip().lower().replace(" ", "_").replace("-", "_")
+            if s.lstrip("-").isdigit():
+                ctx[var] = int(s)
+            elif s in VALUE_ALIASES.get(var, {}):
+                ctx[var] = VALUE_ALIASES[var][s]
+            else:
+                raise ValueError(f"unknown value {val!r} for {var}")
+    return ctx
+
+
+_INDEX: Optional[SkillIndex] = None
+_INDEX_LOCK = threading.Lock()
+
+def get_index(path: Path, loader: Callable[[Path], Any]) -> SkillIndex:
+    """Build the index on first use; skills_all.json is ~4 MB and only this endpoint needs it."""
+    global _INDEX
+    if _INDEX is None:
+        with _INDEX_LOCK:
+            if _INDEX is None:
+                _INDEX = SkillIndex(loader(path))
+    return _INDEX
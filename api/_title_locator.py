@@ -0,0 +1,492 @@
+"""
+Event-title locator for screenshots: the server-side twin of ocr.js's probe match.
+
+ocr.js slides the probe template over PROBE_REGION and scores every stride-2 offset
+with nested loops (nccScore). Here the same normalized cross-correlation is computed
+for every offset at once: the numerator is one FFT correlation against the zero-mean
+template (whose spectrum is cached per padded shape and scale, in a bounded LRU), the
+window sums come from integral images. A two-level pyramid makes it scale tolerant: every template
+scale is tried on a 2x-downsampled region, then the best hit is refined at full
+resolution around the coarse peak.
+
+    python api/_title_locator.py --bench     # FFT vs the loop reference (and ocr.js via node)
+"""
+import base64
+import functools
+import re
+import struct
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+OCR_JS = Path(__file__).resolve().parents[1] / "ocr.js"
+
+# Mirrors ocr.js (fractions of the frame)
+PROBE_REGION = {"x": 0.13, "y": 0.45, "w": 0.05, "h": 0.45}
+EVENT_REGION = {"x": 0.12, "y": 0.175, "w": 0.2, "h": 0.05}
+MATCH_THRESHOLD = 0.85
+GRAY_WEIGHTS = (0.299, 0.587, 0.114)
+
+DEFAULT_SCALES = (0.8, 0.9, 1.0, 1.1, 1.25)
+COARSE_MIN_TEMPLATE = 12   # skip the half-resolution level when the template would get smaller
+REFINE_MARGIN = 3          # full-res pixels searched around the doubled coarse peak
+# Scales, frame sizes and search rects come from clients, so the template caches are
+# bounded LRUs and effective scales are snapped to 0.01 (under a pixel of template size).
+SCALE_DECIMALS = 2
+SCALED_CACHE_ITEMS = 64
+SPECTRUM_CACHE_BYTES = 64 << 20
+
+_DATAURL_RE = re.compile(r'PROBE_TEMPLATE_DATAURL\s*=\s*"data:image/png;base64,([A-Za-z0-9+/=]+)"')
+
+
+def _paeth(a: int, b: int, c: int) -> int:
+    p = a + b - c
+    pa, pb, pc = abs(p - a), abs(p - b), abs(p - c)
+    if pa <= pb and pa <= pc:
+        return a
+    return b if pb <= pc else c
+
+
+def decode_png(blob: bytes) -> np.ndarray:
+    """8-bit, non-interlaced PNG -> HxWxC uint8. Enough for the probe template; keeps Pillow out of the function bundle."""
+    if blob[:8] != b"\x89PNG\r\n\x1a\n":
+        raise ValueError("not a PNG")
+    pos, idat, ihdr = 8, [], None
+    while pos < len(blob):
+        length, kind = struct.unpack(">I4s", blob[pos:pos + 8])
+        body = blob[pos + 8:pos + 8 + length]
+        if kind == b"IHDR":
+            ihdr = struct.unpack(">IIBBBBB", body)
+        elif kind == b"IDAT":
+            idat.append(body)
+        elif kind == b"IEND":
+            break
+        pos += 12 + length
+    if ihdr is None:
+        raise ValueError("PNG without IHDR")
+    w, h, depth, ctype, _, _, interlace = ihdr
+    channels = {0: 1, 2: 3, 4: 2, 6: 4}.get(ctype)
+    if depth != 8 or interlace or channels is None:
+        raise ValueError(f"unsupported PNG (depth={depth}, color type={ctype}, interlace={interlace})")
+    raw = zlib.decompress(b"".join(idat))
+    stride = w * channels
+    out = bytearray(h * stride)
+    prev = bytearray(stride)
+    for y in range(h):
+        ftype = raw[y * (stride + 1)]
+        line = bytearray(raw[y * (stride + 1) + 1:(y + 1) * (stride + 1)])
+        for i in range(stride):
+            a = line[i - channels] if i >= channels else 0
+            c = prev[i - channels] if i >= channels else 0
+            if ftype == 1:
+                line[i] = (line[i] + a) & 0xFF
+            elif ftype == 2:
+                line[i] = (line[i] + prev[i]) & 0xFF
+            elif ftype == 3:
+                line[i] = (line[i] + ((a + prev[i]) >> 1)) & 0xFF
+            elif ftype == 4:
+                line[i] = (line[i] + _paeth(a, prev[i], c)) & 0xFF
+        out[y * stride:(y + 1) * stride] = line
+        prev = line
+    return np.frombuffer(bytes(out), dtype=np.uint8).reshape(h, w, channels)
+
+
+def to_gray(rgb: np.ndarray) -> np.ndarray:
+    """Same weights and truncation as ocr.js toGray()."""
+    if rgb.ndim == 2 or rgb.shape[2] < 3:
+        return (rgb if rgb.ndim == 2 else rgb[..., 0]).astype(np.uint8)
+    r, g, b = (rgb[..., i].astype(np.float64) for i in range(3))
+    return (r * GRAY_WEIGHTS[0] + g * GRAY_WEIGHTS[1] + b * GRAY_WEIGHTS[2]).astype(np.uint8)
+
+
+@functools.lru_cache(maxsize=1)
+def probe_template() -> np.ndarray:
+    """The grayscale probe template, decoded from the data URL embedded in ocr.js."""
+    m = _DATAURL_RE.search(OCR_JS.read_text(encoding="utf-8"))
+    if not m:
+        raise RuntimeError(f"PROBE_TEMPLATE_DATAURL not found in {OCR_JS}")
+    return to_gray(decode_png(base64.b64decode(m.group(1))))
+
+
+def decode_gray(data: str, width: int, height: int) -> np.ndarray:
+    raw = base64.b64decode(data, validate=True)
+    if len(raw) != width * height:
+        raise ValueError(f"expected {width * height} gray bytes for {width}x{height}, got {len(raw)}")
+    return np.frombuffer(raw, dtype=np.uint8).reshape(height, width)
+
+
+def resize(img: np.ndarray, out_h: int, out_w: int) -> np.ndarray:
+    """Bilinear resize with pixel-centre alignment (what drawImage does for moderate factors)."""
+    h, w = img.shape
+    if (out_h, out_w) == (h, w):
+        return img.astype(np.float64)
+    ys = np.clip((np.arange(out_h) + 0.5) * h / out_h - 0.5, 0, h - 1)
+    xs = np.clip((np.arange(out_w) + 0.5) * w / out_w - 0.5, 0, w - 1)
+    y0, x0 = ys.astype(int), xs.astype(int)
+    y1, x1 = np.minimum(y0 + 1, h - 1), np.minimum(x0 + 1, w - 1)
+    wy, wx = (ys - y0)[:, None], (xs - x0)[None, :]
+    f = img.astype(np.float64)
+    top = f[y0][:, x0] * (1 - wx) + f[y0][:, x1] * wx
+    bot = f[y1][:, x0] * (1 - wx) + f[y1][:, x1] * wx
+    return top * (1 - wy) + bot * wy
+
+
+def halve(img: np.ndarray) -> np.ndarray:
+    """2x2 box downsample (one pyramid level); odd trailing rows/columns are dropped."""
+    h, w = img.shape[0] // 2 * 2, img.shape[1] // 2 * 2
+    f = img[:h, :w].astype(np.float64)
+    return (f[0::2, 0::2] + f[1::2, 0::2] + f[0::2, 1::2] + f[1::2, 1::2]) * 0.25
+
+
+def _fast_len(n: int) -> int:
+    """Smallest 2^a*3^b*5^c >= n; pocketfft is much faster on these sizes."""
+    best = 1 << max(0, (n - 1).bit_length())
+    p5 = 1
+    while p5 < best:
+        p35 = p5
+        while p35 < best:
+            m = p35
+            while m < n:
+                m *= 2
+            best = min(best, m)
+            p35 *= 3
+        p5 *= 5
+    return best
+
+
+def quantize_scale(scale: float) -> float:
+    return max(10 ** -SCALE_DECIMALS, round(scale, SCALE_DECIMALS))
+
+
+class _LRU:
+    """OrderedDict LRU capped by entry count and by total array bytes; not thread-safe on its own."""
+    def __init__(self, max_items: int, max_bytes: Optional[int] = None):
+        self.max_items, self.max_bytes = max_items, max_bytes
+        self._d: "OrderedDict[Any, Any]" = OrderedDict()
+        self.nbytes = 0
+
+    @staticmethod
+    def _size(value: Any) -> int:
+        arrays = value if isinstance(value, tuple) else (value,)
+        return sum(a.nbytes for a in arrays if isinstance(a, np.ndarray))
+
+    def get(self, key: Any) -> Any:
+        value = self._d.get(key)
+        if value is not None:
+            self._d.move_to_end(key)
+        return value
+
+    def put(self, key: Any, value: Any) -> None:
+        size = self._size(value)
+        if self.max_bytes is not None and size > self.max_bytes:
+            return  # too big to keep at all; the caller still gets its value
+        old = self._d.pop(key, None)
+        if old is not None:
+            self.nbytes -= self._size(old)
+        self._d[key] = value
+        self.nbytes += size
+        while len(self._d) > self.max_items or (self.max_bytes is not None and self.nbytes > self.max_bytes):
+            _, evicted = self._d.popitem(last=False)
+            self.nbytes -= self._size(evicted)
+
+    def __len__(self) -> int:
+        return len(self._d)
+
+
+class _Template:
+    def __init__(self, gray: np.ndarray):
+        self.gray = gray.astype(np.float64)
+        self.h, self.w = gray.shape
+        self._lock = threading.Lock()
+        self._scaled = _LRU(SCALED_CACHE_ITEMS)
+        self._spectra = _LRU(SCALED_CACHE_ITEMS, SPECTRUM_CACHE_BYTES)
+        self.spectrum_hits = 0
+        self.spectrum_misses = 0
+
+    def scaled(self, scale: float) -> Tuple[np.ndarray, float]:
+        """(zero-mean template at `scale`, its L2 norm)."""
+        key = round(scale, 4)
+        with self._lock:
+            hit = self._scaled.get(key)
+        if hit is not None:
+            return hit
+        h, w = max(2, round(self.h * scale)), max(2, round(self.w * scale))
+        t = resize(self.gray, h, w)
+        t = t - t.mean()
+        hit = (t, float(np.sqrt((t * t).sum())))
+        with self._lock:
+            self._scaled.put(key, hit)
+        return hit
+
+    def spectrum(self, scale: float, shape: Tuple[int, int]) -> np.ndarray:
+        """conj(rfft2) of the zero-mean scaled template, padded to `shape`; cached, frames repeat sizes."""
+        key = (round(scale, 4),) + shape
+        with self._lock:
+            hit = self._spectra.get(key)
+            if hit is not None:
+                self.spectrum_hits += 1
+                return hit
+        t, _ = self.scaled(scale)
+        spec = np.conj(np.fft.rfft2(t, s=shape))
+        with self._lock:
+            self.spectrum_misses += 1
+            self._spectra.put(key, spec)
+        return spec
+
+
+def ncc_map(region: np.ndarray, tpl: _Template, scale: float) -> np.ndarray:
+    """
+    nccScore() for every valid offset of the scaled template in `region`; out[y, x] is the
+    score with the template's top-left corner at (x, y). Empty when the template doesn't fit.
+    """
+    t, tnorm = tpl.scaled(scale)
+    th, tw = t.shape
+    H, W = region.shape
+    if th > H or tw > W or tnorm <= 0:
+        return np.empty((0, 0))
+    f = region.astype(np.float64)
+    # circular correlation is exact for valid offsets as long as the FFT covers the region
+    shape = (_fast_len(H), _fast_len(W))
+    corr = np.fft.irfft2(np.fft.rfft2(f, s=shape) * tpl.spectrum(scale, shape), s=shape)
+    num = corr[:H - th + 1, :W - tw + 1]
+
+    n = th * tw
+    ii = np.zeros((H + 1, W + 1))
+    ii2 = np.zeros((H + 1, W + 1))
+    ii[1:, 1:] = f.cumsum(0).cumsum(1)
+    ii2[1:, 1:] = (f * f).cumsum(0).cumsum(1)
+    win = lambda s: s[th:, tw:] - s[:-th, tw:] - s[th:, :-tw] + s[:-th, :-tw]
+    s1, s2 = win(ii), win(ii2)
+    var_sum = np.maximum(s2 - s1 * s1 / n, n * 1e-6)  # ocr.js clamps the per-pixel variance at 1e-6
+    return num / (np.sqrt(var_sum) * tnorm)
+
+
+def _best(scores: np.ndarray) -> Tuple[float, int, int]:
+    y, x = np.unravel_index(int(np.argmax(scores)), scores.shape)
+    return float(scores[y, x]), int(x), int(y)
+
+
+def _rect(frac: Dict[str, float], width: int, height: int) -> Dict[str, int]:
+    return {"x": round(frac["x"] * width), "y": round(frac["y"] * height),
+            "w": round(frac["w"] * width), "h": round(frac["h"] * height)}
+
+
+class TitleLocator:
+    def __init__(self, template: np.ndarray):
+        self.template = _Template(template)
+
+    def locate(self, frame: np.ndarray, search: Optional[Dict[str, float]] = None,
+               base_scale: float = 1.0, scales: Sequence[float] = DEFAULT_SCALES,
+               threshold: float = MATCH_THRESHOLD) -> Dict[str, Any]:
+        """
+        Find the probe in `frame` (uint8 gray, HxW). `search` is a fractional rect (default
+        ocr.js's PROBE_REGION), `base_scale` the template size relative to its native one
+        (the client's downscale factor); `scales` are tried around it.
+        """
+        t0 = time.perf_counter()
+        H, W = frame.shape
+        sr = _rect(search or PROBE_REGION, W, H)
+        sr["w"], sr["h"] = min(sr["w"], W - sr["x"]), min(sr["h"], H - sr["y"])
+        region = frame[sr["y"]:sr["y"] + sr["h"], sr["x"]:sr["x"] + sr["w"]]
+        candidates = sorted({quantize_scale(base_scale * s) for s in scales})
+
+        # coarse: every scale on the half-resolution level
+        coarse: Optional[Tuple[float, int, int, float]] = None
+        small = halve(region) if min(region.shape) >= 2 * COARSE_MIN_TEMPLATE else None
+        if small is not None:
+            for s in candidates:
+                if min(self.template.h, self.template.w) * s / 2 < COARSE_MIN_TEMPLATE:
+                    continue
+                m = ncc_map(small, self.template, s / 2)
+                if m.size:
+                    score, x, y = _best(m)
+                    if coarse is None or score > coarse[0]:
+                        coarse = (score, x, y, s)
+        t_coarse = time.perf_counter()
+
+        # fine: full resolution, either around the coarse peak (best scale and its
+        # neighbours) or, without a usable coarse level, the whole region at every scale
+        best: Optional[Tuple[float, int, int, float]] = None
+        if coarse is not None:
+            i = candidates.index(coarse[3])
+            refine = candidates[max(0, i - 1):i + 2]
+        else:
+            refine = candidates
+        for s in refine:
+            t, _ = self.template.scaled(s)
+            th, tw = t.shape
+            if coarse is not None:
+                cx, cy = coarse[1] * 2, coarse[2] * 2
+                x0, y0 = max(0, cx - REFINE_MARGIN * 2), max(0, cy - REFINE_MARGIN * 2)
+                x1 = min(region.shape[1], cx + tw + REFINE_MARGIN * 2)
+                y1 = min(region.shape[0], cy + th + REFINE_MARGIN * 2)
+            else:
+                x0, y0, (y1, x1) = 0, 0, region.shape
+            m = ncc_map(region[y0:y1, x0:x1], self.template, s)
+            if m.size:
+                score, x, y = _best(m)
+                if best is None or score > best[0]:
+                    best = (score, x + x0, y + y0, s)
+        t_end = time.perf_counter()
+
+        out: Dict[str, Any] = {
+            "found": False, "score": None, "scale": None, "match": None,
+            "search_rect": sr, "event_rect": _rect(EVENT_REGION, W, H),
+            "timing_ms": {"coarse": round((t_coarse - t0) * 1000, 3),
+                          "refine": round((t_end - t_coarse) * 1000, 3),
+                          "total": round((t_end - t0) * 1000, 3)},
+        }
+        if best is not None:
+            score, x, y, s = best
+            t, _ = self.template.scaled(s)
+            out.update(found=score >= threshold, score=round(score, 4), scale=s,
+                       match={"x": sr["x"] + x, "y": sr["y"] + y, "w": t.shape[1], "h": t.shape[0]})
+        return out
+
+
+_LOCATOR: Optional[TitleLocator] = None
+_LOCATOR_LOCK = threading.Lock()
+
+def get_locator() -> TitleLocator:
+    global _LOCATOR
+    if _LOCATOR is None:
+        with _LOCATOR_LOCK:
+            if _LOCATOR is None:
+                _LOCATOR = TitleLocator(probe_template())
+    return _LOCATOR
+
+
+# ---------- benchmark ----------
+
+def loop_reference(frame: np.ndarray, probe: Dict[str, int], tpl: np.ndarray, stride: int = 2) -> Tuple[float, int, int]:
+    """Line-for-line port of ocr.js matchTemplateInRegion/nccScore (without the time budget)."""
+    fW = frame.shape[1]
+    fg = frame.ravel().tolist()
+    th, tw = tpl.shape
+    tg = tpl.ravel().tolist()
+    n = tw * th
+    t_mean = sum(tg) / n
+    t_std = max(1e-6, sum(v * v for v in tg) / n - t_mean * t_mean) ** 0.5
+    x0, y0 = probe["x"], probe["y"]
+    x1, y1 = x0 + max(0, probe["w"] - tw), y0 + max(0, probe["h"] - th)
+    best = (-1.0, x0, y0)
+    for y in range(y0, y1 + 1, stride):
+        for x in range(x0, x1 + 1, stride):
+            s = s2 = sc = 0
+            for j in range(th):
+                fy, tj = (y + j) * fW + x, j * tw
+                for i in range(tw):
+                    fv, tv = fg[fy + i], tg[tj + i]
+                    s += fv; s2 += fv * fv; sc += fv * tv
+            f_mean = s / n
+            f_std = max(1e-6, s2 / n - f_mean * f_mean) ** 0.5
+            den = n * f_std * t_std
+            score = (sc - n * f_mean * t_mean) / den if den > 0 else 0
+            if score > best[0]:
+                best = (score, x, y)
+    return best
+
+
+_NODE_HARNESS = r"""
+const fs = require("fs");
+const src = fs.readFileSync(process.argv[2], "utf8");
+eval(src.slice(src.indexOf("function nccScore"), src.indexOf("function matchTemplateInRegion")));
+const [W, H, tw, th, px, py, pw, ph, stride, reps] = process.argv.slice(3, 13).map(Number);
+const frame = new Uint8ClampedArray(fs.readFileSync(process.argv[13]));
+const tGray = new Uint8ClampedArray(fs.readFileSync(process.argv[14]));
+let s = 0, s2 = 0;
+for (const v of tGray) { s += v; s2 += v * v; }
+const mean = s / tGray.length;
+const tplObj = { w: tw, h: th, gray: tGray, mean, std: Math.sqrt(Math.max(1e-6, s2 / tGray.length - mean * mean)) };
+let best, t0 = process.hrtime.bigint();
+for (let r = 0; r < reps; r++) {
+  best = { score: -1, x: px, y: py };
+  for (let y = py; y <= py + Math.max(0, ph - th); y += stride)
+    for (let x = px; x <= px + Math.max(0, pw - tw); x += stride) {
+      const sc = nccScore(frame, W, x, y, tplObj);
+      if (sc > best.score) best = { score: sc, x, y };
+    }
+}
+const ms = Number(process.hrtime.bigint() - t0) / 1e6 / reps;
+console.log(JSON.stringify({ ms, ...best }));
+"""
+
+
+def _synthetic_frame(width: int, height: int, tpl: np.ndarray, scale: float, seed: int = 7) -> Tuple[np.ndarray, Tuple[int, int]]:
+    """Smooth noisy background with the (scaled) template pasted inside PROBE_REGION."""
+    rng = np.random.default_rng(seed)
+    base = resize(rng.uniform(40, 220, size=(height // 16 + 2, width // 16 + 2)), height, width)
+    frame = base + rng.normal(0, 6, size=(height, width))
+    t = resize(tpl, max(2, round(tpl.shape[0] * scale)), max(2, round(tpl.shape[1] * scale)))
+    pr = _rect(PROBE_REGION, width, height)
+    x = pr["x"] + int(rng.integers(0, max(1, pr["w"] - t.shape[1])))
+    y = pr["y"] + int(rng.integers(0, max(1, pr["h"] - t.shape[0])))
+    frame[y:y + t.shape[0], x:x + t.shape[1]] = t + rng.normal(0, 3, size=t.shape)
+    return np.clip(frame, 0, 255).astype(np.uint8), (x, y)
+
+
+def run_benchmark(sizes=((1920, 1080), (1280, 720)), reps: int = 20, python_loop: bool = True) -> None:
+    import shutil
+    import subprocess
+    import tempfile
+
+    tpl = probe_template()
+    locator = TitleLocator(tpl)
+    node = shutil.which("node")
+    print(f"[bench] template {tpl.shape[1]}x{tpl.shape[0]}, scales {DEFAULT_SCALES}, node={'yes' if node else 'no'}")
+    for W, H in sizes:
+        # the template is native at 1080p; smaller frames see it proportionally smaller
+        native = H / 1080
+        frame, (tx, ty) = _synthetic_frame(W, H, tpl, native * 1.1)
+        probe = _rect(PROBE_REGION, W, H)
+
+        locator.locate(frame, base_scale=native)  # warm the spectrum cache
+        t0 = time.perf_counter()
+        for _ in range(reps):
+            res = locator.locate(frame, base_scale=native)
+        fft_ms = (time.perf_counter() - t0) * 1000 / reps
+        m = res["match"]
+        print(f"[bench] {W}x{H} true=({tx},{ty}) fft: {fft_ms:.2f} ms -> ({m['x']},{m['y']}) "
+              f"score={res['score']} scale={res['scale']}")
+
+        tpl_native = tpl if native == 1 else np.clip(
+            resize(tpl, round(tpl.shape[0] * native), round(tpl.shape[1] * native)), 0, 255).astype(np.uint8)
+        if node:
+            with tempfile.TemporaryDirectory() as d:
+                fp, tp, hp = Path(d, "frame.bin"), Path(d, "tpl.bin"), Path(d, "harness.js")
+                fp.write_bytes(frame.tobytes()); tp.write_bytes(tpl_native.tobytes()); hp.write_text(_NODE_HARNESS)
+                args = [node, str(hp), str(OCR_JS), W, H, tpl_native.shape[1], tpl_native.shape[0],
+                        probe["x"], probe["y"], probe["w"], probe["h"], 2, 5, str(fp), str(tp)]
+                r = subprocess.run([str(a) for a in args], capture_output=True, text=True, timeout=300)
+            if r.returncode == 0:
+                js = __import__("json").loads(r.stdout)
+                print(f"[bench] {W}x{H} ocr.js loop (node, stride 2, one scale): {js['ms']:.2f} ms -> "
+                      f"({js['x']},{js['y']}) score={js['score']:.4f}  speedup x{js['ms'] / fft_ms:.1f}")
+            else:
+                print(f"[bench] node harness failed: {r.stderr.strip()[:200]}")
+        if python_loop:
+            t0 = time.perf_counter()
+            score, x, y = loop_reference(frame, probe, tpl_native)
+            py_ms = (time.perf_counter() - t0) * 1000
+            print(f"[bench] {W}x{H} python loop (stride 2, one scale): {py_ms:.0f} ms -> ({x},{y}) "
+                  f"score={score:.4f}  speedup x{py_ms / fft_ms:.0f}")
+    t = locator.template
+    print(f"[bench] template spectrum cache: {t.spectrum_hits} hits / {t.spectrum_misses} misses")
+
+
+if __name__ == "__main__":
+    import argparse
+    ap = argparse.ArgumentParser(description="Probe locator benchmark")
+    ap.add_argument("--bench", action="store_true", help="Time FFT matching against the loop references")
+    ap.add_argument("--reps", type=int, default=20)
+    ap.add_argument("--no-python-loop", action="store_true", help="Skip the (slow) pure-Python loop port")
+    a = ap.parse_args()
+    if a.bench:
+        run_benchmark(reps=a.reps, python_loop=not a.no_python_loop)
+    else:
+        ap.print_help()
@@ -0,0 +1,76 @@
+// Resolves logical asset names ("uma_data.json") to the content-hashed builds listed in
+// /assets/dist/manifest.json (see build_assets.py). Hashed files are immutable, so they are
+// fetched with the normal HTTP cache; without a manifest (local dev before a build) the raw
+// /assets/<name> file is used uncached, as before.
+(function () {
+  const MANIFEST_URL = "/assets/dist/manifest.json";
+  let manifestPromise = null;
+
+  function loadManifest() {
+    if (!manifestPromise) {
+      manifestPromise = fetch(MANIFEST_URL, { cache: "no-cache" })
+        .then((r) => (r.ok ? r.json() : {}))
+        .catch(() => ({}));
+    }
+    return manifestPromise;
+  }
+
+  async function resolve(name, fallbackName) {
+    const manifest = await loadManifest();
+    const entry = manifest[name];
+    if (entry && entry.file) return { url: `/assets/dist/${entry.file}`, hashed: true };
+    return { url: `/assets/${fallbackName || name}`, hashed: false };
+  }
+
+  // fallbackName: raw file to use when `name` is a build-only projection
+  async function json(name, fallbackName) {
+    const { url, hashed } = await resolve(name, fallbackName);
+    const res = await fetch(url, { cache: hashed ? "default" : "no-store" });
+    if (!res.ok) throw new Error(`HTTP ${res.status} for ${url}`);
+    return res.json();
+  }
+
+  // Support thumbnail markup: a sprite from the build's atlas sheet when the card has
+  // SupportAtlas coordinates, else the standalone image (one request per card).
+  function thumbHtml(atlas, img, alt) {
+    if (atlas && atlas.sheet) {
+      const pct = (off, tile, sheet) => (sheet > tile ? (off / (sheet - tile)) * 100 : 0);
+      const style = [
+        `background-image:url('${atlas.sheet}')`,
+        `background-size:${(atlas.sheet_w / atlas.w) * 100}% ${(atlas.sheet_h / atlas.h) * 100}%`,
+        `background-position:${pct(atlas.x, atlas.w, atlas.sheet_w)}% ${pct(atlas.y, atlas.h, atlas.sheet_h)}%`,
+      ].join(";");
+      return `<span class="atlas-thumb" role="img" aria-label="${alt}" style="${style}"></span>`;
+    }
+    return img ? `<img src="${img}" alt="${alt}" loading="lazy">` : "";
+  }
+
+  // Sheets are ~300-400 KB each (64 thumbnails); a standalone thumbnail is ~10 KB. Per list
+  // about to be drawn, use sprites only if the sheets it touches (minus ones already fetched)
+  // weigh less than its standalone thumbnails plus their per-request overhead. Returns the
+  // atlas entries to pass to thumbHtml (null = standalone image).
+  const REQUEST_OVERHEAD_BYTES = 800;
+  const fetchedSheets = new Set();
+
+  function pickThumbs(cards) {
+    const sheets = new Map();
+    let single = 0;
+    for (const c of cards) {
+      const a = c?.atlas;
+      if (!a?.sheet || !c.img) continue;
+      if (!fetchedSheets.has(a.sheet)) sheets.set(a.sheet, a.sheet_bytes || 0);
+      single += (a.bytes || 0) + REQUEST_OVERHEAD_BYTES;
+    }
+    let sheetCost = 0;
+    for (const [, bytes] of sheets) sheetCost += bytes + REQUEST_OVERHEAD_BYTES;
+    const useSheets = sheetCost <= single;
+    return cards.map((c) => {
+      // cards without a standalone image can only be drawn from their sheet
+      const a = useSheets || !c?.img ? c?.atlas || null : null;
+      if (a?.sheet) fetchedSheets.add(a.sheet);
+      return a;
+    });
+  }
+
+  window.UmaAssets = { resolve, json, thumbHtml, pickThumbs };
+})();
@@ -0,0 +1,340 @@
+"""
+Post-scrape build step for the static front end.
+
+Writes minified, content-hashed copies of assets/*.json (plus .gz and, when the
+`brotli` package is installed, .br siblings) into assets/dist/, slim per-page
+projections of the big files, and assets/dist/manifest.json mapping logical names
+to the hashed files. Hashed files never change, so they are served immutable;
+only the small manifest is revalidated (see vercel.json / assets.js).
+
+With Pillow installed, the support thumbnails are first packed into a few sprite
+sheets (assets/dist/support_atlas_<n>.<hash>.webp, or .png with --atlas-format png)
+described by assets/support_atlas.json, and each card in the built copy of
+support_hints.json gains SupportAtlas coordinates (the scraped file is left as
+the scraper wrote it). Pages use a sheet only when it costs fewer bytes than the
+standalone thumbnails on screen (UmaAssets.pickThumbs in assets.js).
+With numpy as well, assets/support_hashes.json gets each thumbnail's perceptual
+hashes for the API's /cards/identify (see api/_card_hash.py).
+
+    python build_assets.py                 # after gametora.py
+    python gametora.py --what all --build-assets
+"""
+import argparse, gzip, hashlib, json, os, sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import brotli  # optional: only needed for .br siblings
+except ImportError:
+    brotli = None
+
+try:
+    from PIL import Image  # optional: only needed for the thumbnail atlas
+except ImportError:
+    Image = None
+
+ASSETS_DIR = "assets"
+DIST_DIR = os.path.join(ASSETS_DIR, "dist")
+MANIFEST = "manifest.json"
+HASH_LEN = 10
+
+THUMBS_URL = "/assets/support_thumbs/"
+ATLAS_MAP = "support_atlas.json"
+ATLAS_SHEET_PX = 1024   # 64 thumbs of 128px per sheet
+ATLAS_VERSION = 2       # 2: per-tile source bytes
+# The source thumbnails are palette PNGs with one palette each; a lossless RGBA sheet of them
+# is ~2.6x their total size, lossy WebP q90 about a quarter of it with no visible loss at 64px.
+ATLAS_FORMATS = {"webp": ("webp", {"quality": 90, "method": 6}), "png": ("png", {"optimize": True})}
+
+HASHES_FILE = "support_hashes.json"
+
+# name -> (source file, kept fields); dotted paths keep only that key of a nested object.
+# Each projection carries just what one page reads, so it doesn't download the rest.
+PROJECTIONS: Dict[str, Tuple[str, Tuple[str, ...]]] = {
+    # optimizer.js: cost lookup by name/id, parent + version links
+    "skills_costs.json": ("skills_all.json",
+                          ("id", "name_en", "enname", "cost", "gene_version.cost", "parent_skills", "versions")),
+    # umadle.js + random.js: labels, stats, aptitudes (no events/objectives)
+    "uma_slim.json": ("uma_data.json",
+                      ("UmaName", "UmaNickname", "UmaSlug", "UmaId", "UmaBaseStats", "UmaStatBonuses", "UmaAptitudes")),
+}
+
+
+def minify(data: Any) -> bytes:
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def project(rows: List[Any], fields: Tuple[str, ...]) -> List[Dict[str, Any]]:
+    out = []
+    for row in rows:
+        if not isinstance(row, dict):
+            continue
+        slim: Dict[str, Any] = {}
+        for path in fields:
+            head, _, rest = path.partition(".")
+            if head not in row:
+                continue
+            if not rest:
+                slim[head] = row[head]
+            elif isinstance(row[head], dict) and rest in row[head]:
+                slim.setdefault(head, {})[rest] = row[head][rest]
+        out.append(slim)
+    return out
+
+
+def _write_if_changed(path: Path, body: bytes) -> None:
+    if path.exists() and path.stat().st_size == len(body) and path.read_bytes() == body:
+        return
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_bytes(body)
+    os.replace(tmp, path)
+
+
+def emit(name: str, body: bytes, dist: Path) -> Dict[str, Any]:
+    """Write <stem>.<hash>.json (+ .gz/.br) and return its manifest entry."""
+    digest = hashlib.sha256(body).hexdigest()
+    stem = Path(name).stem
+    fname = f"{stem}.{digest[:HASH_LEN]}.json"
+    _write_if_changed(dist / fname, body)
+    entry: Dict[str, Any] = {"file": fname, "sha256": digest, "bytes": len(body)}
+
+    gz = gzip.compress(body, compresslevel=9, mtime=0)  # mtime=0 keeps the .gz reproducible
+    _write_if_changed(dist / (fname + ".gz"), gz)
+    entry["gzip_bytes"] = len(gz)
+    if brotli is not None:
+        br = brotli.compress(body, quality=11)
+        _write_if_changed(dist / (fname + ".br"), br)
+        entry["br_bytes"] = len(br)
+    return entry
+
+
+def _pack_shelves(sizes: List[Tuple[str, int, int]], sheet_px: int) -> List[List[Tuple[str, int, int, int, int]]]:
+    """Shelf-pack (key, w, h) tiles, tallest first, into sheets of at most sheet_px square."""
+    sheets: List[List[Tuple[str, int, int, int, int]]] = [[]]
+    x = y = shelf_h = 0
+    for key, w, h in sorted(sizes, key=lambda t: (-t[2], t[0])):
+        if x + w > sheet_px:
+            x, y, shelf_h = 0, y + shelf_h, 0
+        if y + h > sheet_px:
+            sheets.append([])
+            x = y = shelf_h = 0
+        sheets[-1].append((key, x, y, w, h))
+        x += w
+        shelf_h = max(shelf_h, h)
+    return [s for s in sheets if s]
+
+
+def build_atlas(assets_dir: str = ASSETS_DIR, dist_dir: Optional[str] = None,
+                tile_px: Optional[int] = None, sheet_px: int = ATLAS_SHEET_PX,
+                fmt: str = "webp") -> Optional[Dict[str, Any]]:
+    """
+    Pack support_thumbs/*.png into sprite sheets. tile_px downscales each thumbnail
+    (longest side) first. Skipped when no thumbnail, tile size, sheet size or format
+    changed since the last build.
+    """
+    if Image is None:
+        print("[atlas] Pillow not installed; skipped thumbnail atlas (pip install pillow)")
+        return None
+    thumbs = Path(assets_dir) / "support_thumbs"
+    dist = Path(dist_dir or os.path.join(assets_dir, "dist"))
+    map_path = Path(assets_dir) / ATLAS_MAP
+    files = sorted(thumbs.glob("*.png")) if thumbs.is_dir() else []
+    if not files:
+        print(f"[atlas] no thumbnails in {thumbs}")
+        return None
+
+    ext, save_kw = ATLAS_FORMATS[fmt]
+    h = hashlib.sha256(f"v{ATLAS_VERSION}|{tile_px}|{sheet_px}|{fmt}".encode())
+    for f in files:
+        h.update(f.name.encode("utf-8"))
+        h.update(hashlib.sha256(f.read_bytes()).digest())
+    inputs = h.hexdigest()
+
+    try:
+        old = json.loads(map_path.read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError):
+        old = None
+    if old and old.get("inputs") == inputs and all((dist / s["file"]).exists() for s in old.get("sheets", [])):
+        print(f"[atlas] up to date ({len(old.get('tiles', {}))} thumbnails, {len(old['sheets'])} sheets)")
+        return old
+
+    images: Dict[str, Any] = {}
+    for f in files:
+        im = Image.open(f).convert("RGBA")
+        if tile_px and max(im.size) > tile_px:
+            im.thumbnail((tile_px, tile_px), Image.LANCZOS)
+        images[f.stem] = im
+
+    dist.mkdir(parents=True, exist_ok=True)
+    sheets, tiles = [], {}
+    for n, placed in enumerate(_pack_shelves([(k, im.width, im.height) for k, im in images.items()], sheet_px)):
+        w = max(x + tw for _, x, _, tw, _ in placed)
+        hh = max(y + th for _, _, y, _, th in placed)
+        sheet = Image.new("RGBA", (w, hh), (0, 0, 0, 0))
+        for key, x, y, tw, th in placed:
+            sheet.paste(images[key], (x, y))
+            tiles[key] = {"sheet": n, "x": x, "y": y, "w": tw, "h": th,
+                          "bytes": (thumbs / f"{key}.png").stat().st_size}
+        tmp = dist / f"support_atlas_{n}.tmp.{ext}"
+        sheet.save(tmp, **save_kw)
+        digest = hashlib.sha256(tmp.read_bytes()).hexdigest()[:HASH_LEN]
+        fname = f"support_atlas_{n}.{digest}.{ext}"
+        os.replace(tmp, dist / fname)
+        sheets.append({"file": fname, "w": w, "h": hh, "bytes": (dist / fname).stat().st_size})
+
+    atlas = {"version": ATLAS_VERSION, "inputs": inputs, "tile_px": tile_px, "sheet_px": sheet_px,
+             "format": fmt, "sheets": sheets, "tiles": tiles}
+    map_path.write_text(json.dumps(atlas, indent=2, sort_keys=True), encoding="utf-8")
+    for p in dist.glob("support_atlas_*.*"):
+        if p.name not in {s["file"] for s in sheets}:
+            p.unlink()
+    src_bytes = sum(f.stat().st_size for f in files)
+    print(f"[atlas] {len(tiles)} thumbnails ({src_bytes:,} bytes in {len(files)} files) -> "
+          f"{len(sheets)} sheets ({sum(s['bytes'] for s in sheets):,} bytes)")
+    return atlas
+
+
+def build_hash_index(assets_dir: str = ASSETS_DIR) -> Optional[Dict[str, Any]]:
+    """pHash + dHash of every support thumbnail into support_hashes.json; skipped when no thumbnail changed."""
+    if Image is None:
+        print("[hashes] Pillow not installed; skipped card hashes (pip install pillow)")
+        return None
+    try:
+        sys.path.insert(0, str(Path(__file__).resolve().parent / "api"))
+        import _card_hash as card_hash
+    except ImportError:
+        print("[hashes] numpy not installed; skipped card hashes (pip install numpy)")
+        return None
+    thumbs = Path(assets_dir) / "support_thumbs"
+    out_path = Path(assets_dir) / HASHES_FILE
+    files = sorted(thumbs.glob("*.png")) if thumbs.is_dir() else []
+    if not files:
+        print(f"[hashes] no thumbnails in {thumbs}")
+        return None
+
+    h = hashlib.sha256(f"v{card_hash.HASH_VERSION}|{card_hash.INSET}".encode())
+    for f in files:
+        h.update(f.name.encode("utf-8"))
+        h.update(hashlib.sha256(f.read_bytes()).digest())
+    inputs = h.hexdigest()
+    try:
+        old = json.loads(out_path.read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError):
+        old = None
+    if old and old.get("inputs") == inputs:
+        print(f"[hashes] up to date ({len(old.get('cards', {}))} thumbnails)")
+        return old
+
+    import numpy as np
+    cards = {}
+    for f in files:
+        gray = card_hash.to_gray(np.asarray(Image.open(f).convert("RGBA")))
+        ph, dh = card_hash.card_hashes(gray)
+        cards[f.stem] = {"phash": f"{ph:016x}", "dhash": f"{dh:016x}"}
+    doc = {"version": card_hash.HASH_VERSION, "inputs": inputs, "inset": card_hash.INSET, "cards": cards}
+    out_path.write_text(json.dumps(doc, indent=2, sort_keys=True), encoding="utf-8")
+    dupes = len(cards) - len({(c["phash"], c["dhash"]) for c in cards.values()})
+    print(f"[hashes] {len(cards)} thumbnails hashed -> {out_path}" + (f" ({dupes} duplicate keys)" if dupes else ""))
+    return doc
+
+
+def annotate_support_hints(cards: List[Any], atlas: Dict[str, Any]) -> int:
+    """
+    Set SupportAtlas {sheet url, x, y, w, h, sheet_w, sheet_h, bytes, sheet_bytes} on each
+    card of a loaded support_hints.json, in place. `bytes` is the standalone thumbnail's size,
+    so pages can tell whether a sheet is worth fetching for the cards they show.
+    """
+    changed = 0
+    for c in cards:
+        if not isinstance(c, dict):
+            continue
+        img = c.get("SupportImage") or ""
+        key = Path(img).stem if img.startswith(THUMBS_URL) else None
+        t = atlas["tiles"].get(key) if key else None
+        if t:
+            sheet = atlas["sheets"][t["sheet"]]
+            c["SupportAtlas"] = {"sheet": f"/assets/dist/{sheet['file']}", "x": t["x"], "y": t["y"],
+                                 "w": t["w"], "h": t["h"], "sheet_w": sheet["w"], "sheet_h": sheet["h"],
+                                 "bytes": t.get("bytes"), "sheet_bytes": sheet["bytes"]}
+            changed += 1
+        else:
+            c.pop("SupportAtlas", None)
+    return changed
+
+
+def prune(dist: Path, manifest: Dict[str, Dict[str, Any]]) -> int:
+    """Drop hashed files no longer referenced by the manifest."""
+    keep = {e["file"] for e in manifest.values()}
+    removed = 0
+    for p in dist.iterdir():
+        base = p.name[:-3] if p.name.endswith((".gz", ".br")) else p.name
+        if p.name != MANIFEST and p.suffix in (".json", ".gz", ".br") and base not in keep:
+            p.unlink()
+            removed += 1
+    return removed
+
+
+def build(assets_dir: str = ASSETS_DIR, dist_dir: Optional[str] = None,
+          atlas: bool = True, tile_px: Optional[int] = None, atlas_format: str = "webp",
+          hashes: bool = True) -> Dict[str, Dict[str, Any]]:
+    src = Path(assets_dir)
+    dist = Path(dist_dir or os.path.join(assets_dir, "dist"))
+    dist.mkdir(parents=True, exist_ok=True)
+
+    packed = build_atlas(assets_dir, str(dist), tile_px=tile_px, fmt=atlas_format) if atlas else None
+    if hashes:
+        build_hash_index(assets_dir)
+
+    manifest: Dict[str, Dict[str, Any]] = {}
+    loaded: Dict[str, Any] = {}
+    for path in sorted(src.glob("*.json")):
+        with open(path, "r", encoding="utf-8-sig") as f:
+            loaded[path.name] = json.load(f)
+        if path.name == "support_hints.json" and packed:
+            # only the built copy carries sheet coordinates; the scraped file is rewritten by every scrape
+            n = annotate_support_hints(loaded[path.name], packed)
+            print(f"[atlas] SupportAtlas on {n} cards in the built support_hints.json")
+        raw = path.stat().st_size
+        manifest[path.name] = emit(path.name, minify(loaded[path.name]), dist)
+        manifest[path.name]["source_bytes"] = raw
+
+    for name, (source, fields) in PROJECTIONS.items():
+        if source not in loaded:
+            print(f"[build] skip {name}: {source} not found")
+            continue
+        manifest[name] = emit(name, minify(project(loaded[source], fields)), dist)
+        manifest[name]["source"] = source
+
+    _write_if_changed(dist / MANIFEST, json.dumps(manifest, indent=2, sort_keys=True).encode("utf-8"))
+    removed = prune(dist, manifest)
+
+    for name, e in sorted(manifest.items()):
+        base = e.get("source_bytes") or manifest.get(e.get("source", ""), {}).get("source_bytes") or e["bytes"]
+        br = f"  br {e['br_bytes']:>9,}" if "br_bytes" in e else ""
+        print(f"[build] {name:<22} {base:>10,} -> min {e['bytes']:>10,}  gz {e['gzip_bytes']:>9,}{br}  {e['file']}")
+    if removed:
+        print(f"[build] pruned {removed} stale files")
+    if brotli is None:
+        print("[build] brotli not installed; skipped .br files (pip install brotli)")
+    return manifest
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Build hashed/minified/compressed front-end assets")
+    ap.add_argument("--assets", default=ASSETS_DIR, help="Directory with the scraped *.json files")
+    ap.add_argument("--out", default=None, help="Output directory (default: <assets>/dist)")
+    ap.add_argument("--no-atlas", action="store_true", help="Skip the support thumbnail sprite sheets")
+    ap.add_argument("--atlas-tile", type=int, default=None,
+                    help="Downscale thumbnails to this many px (longest side) before packing, e.g. 96")
+    ap.add_argument("--atlas-format", choices=sorted(ATLAS_FORMATS), default="webp",
+                    help="Sprite sheet encoding (webp: lossy q90, png: lossless)")
+    ap.add_argument("--no-hashes", action="store_true", help="Skip the support thumbnail perceptual hash index")
+    args = ap.parse_args()
+    if not os.path.isdir(args.assets):
+        sys.exit(f"[build] no such directory: {args.assets}")
+    build(args.assets, args.out, atlas=not args.no_atlas, tile_px=args.atlas_tile, atlas_format=args.atlas_format,
+          hashes=not args.no_hashes)
+
+
+if __name__ == "__main__":
+    main()
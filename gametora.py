@@ -1,8 +1,11 @@
-import argparse, json, os, sys, time, re, requests, random, threading, queue
+import argparse, json, os, sys, time, re, requests, random, threading, queue, hashlib, math, functools, base64, shutil, tempfile, unicodedata
+from concurrent.futures import Future
+from contextlib import contextmanager
 from typing import Any, Dict, List, Optional, Tuple
 from urllib.parse import urlparse
 from urllib3.exceptions import ReadTimeoutError
 from pathlib import Path
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 
 from selenium import webdriver
 from selenium.webdriver.common.by import By
@@ -15,15 +18,150 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from webdriver_manager.chrome import ChromeDriverManager
 
+BASE_URL = "https://gametora.com"
 DELAY = 0.25
 RETRIES = 3
 NAV_TIMEOUT = 45
 JS_TIMEOUT  = 45
+USER_AGENT = ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+              "(KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36")
 
 JSON_LOCK = threading.Lock()
-THUMB_LOCK = threading.Lock()
 
 
+class Profiler:
+    """
+    Opt-in (--profile) run instrumentation: wall time per category, WebDriver
+    commands / execute_script calls / retries per page, and the slowest pages.
+    A page spans from its nav() to the next nav() on the same thread.
+    """
+    SCRIPT_COMMANDS = ("w3cExecuteScript", "w3cExecuteScriptAsync", "executeScript", "executeAsyncScript")
+
+    def __init__(self):
+        self.enabled = False
+        self._lock = threading.Lock()
+        self._open: Dict[int, Dict[str, Any]] = {}  # thread id -> page in progress
+        self.categories: Dict[str, List[float]] = {}
+        self.pages: List[Dict[str, Any]] = []
+        self.totals = {"commands": 0, "scripts": 0, "retries": 0}
+        self._started = time.monotonic()
+
+    def enable(self) -> None:
+        self.enabled = True
+        self._started = time.monotonic()
+
+    @contextmanager
+    def phase(self, category: str):
+        if not self.enabled:
+            yield
+            return
+        t0 = time.monotonic()
+        try:
+            yield
+        finally:
+            self.add(category, time.monotonic() - t0)
+
+    def add(self, category: str, seconds: float) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            c = self.categories.setdefault(category, [0, 0.0])
+            c[0] += 1; c[1] += seconds
+
+    def begin_page(self, url: str) -> None:
+        if not self.enabled:
+            return
+        page = {"url": url, "thread": threading.current_thread().name,
+                "t0": time.monotonic(), "commands": 0, "scripts": 0, "retries": 0}
+        with self._lock:
+            self._close(self._open.pop(threading.get_ident(), None))
+            self._open[threading.get_ident()] = page
+
+    def end_pages(self) -> None:
+        with self._lock:
+            for page in self._open.values():
+                self._close(page)
+            self._open.clear()
+
+    def _close(self, page: Optional[Dict[str, Any]]) -> None:
+        if page:
+            page["seconds"] = round(time.monotonic() - page.pop("t0"), 3)
+            self.pages.append(page)
+
+    def _bump(self, key: str) -> None:
+        with self._lock:
+            self.totals[key] += 1
+            page = self._open.get(threading.get_ident())
+            if page:
+                page[key] += 1
+
+    def count_command(self, command: str) -> None:
+        if not self.enabled:
+            return
+        self._bump("commands")
+        if command in self.SCRIPT_COMMANDS:
+            self._bump("scripts")
+
+    def count_retry(self) -> None:
+        if self.enabled:
+            self._bump("retries")
+
+    def instrument_driver(self, driver) -> None:
+        """Count every WebDriver command this driver sends."""
+        if not self.enabled:
+            return
+        orig = driver.execute
+        def execute(driver_command, params=None):
+            self.count_command(driver_command)
+            return orig(driver_command, params)
+        driver.execute = execute
+
+    def write_report(self, out_base: str, slowest: int = 15) -> None:
+        self.end_pages()
+        wall = time.monotonic() - self._started
+        with self._lock:
+            cats = {k: {"count": int(n), "seconds": round(t, 3)} for k, (n, t) in sorted(self.categories.items())}
+            pages = sorted(self.pages, key=lambda p: p["seconds"], reverse=True)
+            report = {"wall_seconds": round(wall, 3), "pages": len(self.pages), "totals": dict(self.totals),
+                      "categories": cats, "slowest_pages": pages[:slowest]}
+        os.makedirs(os.path.dirname(out_base) or ".", exist_ok=True)
+        with open(out_base + ".json", "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        n = max(1, report["pages"])
+        lines = [f"wall {wall:.1f}s, {report['pages']} pages, "
+                 f"{self.totals['commands']} WebDriver commands ({self.totals['commands'] / n:.1f}/page), "
+                 f"{self.totals['scripts']} execute_script ({self.totals['scripts'] / n:.1f}/page), "
+                 f"{self.totals['retries']} retries", "",
+                 f"{'category':<20}{'count':>8}{'seconds':>11}{'avg ms':>10}"]
+        for k, v in cats.items():
+            lines.append(f"{k:<20}{v['count']:>8}{v['seconds']:>11.2f}{1000 * v['seconds'] / max(1, v['count']):>10.1f}")
+        lines += ["", "slowest pages:"]
+        for p in report["slowest_pages"]:
+            lines.append(f"{p['seconds']:8.2f}s  cmds {p['commands']:>5}  js {p['scripts']:>5}  "
+                         f"retries {p['retries']}  {p['url']}")
+        with open(out_base + ".txt", "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        print(f"[profile] wrote {out_base}.json / {out_base}.txt")
+
+
+PROFILER = Profiler()
+
+def profiled(category: str):
+    """Attribute the wrapped function's wall time to `category` when --profile is on."""
+    def deco(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not PROFILER.enabled:
+                return fn(*args, **kwargs)
+            with PROFILER.phase(category):
+                return fn(*args, **kwargs)
+        return wrapper
+    return deco
+
+
+def site_url(path: str) -> str:
+    return BASE_URL.rstrip("/") + path
+
 def _read_json_list(path: str) -> List[Any]:
     if not os.path.exists(path):
         return []
@@ -34,6 +172,7 @@ def _read_json_list(path: str) -> List[Any]:
     except json.JSONDecodeError:
         return []
 
+@profiled("json_write")
 def _atomic_write(path: str, data: List[Any]) -> None:
     os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
     tmp = path + ".tmp"
@@ -41,23 +180,42 @@ def _atomic_write(path: str, data: List[Any]) -> None:
         json.dump(data, f, ensure_ascii=False, indent=2)
     os.replace(tmp, path)
 
+def _pluck(d: Dict[str, Any], dotted: str) -> Any:
+    cur: Any = d
+    for part in dotted.split("."):
+        cur = cur.get(part, None) if isinstance(cur, dict) else None
+    return cur
+
 def append_json_item(path: str, item: Dict[str, Any], dedup_key: Optional[Tuple[str, ...]] = None) -> bool:
     with JSON_LOCK:
         data = _read_json_list(path)
         if dedup_key:
-            def pluck(d: Dict[str, Any], dotted: str) -> Any:
-                cur: Any = d
-                for part in dotted.split("."):
-                    cur = cur.get(part, None) if isinstance(cur, dict) else None
-                return cur
-            probe = tuple(str(pluck(item, k)) for k in dedup_key)
+            probe = tuple(str(_pluck(item, k)) for k in dedup_key)
             for existing in data:
-                if tuple(str(pluck(existing, k)) for k in dedup_key) == probe:
+                if tuple(str(_pluck(existing, k)) for k in dedup_key) == probe:
                     return False
         data.append(item)
         _atomic_write(path, data)
         return True
 
+def extend_json_items(path: str, items: List[Dict[str, Any]], dedup_key: Optional[Tuple[str, ...]] = None) -> int:
+    """Append many items in one locked read/write; same ordering + dedup as repeated append_json_item."""
+    with JSON_LOCK:
+        data = _read_json_list(path)
+        seen = {tuple(str(_pluck(e, k)) for k in dedup_key) for e in data} if dedup_key else set()
+        added = 0
+        for item in items:
+            if dedup_key:
+                probe = tuple(str(_pluck(item, k)) for k in dedup_key)
+                if probe in seen:
+                    continue
+                seen.add(probe)
+            data.append(item)
+            added += 1
+        if added:
+            _atomic_write(path, data)
+        return added
+
 def upsert_json_item(path: str, match_key: str, match_value: str, patch: Dict[str, Any]) -> None:
     with JSON_LOCK:
         data = _read_json_list(path)
@@ -209,7 +367,7 @@ def _parse_top_meta(d) -> tuple[str, int]:
 def _abs_url(driver, src: str) -> str:
     if not src: return ""
     if src.startswith("http://") or src.startswith("https://"): return src
-    origin = driver.execute_script("return location.origin;") or "https://gametora.com"
+    origin = driver.execute_script("return location.origin;") or BASE_URL
     if src.startswith("/"): return origin + src
     return origin + "/" + src
 
@@ -230,30 +388,201 @@ def _ensure_dir(p: str) -> Path:
     d.mkdir(parents=True, exist_ok=True)
     return d
 
-def _save_thumb(url: str, thumbs_dir: str, slug: Optional[str], sup_id: Optional[str]) -> str:
-    if not url: return ""
-    _ensure_dir(thumbs_dir)
-    ext = Path(urlparse(url).path).suffix or ".png"
-    base = slug or sup_id or _id_from_img_src(url) or "support"
-    # keep it filesystem-safe
-    safe = re.sub(r"[^a-z0-9\-_.]", "-", base.lower())
-    fname = f"{safe}{ext}"
-    dest = Path(thumbs_dir) / fname
-    with THUMB_LOCK:
-        if not dest.exists() or dest.stat().st_size == 0:
+class ThumbDownloader:
+    """
+    Bounded download queue for support thumbnails.
+
+    A few worker threads share one keep-alive session; writes are serialized
+    per destination file only. Existing files are revalidated with
+    ETag/If-Modified-Since and left untouched when the body hash is unchanged.
+    Validators live in `meta_path` (one file for every image folder, keyed by folder),
+    kept out of the image folders themselves since those are deployed; '' keeps
+    them in memory only.
+    """
+    LEGACY_META_NAME = ".thumbs_meta.json"  # old per-folder sidecar, migrated on first use
+
+    def __init__(self, workers: int = 4, queue_size: int = 32, polite_delay_s: float = 0.05,
+                 meta_path: str = ".thumbs_meta.json"):
+        self.polite_delay_s = polite_delay_s
+        self.meta_path = meta_path
+        self._session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=2, pool_maxsize=max(2, workers))
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+        self._session.headers.update({"User-Agent": USER_AGENT})
+        self._q: "queue.Queue[Optional[tuple]]" = queue.Queue(maxsize=max(1, queue_size))
+        self._guard = threading.Lock()
+        self._file_locks: Dict[str, threading.Lock] = {}
+        self._meta: Dict[str, Dict[str, Dict[str, str]]] = {}
+        self.stats = {"downloaded": 0, "skipped": 0, "failed": 0, "bytes": 0}
+        self._started = time.monotonic()
+        self._threads = [threading.Thread(target=self._worker, daemon=True) for _ in range(max(1, workers))]
+        for t in self._threads:
+            t.start()
+
+    def submit(self, url: str, dest: Path) -> Future:
+        """Queue a download; blocks while the queue is full. Future resolves to True if dest is usable."""
+        fut: Future = Future()
+        self._q.put((url, dest, fut))
+        return fut
+
+    def download(self, url: str, dest: Path) -> bool:
+        """Synchronous download in the caller's thread (still per-file locked and pooled)."""
+        return self._fetch(url, dest)
+
+    def close(self) -> None:
+        for _ in self._threads:
+            self._q.put(None)
+        for t in self._threads:
+            t.join()
+        with self._guard:
+            self._save_meta()
+
+    def summary(self) -> str:
+        st = self.stats
+        return (f"[thumb] {st['downloaded']} downloaded, {st['skipped']} unchanged, {st['failed']} failed, "
+                f"{st['bytes'] / 1024:.1f} KiB in {time.monotonic() - self._started:.1f}s")
+
+    def _worker(self) -> None:
+        while True:
+            job = self._q.get()
+            try:
+                if job is None:
+                    return
+                url, dest, fut = job
+                try:
+                    fut.set_result(self._fetch(url, dest))
+                except Exception as e:
+                    fut.set_exception(e)
+            finally:
+                self._q.task_done()
+
+    def _lock_for(self, dest: Path) -> threading.Lock:
+        key = str(dest.resolve())
+        with self._guard:
+            return self._file_locks.setdefault(key, threading.Lock())
+
+    def _load_meta(self) -> None:
+        # caller holds _guard; the first folder lookup reads the whole file
+        if self._meta or not self.meta_path:
+            return
+        try:
+            data = json.loads(Path(self.meta_path).read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError):
+            data = {}
+        if isinstance(data, dict):
+            self._meta.update(data)
+
+    def _dir_meta(self, folder: Path) -> Dict[str, Dict[str, str]]:
+        key = os.path.normpath(str(folder))
+        with self._guard:
+            self._load_meta()
+            if key not in self._meta:
+                try:
+                    self._meta[key] = json.loads((folder / self.LEGACY_META_NAME).read_text(encoding="utf-8"))
+                except (OSError, json.JSONDecodeError):
+                    self._meta[key] = {}
+            return self._meta[key]
+
+    def _save_meta(self) -> None:
+        if not self.meta_path:
+            return
+        tmp = self.meta_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self._meta, f, indent=2, sort_keys=True)
+        os.replace(tmp, self.meta_path)
+        for folder in self._meta:
+            try: (Path(folder) / self.LEGACY_META_NAME).unlink()
+            except OSError: pass
+
+    def _bump(self, key: str, n: int = 1) -> None:
+        with self._guard:
+            self.stats[key] += n
+
+    def _fetch(self, url: str, dest: Path) -> bool:
+        meta = self._dir_meta(dest.parent)
+        with self._lock_for(dest):
+            have = dest.exists() and dest.stat().st_size > 0
+            entry = dict(meta.get(dest.name) or {}) if have else {}
+            headers = {}
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
             try:
-                r = requests.get(url, timeout=20)
+                r = self._session.get(url, headers=headers, timeout=20)
+                if r.status_code == 304:
+                    self._bump("skipped")
+                    return True
                 r.raise_for_status()
-                dest.write_bytes(r.content)
-                time.sleep(0.05)  # be polite
             except Exception as e:
                 print(f"[thumb] failed {url}: {e}")
-                return ""
+                self._bump("failed")
+                return have
+            body = r.content
+            if RECORDER is not None:
+                RECORDER.store(url, r.status_code, r.headers.get("Content-Type", ""), body)
+            digest = hashlib.sha256(body).hexdigest()
+            if have and (entry.get("sha256") or hashlib.sha256(dest.read_bytes()).hexdigest()) == digest:
+                self._bump("skipped")
+            else:
+                tmp = dest.with_suffix(dest.suffix + ".tmp")
+                tmp.write_bytes(body)
+                os.replace(tmp, dest)
+                self._bump("downloaded")
+                self._bump("bytes", len(body))
+            with self._guard:
+                meta[dest.name] = {
+                    "url": url,
+                    "sha256": digest,
+                    "etag": r.headers.get("ETag", ""),
+                    "last_modified": r.headers.get("Last-Modified", ""),
+                }
+        if self.polite_delay_s > 0:
+            time.sleep(self.polite_delay_s)  # be polite, but outside the file lock
+        return True
+
+
+THUMBS_META_PATH = ".thumbs_meta.json"
+_THUMBS: Optional[ThumbDownloader] = None
+_THUMBS_INIT = threading.Lock()
+
+def thumb_downloader() -> ThumbDownloader:
+    global _THUMBS
+    with _THUMBS_INIT:
+        if _THUMBS is None:
+            _THUMBS = ThumbDownloader(meta_path=THUMBS_META_PATH)
+        return _THUMBS
+
+def close_thumb_downloader() -> None:
+    global _THUMBS
+    with _THUMBS_INIT:
+        dl, _THUMBS = _THUMBS, None
+    if dl is not None:
+        dl.close()
+        print(dl.summary())
+
+def _thumb_dest(url: str, thumbs_dir: str, slug: Optional[str], sup_id: Optional[str]) -> Path:
+    ext = Path(urlparse(url).path).suffix or ".png"
+    base = slug or sup_id or _id_from_img_src(url) or "support"
+    # keep it filesystem-safe
+    safe = re.sub(r"[^a-z0-9\-_.]", "-", base.lower())
+    return Path(thumbs_dir) / f"{safe}{ext}"
+
+def _thumb_rel(dest: Path) -> str:
     # return site-relative path for the front-end
     rel = "/" + str(dest.as_posix()).lstrip("/")
     # normalize to your site’s assets folder form:
-    rel = rel.replace("//", "/")
-    return rel
+    return rel.replace("//", "/")
+
+@profiled("save_thumb")
+def _save_thumb(url: str, thumbs_dir: str, slug: Optional[str], sup_id: Optional[str]) -> str:
+    if not url: return ""
+    _ensure_dir(thumbs_dir)
+    dest = _thumb_dest(url, thumbs_dir, slug, sup_id)
+    if not thumb_downloader().download(url, dest):
+        return ""
+    return _thumb_rel(dest)
 
 def collect_support_previews(driver, thumbs_dir: str) -> dict[str, dict]:
     previews: dict[str, dict] = {}
@@ -261,6 +590,7 @@ def collect_support_previews(driver, thumbs_dir: str) -> dict[str, dict]:
     if not anchors:
         _scroll_page_until_stable(driver)
         anchors = _wait_support_cards(driver, timeout_s=4.0)
+    pending: List[Tuple[str, Optional[str], str, Optional[Future]]] = []
     for a in anchors:
         href = a.get_attribute("href") or ""
         slug, sid = _slug_and_id_from_url(href)
@@ -268,40 +598,648 @@ def collect_support_previews(driver, thumbs_dir: str) -> dict[str, dict]:
             continue
         img = safe_find(a, By.CSS_SELECTOR, "img[src*='/images/umamusume/supports/']")
         src = _abs_url(driver, img.get_attribute("src") or "") if img else ""
-        local = _save_thumb(src, thumbs_dir, slug, sid)
+        fut = None
+        if src:
+            _ensure_dir(thumbs_dir)
+            fut = thumb_downloader().submit(src, _thumb_dest(src, thumbs_dir, slug, sid))
+        pending.append((slug, sid, src, fut))
+    for slug, sid, src, fut in pending:
+        local = ""
+        if fut is not None and fut.result():
+            local = _thumb_rel(_thumb_dest(src, thumbs_dir, slug, sid))
         previews[slug] = {"SupportImage": local or src, "SupportId": sid or _id_from_img_src(src)}
     return previews
 
 
 class RateLimiter:
-    def __init__(self, min_interval_s: float = 0.9, jitter_s: float = 0.25):
+    """
+    Politeness budget shared by every scrape function (via nav/fetch_next_data).
+
+    Each host gets a token bucket. In adaptive mode the bucket rate is tuned AIMD
+    style from record() feedback: +`increase` req/s after each fast, successful
+    request, x`decrease` on a timeout/HTTP error (at most once per `cooldown_s`,
+    so a burst of failures from parallel workers counts as one congestion event).
+    min_interval_s sets the starting rate (and the fixed rate when adaptive=False).
+    pace=False never sleeps (local replay); requests are still counted for reports.
+    """
+    def __init__(self, min_interval_s: float = 0.9, jitter_s: float = 0.25, adaptive: bool = True,
+                 max_rate: float = 4.0, min_rate: float = 0.1, increase: float = 0.05,
+                 decrease: float = 0.5, latency_target_s: float = 4.0, cooldown_s: float = 5.0,
+                 pace: bool = True):
+        self.pace = pace
         self.min_interval_s = max(0.0, float(min_interval_s))
         self.jitter_s = max(0.0, float(jitter_s))
+        self.adaptive = adaptive
+        self.start_rate = 1.0 / self.min_interval_s if self.min_interval_s > 0 else max_rate
+        self.max_rate = max(max_rate, self.start_rate) if not adaptive else max_rate
+        self.min_rate = min_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.latency_target_s = latency_target_s
+        self.cooldown_s = cooldown_s
         self._lock = threading.Lock()
-        self._next_time = 0.0
+        self._hosts: Dict[str, Dict[str, float]] = {}
+
+    def _bucket(self, host: str) -> Dict[str, float]:
+        b = self._hosts.get(host)
+        if b is None:
+            now = time.monotonic()
+            b = self._hosts[host] = {
+                "rate": min(self.start_rate, self.max_rate), "tokens": 1.0, "last": now,
+                "first": now, "latest": now, "requests": 0, "errors": 0, "backoffs": 0,
+                "last_backoff": 0.0, "latency_s": 0.0, "waited_s": 0.0,
+            }
+        return b
 
-    def wait(self) -> None:
-        sleep_for = 0.0
+    def wait(self, url: str = "") -> float:
+        """Take one token for url's host, sleeping if needed. Returns seconds slept."""
+        if not self.pace:
+            return 0.0
+        host = urlparse(url).netloc or "*"
         with self._lock:
+            b = self._bucket(host)
             now = time.monotonic()
-            if now < self._next_time:
-                sleep_for = self._next_time - now
-            self._next_time = max(self._next_time, now) + self.min_interval_s
+            b["tokens"] = min(1.0, b["tokens"] + (now - b["last"]) * b["rate"])
+            b["last"] = now
+            # reserve the token now (tokens may go negative) so concurrent callers queue up
+            b["tokens"] -= 1.0
+            sleep_for = -b["tokens"] / b["rate"] if b["tokens"] < 0 else 0.0
+        if self.jitter_s > 0:
+            sleep_for += random.uniform(0.0, self.jitter_s)
         if sleep_for > 0:
             time.sleep(sleep_for)
-        if self.jitter_s > 0:
-            time.sleep(random.uniform(0.0, self.jitter_s))
+        with self._lock:
+            b["waited_s"] += sleep_for
+        PROFILER.add("rate_limit_sleep", sleep_for)
+        return sleep_for
+
+    def record(self, url: str, latency_s: float, ok: bool) -> None:
+        host = urlparse(url).netloc or "*"
+        with self._lock:
+            b = self._bucket(host)
+            now = time.monotonic()
+            b["requests"] += 1
+            b["latest"] = now
+            b["latency_s"] += latency_s
+            if not ok:
+                b["errors"] += 1
+            if not self.adaptive:
+                return
+            if not ok:
+                if now - b["last_backoff"] >= self.cooldown_s:
+                    b["rate"] = max(self.min_rate, b["rate"] * self.decrease)
+                    b["last_backoff"] = now
+                    b["backoffs"] += 1
+                    print(f"[rate] {host}: backing off to {b['rate']:.2f} req/s")
+            elif latency_s <= self.latency_target_s:
+                b["rate"] = min(self.max_rate, b["rate"] + self.increase)
+
+    def total_requests(self) -> int:
+        with self._lock:
+            return int(sum(b["requests"] for b in self._hosts.values()))
+
+    def report(self) -> str:
+        lines = []
+        with self._lock:
+            for host, b in sorted(self._hosts.items()):
+                span = max(1e-6, b["latest"] - b["first"])
+                n = int(b["requests"])
+                lines.append(
+                    f"[rate] {host}: {n} requests, achieved {n / span:.2f} req/s, "
+                    f"final limit {b['rate']:.2f} req/s, avg latency {b['latency_s'] / max(1, n):.2f}s, "
+                    f"{int(b['errors'])} errors, {int(b['backoffs'])} backoffs, {b['waited_s']:.1f}s waiting"
+                )
+        return "\n".join(lines)
+
+
+RATE_LIMITER = RateLimiter()
+
+def configure_rate_limiter(**kwargs) -> RateLimiter:
+    global RATE_LIMITER
+    RATE_LIMITER = RateLimiter(**kwargs)
+    return RATE_LIMITER
+
+
+# ---------- Browserless fast path (embedded Next.js data) ----------
+_HTTP_LOCAL = threading.local()
+_NEXT_DATA_RE = re.compile(
+    r'<script[^>]*id="__NEXT_DATA__"[^>]*>(.*?)</script>', flags=re.S
+)
+
+def http_session() -> requests.Session:
+    """Per-thread keep-alive session with a small connection pool."""
+    s = getattr(_HTTP_LOCAL, "session", None)
+    if s is None:
+        s = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=16)
+        s.mount("http://", adapter)
+        s.mount("https://", adapter)
+        s.headers.update({"User-Agent": USER_AGENT, "Accept-Language": "en"})
+        _HTTP_LOCAL.session = s
+    return s
+
+def fetch_next_data(url: str, timeout: float = 20) -> Optional[Dict[str, Any]]:
+    """GET a page and return its parsed __NEXT_DATA__ blob, or None if absent/unreadable."""
+    RATE_LIMITER.wait(url)
+    t0 = time.monotonic()
+    try:
+        r = http_session().get(url, timeout=timeout)
+        RATE_LIMITER.record(url, time.monotonic() - t0, ok=r.status_code < 400)
+        r.raise_for_status()
+    except requests.RequestException as e:
+        if getattr(e, "response", None) is None:
+            RATE_LIMITER.record(url, time.monotonic() - t0, ok=False)
+        print(f"[fast] fetch failed {url}: {e}")
+        return None
+    if RECORDER is not None:
+        RECORDER.store(url, r.status_code, r.headers.get("Content-Type", ""), r.content)
+    m = _NEXT_DATA_RE.search(r.text)
+    if not m:
+        return None
+    try:
+        data = json.loads(m.group(1))
+    except json.JSONDecodeError:
+        return None
+    return data if isinstance(data, dict) else None
+
+def _next_page_props(data: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    props = (data or {}).get("props") or {}
+    page = props.get("pageProps") if isinstance(props, dict) else None
+    return page if isinstance(page, dict) else {}
+
+def _find_record_list(node: Any, required: Tuple[str, ...], depth: int = 0) -> Optional[List[Dict[str, Any]]]:
+    """Depth-first search for the first list of dicts that carry every key in `required`."""
+    if depth > 6:
+        return None
+    if isinstance(node, list):
+        if node and all(isinstance(x, dict) for x in node) and all(k in node[0] for k in required):
+            return node
+        for x in node:
+            found = _find_record_list(x, required, depth + 1)
+            if found is not None:
+                return found
+    elif isinstance(node, dict):
+        for v in node.values():
+            found = _find_record_list(v, required, depth + 1)
+            if found is not None:
+                return found
+    return None
+
+# Field names and codes the fast path expects in the races page data. If any of the
+# names disappear, the fast path returns None and the Selenium scraper takes over.
+# They have not been checked against a recording of the live page yet, so
+# scrape_races ignores --http-fast until NEXT_RACES_VERIFIED is set; run
+# `--verify-fast-path --record DIR` against the site, then `--replay DIR
+# --verify-fast-path`, and set it once both diffs come back clean.
+NEXT_RACES_VERIFIED = False
+NEXT_RACE_KEYS = ("name_en", "grade", "terrain", "distance", "date", "fans")
+NEXT_RACE_GRADES = {100: "G1", 200: "G2", 300: "G3", 400: "OP", 700: "Pre-OP", 800: "Pre-OP", 999: "Pre Debut"}
+NEXT_RACE_TERRAINS = {1: "Turf", 2: "Dirt"}
+NEXT_RACE_YEARS = {1: "Junior Year", 2: "Classic Year", 3: "Senior Year"}
+MONTH_ABBR = ("Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec")
+
+def _distance_type(meters: int) -> str:
+    if meters <= 1400: return "Short"
+    if meters <= 1800: return "Mile"
+    if meters <= 2400: return "Medium"
+    return "Long"
+
+def _season_for_month(month: int, half: int) -> str:
+    # the game's seasons, not the calendar's: Spring runs through June, Summer to early September
+    if 3 <= month <= 6: return "Spring"
+    if 7 <= month <= 8 or (month == 9 and half == 1): return "Summer"
+    if 9 <= month <= 11: return "Autumn"
+    return "Winter"
+
+def races_from_next_data(data: Optional[Dict[str, Any]]) -> Optional[List[Dict[str, Any]]]:
+    """Map the embedded race list onto make_race() rows; None means 'use Selenium'."""
+    rows = _find_record_list(_next_page_props(data), NEXT_RACE_KEYS)
+    if not rows:
+        return None
+    out: List[Dict[str, Any]] = []
+    try:
+        for r in rows:
+            name = str(r["name_en"] or "").strip()
+            if not name:
+                continue
+            if name in ("Junior Make Debut", "Junior Maiden Race"):
+                out.append(make_race(name, "Junior Year Pre-Debut", "Pre Debut",
+                                     "Varies", "Varies", "Varies", "Varies", "Varies", "Varies"))
+                continue
+            date = r["date"] or {}
+            month, half, year = int(date["month"]), int(date["half"]), int(date["year"])
+            meters = int(r["distance"])
+            fans = r["fans"] or {}
+            out.append(make_race(
+                name,
+                f"{NEXT_RACE_YEARS[year]} {'Early' if half == 1 else 'Late'} {MONTH_ABBR[month - 1]}",
+                NEXT_RACE_GRADES[int(r["grade"])],
+                NEXT_RACE_TERRAINS[int(r["terrain"])],
+                _distance_type(meters),
+                f"{meters} m",
+                _season_for_month(month, half),
+                str(fans["required"]),
+                f"{fans['gained']} for 1st place",
+            ))
+    except (KeyError, TypeError, ValueError, IndexError) as e:
+        print(f"[fast] race data shape changed ({e!r}); falling back to Selenium")
+        return None
+    return out
+
+
+SCRAPE_STATE_SCHEMA = 2
+
+# (path, dedup key, items written for the page)
+ScrapeRecords = List[Tuple[str, Tuple[str, ...], List[Dict[str, Any]]]]
+
+
+def _record_id(item: Dict[str, Any], key: Tuple[str, ...]) -> str:
+    """Short digest of the same identity tuple append_json_item dedups on."""
+    probe = "\x1f".join(str(_pluck(item, k)) for k in key)
+    return hashlib.sha1(probe.encode("utf-8")).hexdigest()[:16]
 
 
+class ScrapeState:
+    """
+    Ledger of {"scraped_at": epoch, "fingerprint": sha1, "records": ...} plus a run
+    marker, saved after every page. Entries are scoped by server and output file
+    ("<server>|<path>"), so a `--server japan` run never reuses pages scraped for
+    global and a different --out-* starts clean; ledgers with another schema tag
+    are discarded. Pages scraped since `since` (or since the start of an
+    interrupted run) are skipped without navigating; pages whose fingerprint is
+    unchanged are skipped before the expensive tippy walk. Either skip only
+    applies while every record the page wrote is still in its output file.
+    `force` skips nothing.
+    """
+    def __init__(self, path: str, server: str, since: Optional[float] = None, force: bool = False):
+        self.path = path
+        self.server = server
+        self.force = force
+        self._lock = threading.Lock()
+        self._file_ids: Dict[Tuple[str, Tuple[str, ...]], Tuple[Tuple[int, int], set]] = {}
+        data = {}
+        if path and os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                data = {}
+        if data and data.get("schema") != SCRAPE_STATE_SCHEMA:
+            print(f"[state] {path} has schema {data.get('schema')!r}, expected {SCRAPE_STATE_SCHEMA}; starting fresh")
+            data = {}
+        self.pages: Dict[str, Dict[str, Dict[str, Any]]] = data.get("pages") or {}
+        prev_run = data.get("run") or {}
+        self.cutoff = since
+        if prev_run and not prev_run.get("finished") and prev_run.get("started_at") \
+                and prev_run.get("server") == server:
+            # interrupted run: resume from its checkpoint
+            self.cutoff = max(self.cutoff or 0.0, float(prev_run["started_at"]))
+            self.run = prev_run
+            print(f"[state] resuming interrupted run from {time.ctime(self.run['started_at'])}")
+        else:
+            self.run = {"started_at": time.time(), "finished": False, "server": server}
+        self.skipped = 0
+        self._save()
+
+    def _scope(self, out: str) -> str:
+        return f"{self.server}|{os.path.normpath(out)}"
+
+    def _entry(self, out: str, url: str) -> Dict[str, Any]:
+        return (self.pages.get(self._scope(out)) or {}).get(url) or {}
+
+    def recently_done(self, out: str, url: str) -> bool:
+        if self.force or self.cutoff is None:
+            return False
+        entry = self._entry(out, url)
+        done = entry.get("scraped_at", 0) >= self.cutoff and self._records_present(out, entry)
+        if done:
+            self._count_skip()
+        return done
+
+    def unchanged(self, out: str, url: str, fingerprint: str) -> bool:
+        if self.force or not fingerprint:
+            return False
+        entry = self._entry(out, url)
+        same = entry.get("fingerprint") == fingerprint and self._records_present(out, entry)
+        if same:
+            self._count_skip()
+        return same
+
+    def mark(self, out: str, url: str, fingerprint: str, records: Optional[ScrapeRecords] = None) -> None:
+        written = {
+            os.path.normpath(p): {"key": list(key), "ids": sorted({_record_id(it, key) for it in items})}
+            for p, key, items in (records or [])
+        }
+        with self._lock:
+            self.pages.setdefault(self._scope(out), {})[url] = {
+                "scraped_at": time.time(), "fingerprint": fingerprint, "records": written,
+            }
+        self._save()
+
+    def _records_present(self, out: str, entry: Dict[str, Any]) -> bool:
+        if not entry or not os.path.exists(out):
+            return False
+        for p, rec in (entry.get("records") or {}).items():
+            ids = rec.get("ids") or []
+            if ids and not set(ids) <= self._ids_in_file(p, tuple(rec.get("key") or ())):
+                return False
+        return True
+
+    def _ids_in_file(self, path: str, key: Tuple[str, ...]) -> set:
+        """Record ids currently in `path`, cached until the file's mtime/size changes."""
+        try:
+            st = os.stat(path)
+        except OSError:
+            return set()
+        stamp = (st.st_mtime_ns, st.st_size)
+        with self._lock:
+            hit = self._file_ids.get((path, key))
+        if hit and hit[0] == stamp:
+            return hit[1]
+        with JSON_LOCK:
+            ids = {_record_id(e, key) for e in _read_json_list(path) if isinstance(e, dict)}
+        with self._lock:
+            self._file_ids[(path, key)] = (stamp, ids)
+        return ids
+
+    def finish(self) -> None:
+        self.run["finished"] = True
+        self._save()
+        print(f"[state] run complete; {self.skipped} pages skipped as unchanged/recent")
+
+    def _count_skip(self) -> None:
+        with self._lock:
+            self.skipped += 1
+
+    def _save(self) -> None:
+        if not self.path:
+            return
+        with self._lock:
+            snapshot = {"schema": SCRAPE_STATE_SCHEMA, "run": dict(self.run),
+                        "pages": {scope: dict(urls) for scope, urls in self.pages.items()}}
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp = self.path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(snapshot, f, ensure_ascii=False, indent=2, sort_keys=True)
+            os.replace(tmp, self.path)
+
+
+def _parse_since(value: str) -> float:
+    """'12h' / '3d' / '45m' ago, or an ISO date/datetime -> epoch seconds."""
+    m = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([smhd])\s*", value or "")
+    if m:
+        mult = {"s": 1, "m": 60, "h": 3600, "d": 86400}[m.group(2)]
+        return time.time() - float(m.group(1)) * mult
+    from datetime import datetime
+    try:
+        return datetime.fromisoformat(value.strip()).timestamp()
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"--since expects e.g. 12h, 3d or 2025-01-31, got {value!r}")
+
+def section_fingerprint(d, css: str) -> str:
+    """sha1 over the outerHTML of every element matching css ('' if nothing matched)."""
+    try:
+        html = d.execute_script(
+            "return Array.from(document.querySelectorAll(arguments[0])).map(e => e.outerHTML).join('\\n');", css
+        ) or ""
+    except Exception:
+        html = ""
+    return hashlib.sha1(html.encode("utf-8")).hexdigest() if html else ""
+
+def data_fingerprint(obj: Any) -> str:
+    if obj is None:
+        return ""
+    return hashlib.sha1(json.dumps(obj, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+# ---------- Record / replay fixtures ----------
+class Recorder:
+    """
+    --record DIR: keep every same-origin response a run touches (HTML, Next.js
+    chunks, JSON, list-page images) so ReplayServer can serve the site offline,
+    plus a rendered DOM snapshot per navigated page for parser debugging.
+    Browser responses come from Chrome's performance log + Network.getResponseBody.
+    """
+    def __init__(self, root: str):
+        self.root = Path(root)
+        (self.root / "bodies").mkdir(parents=True, exist_ok=True)
+        (self.root / "snapshots").mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self.index: Dict[str, Dict[str, Any]] = {}
+        try:
+            self.index = json.loads((self.root / "index.json").read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError):
+            pass
+
+    @staticmethod
+    def key_for(url: str) -> Optional[str]:
+        u = urlparse(url)
+        if u.netloc and u.netloc != urlparse(BASE_URL).netloc:
+            return None
+        return (u.path or "/") + (f"?{u.query}" if u.query else "")
+
+    def store(self, url: str, status: int, content_type: str, body: bytes) -> None:
+        key = self.key_for(url)
+        if key is None or status != 200:
+            return
+        name = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        (self.root / "bodies" / name).write_bytes(body)
+        with self._lock:
+            self.index[key] = {"file": f"bodies/{name}", "content_type": content_type or "application/octet-stream"}
+
+    def capture(self, driver) -> None:
+        """Drain the driver's performance log and store the bodies of finished same-origin responses."""
+        try:
+            entries = driver.get_log("performance")
+        except Exception:
+            return
+        responses: Dict[str, Dict[str, Any]] = {}
+        finished = set()
+        for e in entries:
+            try:
+                msg = json.loads(e["message"])["message"]
+            except (KeyError, TypeError, json.JSONDecodeError):
+                continue
+            params = msg.get("params") or {}
+            if msg.get("method") == "Network.responseReceived":
+                responses[params.get("requestId")] = params.get("response") or {}
+            elif msg.get("method") == "Network.loadingFinished":
+                finished.add(params.get("requestId"))
+        for rid, resp in responses.items():
+            url = resp.get("url", "")
+            key = self.key_for(url)
+            if rid not in finished or key is None or resp.get("status") != 200:
+                continue
+            with self._lock:
+                # static chunks never change within a recording; pages/data do
+                if key in self.index and key.startswith("/_next/static/"):
+                    continue
+            try:
+                got = driver.execute_cdp_cmd("Network.getResponseBody", {"requestId": rid})
+            except Exception:
+                continue
+            raw = got.get("body", "")
+            body = base64.b64decode(raw) if got.get("base64Encoded") else raw.encode("utf-8")
+            self.store(url, 200, resp.get("mimeType", ""), body)
+
+    def snapshot(self, driver, url: str) -> None:
+        key = self.key_for(url)
+        if key is None:
+            return
+        try:
+            html = driver.page_source
+        except Exception:
+            return
+        name = hashlib.sha1(key.encode("utf-8")).hexdigest() + ".html"
+        (self.root / "snapshots" / name).write_text(html, encoding="utf-8")
+
+    def save(self) -> None:
+        with self._lock:
+            tmp = self.root / "index.json.tmp"
+            tmp.write_text(json.dumps(self.index, indent=2, sort_keys=True), encoding="utf-8")
+            os.replace(tmp, self.root / "index.json")
+        print(f"[record] {len(self.index)} responses in {self.root}")
+
+
+RECORDER: Optional[Recorder] = None
+
+
+class ReplayServer:
+    """Serve a Recorder directory over local HTTP; BASE_URL is pointed at it in --replay mode."""
+    def __init__(self, root: str, port: int = 0):
+        self.root = Path(root)
+        index = json.loads((self.root / "index.json").read_text(encoding="utf-8"))
+        root_dir = self.root
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                entry = index.get(self.path) or index.get(self.path.split("?", 1)[0])
+                if not entry:
+                    self.send_error(404)
+                    return
+                body = (root_dir / entry["file"]).read_bytes()
+                self.send_response(200)
+                self.send_header("Content-Type", entry["content_type"])
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self.httpd.daemon_threads = True
+        self.origin = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        print(f"[replay] serving {len(index)} recorded responses at {self.origin}")
+
+    def close(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+# ---------- Lean page loads (CDP request blocking) ----------
+# Detail pages are read as DOM text only; thumbnails are fetched separately by
+# _save_thumb. Skill icons (.png) stay unblocked because hint tiles are located
+# through them, and list pages are never blocked (collect_support_previews).
+DEFAULT_BLOCKLIST: Tuple[str, ...] = (
+    # images
+    "*/images/umamusume/supports/*", "*/images/umamusume/characters/*",
+    "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.avif",
+    # media
+    "*.mp4", "*.webm", "*.mp3", "*.ogg", "*.m4a",
+    # fonts
+    "*.woff", "*.woff2", "*.ttf", "*.otf",
+    # third-party ads / analytics
+    "*googletagmanager.com*", "*google-analytics.com*", "*googlesyndication.com*",
+    "*doubleclick.net*", "*adservice.google.*", "*amazon-adsystem.com*", "*nitropay.com*",
+    "*cloudflareinsights.com*", "*hotjar.com*", "*facebook.net*", "*quantserve.com*",
+)
+BLOCK_PATTERNS: Tuple[str, ...] = DEFAULT_BLOCKLIST
+_DETAIL_PAGE_RE = re.compile(r"/umamusume/(?:characters|supports)/[^/?#]+")
+
+def load_blocklist(path: str) -> Tuple[str, ...]:
+    """One CDP URL pattern per line; blank lines and # comments ignored."""
+    with open(path, "r", encoding="utf-8") as f:
+        return tuple(ln.strip() for ln in f if ln.strip() and not ln.lstrip().startswith("#"))
+
+def set_resource_blocking(driver, patterns: Tuple[str, ...]) -> None:
+    """Apply Network.setBlockedURLs on this driver, skipping the CDP call if nothing changed."""
+    if getattr(driver, "_blocked_patterns", ()) == patterns:
+        return
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": list(patterns)})
+        driver._blocked_patterns = patterns
+    except Exception as e:
+        print(f"[block] CDP unavailable, loading everything: {e}")
+        driver._blocked_patterns = patterns  # don't retry on every nav
+
+def page_weight(driver) -> Tuple[int, float]:
+    """(bytes transferred, seconds to DOMContentLoaded/load) for the current page."""
+    try:
+        res = driver.execute_script("""
+            const nav = performance.getEntriesByType('navigation')[0];
+            let bytes = nav ? (nav.transferSize || 0) : 0;
+            for (const r of performance.getEntriesByType('resource')) bytes += (r.transferSize || 0);
+            const end = nav ? (nav.loadEventEnd || nav.domContentLoadedEventEnd || nav.responseEnd) : 0;
+            return [bytes, end / 1000];
+        """) or [0, 0]
+        return int(res[0]), float(res[1])
+    except Exception:
+        return 0, 0.0
+
+
+# Global cap on simultaneously running Chrome instances (None = unlimited).
+BROWSER_BUDGET: Optional[threading.BoundedSemaphore] = None
+
 def new_driver(headless: bool = True) -> webdriver.Chrome:
+    """
+    Start Chrome, first waiting for a slot in BROWSER_BUDGET; quit() gives the slot back.
+    Site settings (server, language, cookie consent) are pre-seeded when known, so the
+    first nav already renders the configured server and ensure_server is a no-op.
+    """
+    slot = BROWSER_BUDGET
+    if slot is not None:
+        slot.acquire()
+    profile_dir = _copy_chrome_profile() if CHROME_PROFILE_TEMPLATE else None
+    try:
+        driver = _launch_chrome(headless, user_data_dir=profile_dir)
+    except BaseException:
+        if slot is not None:
+            slot.release()
+        if profile_dir:
+            shutil.rmtree(profile_dir, ignore_errors=True)
+        raise
+    if profile_dir:
+        driver._preseeded_server = SITE_SERVER  # the template already carries the settings
+    else:
+        preseed_driver(driver, SITE_SERVER)
+
+    orig_quit = driver.quit
+    released = []
+    def quit():
+        if RECORDER is not None and not released:
+            RECORDER.capture(driver)
+        try:
+            orig_quit()
+        finally:
+            if not released:
+                released.append(True)
+                if slot is not None:
+                    slot.release()
+                if profile_dir:
+                    shutil.rmtree(profile_dir, ignore_errors=True)
+    driver.quit = quit
+    return driver
+
+def _launch_chrome(headless: bool, user_data_dir: Optional[str] = None) -> webdriver.Chrome:
     opts = Options()
     if headless:
         opts.add_argument("--headless=new")
     opts.add_argument("--window-size=1920,1080")
 
-    opts.add_argument(
-        "--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36"
-    )
+    opts.add_argument(f"--user-agent={USER_AGENT}")
 
     # Force SwiftShader / software GPU (Chrome 139+)
     opts.add_argument("--enable-unsafe-swiftshader")
@@ -317,11 +1255,17 @@ def new_driver(headless: bool = True) -> webdriver.Chrome:
     opts.add_argument("--log-level=3")
     opts.add_experimental_option("excludeSwitches", ["enable-logging"])
     opts.set_capability("pageLoadStrategy", "eager")
+    if RECORDER is not None:
+        opts.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+    if user_data_dir:
+        opts.add_argument(f"--user-data-dir={user_data_dir}")
 
-    service = Service(ChromeDriverManager().install())
+    # CHROMEDRIVER=/path/to/chromedriver skips the download (offline/replay boxes)
+    service = Service(os.environ.get("CHROMEDRIVER") or ChromeDriverManager().install())
     driver = webdriver.Chrome(service=service, options=opts)
     driver.set_page_load_timeout(NAV_TIMEOUT)
     driver.set_script_timeout(JS_TIMEOUT)
+    PROFILER.instrument_driver(driver)
     
     try:
         driver.command_executor._client_config.timeout = 300
@@ -351,17 +1295,109 @@ def wait_css(driver, css: str, timeout: int = 8):
     except (TimeoutException, WebDriverException, ReadTimeoutError):
         return None
 
-def nav(driver, url: str, wait_for_css: Optional[str] = None) -> bool:
+# ---------- Event-driven waits ----------
+class WaitStats:
+    """Per-category totals of time actually waited vs. the fixed sleep it replaced."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._cats: Dict[str, List[float]] = {}
+
+    def add(self, category: str, baseline_s: float, waited_s: float) -> None:
+        with self._lock:
+            c = self._cats.setdefault(category, [0, 0.0, 0.0])
+            c[0] += 1; c[1] += baseline_s; c[2] += waited_s
+
+    def report(self) -> str:
+        lines = []
+        with self._lock:
+            for cat, (n, base, waited) in sorted(self._cats.items()):
+                lines.append(f"[wait] {cat:<13} {int(n):>6} waits  {waited:8.1f}s waited  "
+                             f"{base:8.1f}s fixed-sleep baseline  {base - waited:+8.1f}s saved")
+        return "\n".join(lines)
+
+
+WAIT_STATS = WaitStats()
+
+# Resolves as soon as `check()` holds, re-testing on every DOM mutation;
+# the ceiling is the old fixed sleep. One WebDriver round trip per wait.
+_DOM_WAIT_JS = """
+const arg = arguments[0], ceilMs = arguments[1], done = arguments[arguments.length - 1];
+const check = () => { try { return !!(%s); } catch (e) { return false; } };
+if (check()) { done(true); return; }
+let finished = false, timer = null;
+const obs = new MutationObserver(() => { if (check()) finish(true); });
+const finish = (v) => { if (finished) return; finished = true; obs.disconnect(); clearTimeout(timer); done(v); };
+obs.observe(document.documentElement, {childList: true, subtree: true, attributes: true, characterData: true});
+timer = setTimeout(() => finish(check()), ceilMs);
+"""
+
+def wait_js(driver, condition_js: str, ceiling_s: float, category: Optional[str], arg: Any = None,
+            baseline_s: Optional[float] = None) -> bool:
+    """
+    Wait until the JS expression `condition_js` (may use `arg`) is truthy, at most ceiling_s.
+    Pass category=None to leave the bookkeeping to the caller.
+    """
+    t0 = time.monotonic()
+    try:
+        ok = bool(driver.execute_async_script(_DOM_WAIT_JS % condition_js, arg, int(ceiling_s * 1000)))
+    except Exception:
+        # no async script support / navigation mid-wait: fall back to the old fixed sleep
+        remaining = ceiling_s - (time.monotonic() - t0)
+        if remaining > 0:
+            time.sleep(remaining)
+        ok = False
+    if category:
+        WAIT_STATS.add(category, ceiling_s if baseline_s is None else baseline_s, time.monotonic() - t0)
+    return ok
+
+def wait_css_present(driver, css: str, ceiling_s: float, category: str) -> bool:
+    return wait_js(driver, f"document.querySelector({json.dumps(css)})", ceiling_s, category)
+
+def wait_css_gone(driver, css: str, ceiling_s: float, category: str) -> bool:
+    return wait_js(driver, f"!document.querySelector({json.dumps(css)})", ceiling_s, category)
+
+
+def _nav_http_status(driver) -> int:
     try:
-        driver.get(url)
-    except (TimeoutException, ReadTimeoutError, WebDriverException):
+        return int(driver.execute_script(
+            "const e = performance.getEntriesByType('navigation')[0]; return (e && e.responseStatus) || 0;"
+        ) or 0)
+    except Exception:
+        return 0
+
+def nav(driver, url: str, wait_for_css: Optional[str] = None, lean: Optional[bool] = None) -> bool:
+    t_nav, slept = time.monotonic(), 0.0
+    try:
+        PROFILER.begin_page(url)
+        if lean is None:
+            lean = bool(_DETAIL_PAGE_RE.search(urlparse(url).path))
+        set_resource_blocking(driver, BLOCK_PATTERNS if lean else ())
+        if RECORDER is not None:
+            RECORDER.capture(driver)  # late XHRs from the previous page
+        slept = RATE_LIMITER.wait(url)
+        t0 = time.monotonic()
+        ok = True
         try:
-            driver.execute_script("window.stop();")
-        except Exception:
-            pass
-    if wait_for_css:
-        return wait_css(driver, wait_for_css, timeout=10) is not None
-    return True
+            driver.get(url)
+        except (TimeoutException, ReadTimeoutError, WebDriverException):
+            ok = False
+            try:
+                driver.execute_script("window.stop();")
+            except Exception:
+                pass
+        if ok and _nav_http_status(driver) >= 400:
+            ok = False
+        found = True
+        if wait_for_css:
+            found = wait_css(driver, wait_for_css, timeout=10) is not None
+        RATE_LIMITER.record(url, time.monotonic() - t0, ok=ok and found)
+        if RECORDER is not None:
+            RECORDER.capture(driver)
+            RECORDER.snapshot(driver, url)
+        return found
+    finally:
+        # the politeness sleep is already reported as rate_limit_sleep
+        PROFILER.add("nav", time.monotonic() - t_nav - slept)
 
 def txt(el) -> str:
     if not el: return ""
@@ -441,13 +1477,22 @@ def _collect_support_card_anchors(driver) -> List[Any]:
     return filter_visible(driver, anchors)
 
 def _wait_support_cards(driver, timeout_s: float = 8.0) -> List[Any]:
-    end = time.time() + timeout_s
-    while time.time() < end:
+    t0 = time.monotonic()
+    anchors: List[Any] = []
+    present = wait_js(
+        driver,
+        "document.querySelector(\"img[src*='/images/umamusume/supports/'], a[href*='/umamusume/supports/']\")",
+        timeout_s, category=None,
+    )
+    while present:
         anchors = _collect_support_card_anchors(driver)
-        if anchors:
-            return anchors
+        if anchors or time.monotonic() - t0 >= timeout_s:
+            break
         time.sleep(0.2)
-    return []
+    # the old loop polled every 0.2s, so it overshot by up to one poll interval
+    elapsed = time.monotonic() - t0
+    WAIT_STATS.add("support_list", math.ceil(elapsed / 0.2) * 0.2 if anchors else timeout_s, elapsed)
+    return anchors
 
 
 def _click(driver, css) -> bool:
@@ -457,16 +1502,16 @@ def _click(driver, css) -> bool:
     except Exception: return False
 
 def accept_cookies(driver):
-    _click(driver, 'body > div#__next > div[class*=legal_cookie_banner_wrapper__] '
-                   '> div > div[class*=legal_cookie_banner_selection__] '
-                   '> div:last-child > button[class*=legal_cookie_banner_button__]')
-    time.sleep(0.2)
+    if _click(driver, 'body > div#__next > div[class*=legal_cookie_banner_wrapper__] '
+                      '> div > div[class*=legal_cookie_banner_selection__] '
+                      '> div:last-child > button[class*=legal_cookie_banner_button__]'):
+        wait_css_gone(driver, 'div[class*=legal_cookie_banner_wrapper__]', 0.2, "cookies")
 
 def open_settings(driver):
-    _click(driver, 'body > div#__next > div > div[class*=styles_page__] '
-                   '> header[id*=styles_page-header__] '
-                   '> div[class*=styles_header_settings__]')
-    time.sleep(0.15)
+    if _click(driver, 'body > div#__next > div > div[class*=styles_page__] '
+                      '> header[id*=styles_page-header__] '
+                      '> div[class*=styles_header_settings__]'):
+        wait_css_present(driver, 'div[data-tippy-root] label', 0.15, "settings")
 
 def _click_label_by_partial_text(driver, *candidates: str) -> bool:
     try: labels = driver.find_elements(By.CSS_SELECTOR, 'div[data-tippy-root] label')
@@ -479,7 +1524,136 @@ def _click_label_by_partial_text(driver, *candidates: str) -> bool:
                 except Exception: pass
     return False
 
+# ---------- Pre-seeded site settings ----------
+# Server/language/cookie-consent state the site keeps in localStorage + cookies. Captured
+# once after a real ensure_server, cached on disk, and injected into every new driver
+# before any page script runs, so workers and restarts skip the settings dance + reload.
+SITE_SERVER = "global"
+SETTINGS_CACHE_PATH = ".site_settings.json"
+CHROME_PROFILE_TEMPLATE: Optional[str] = None
+_SITE_SETTINGS: Dict[str, Dict[str, Any]] = {}
+_SITE_SETTINGS_LOCK = threading.Lock()
+
+# Only what ensure_server sets (server, language) and the cookie-consent answer are kept;
+# everything else in storage is session/tracking state that must not be replayed.
+_SETTING_STORAGE_KEYS = frozenset({"i18nextLng", "umamusume_server", "u-eh-server", "u-eh-region", "server"})
+_CONSENT_KEY_RE = re.compile(r"consent|cookie|gdpr", re.I)
+
+def _is_setting_key(name: str) -> bool:
+    return name in _SETTING_STORAGE_KEYS or bool(_CONSENT_KEY_RE.search(name or ""))
+
+def _settings_subset(items: Dict[str, Any], cookies: List[Dict[str, Any]]) -> Dict[str, Any]:
+    return {"localStorage": {k: v for k, v in (items or {}).items() if _is_setting_key(k)},
+            "cookies": [c for c in cookies or [] if _is_setting_key(c.get("name", ""))]}
+
+_PRESEED_JS = """
+(function () {
+  if (location.host !== %s) return;
+  const items = %s;
+  try { for (const k in items) localStorage.setItem(k, items[k]); } catch (e) {}
+})();
+"""
+
+def _copy_chrome_profile() -> str:
+    """Per-driver copy of --chrome-profile-dir (Chrome locks a user-data-dir to one process)."""
+    dest = tempfile.mkdtemp(prefix="gt-profile-")
+    shutil.copytree(CHROME_PROFILE_TEMPLATE, dest, dirs_exist_ok=True,
+                    ignore=shutil.ignore_patterns("Singleton*", "*.lock", "lockfile"))
+    return dest
+
+def _settings_key(server: str) -> str:
+    return f"{urlparse(BASE_URL).netloc}|{server}"
+
+def load_site_settings(path: str) -> None:
+    try:
+        data = json.loads(Path(path).read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError):
+        return
+    if isinstance(data, dict):
+        with _SITE_SETTINGS_LOCK:
+            _SITE_SETTINGS.update(data)
+
+def _capture_site_settings(driver, server: str) -> None:
+    try:
+        items = driver.execute_script("return Object.assign({}, window.localStorage);") or {}
+        cookies = driver.get_cookies() or []
+    except Exception:
+        return
+    entry = _settings_subset(items, cookies)
+    with _SITE_SETTINGS_LOCK:
+        changed = _SITE_SETTINGS.get(_settings_key(server)) != entry
+        _SITE_SETTINGS[_settings_key(server)] = entry
+        snapshot = dict(_SITE_SETTINGS)
+    if changed and SETTINGS_CACHE_PATH:
+        try:
+            _atomic_write(SETTINGS_CACHE_PATH, snapshot)
+        except Exception as e:
+            print(f"[settings] could not cache settings: {e}")
+
+def add_storage_script(driver, items: Dict[str, Any], slot: str) -> None:
+    """
+    Install (or replace) a new-document script that writes `items` into the site's
+    localStorage before any page script runs. One script per `slot`, so re-seeding
+    the same driver replaces instead of stacking. Raises if CDP is unavailable.
+    """
+    scripts = getattr(driver, "_storage_scripts", None)
+    if scripts is None:
+        scripts = driver._storage_scripts = {}
+    old_id = scripts.pop(slot, None)
+    if old_id:
+        driver.execute_cdp_cmd("Page.removeScriptToEvaluateOnNewDocument", {"identifier": old_id})
+    res = driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {
+        "source": _PRESEED_JS % (json.dumps(urlparse(BASE_URL).netloc), json.dumps(items))
+    })
+    scripts[slot] = (res or {}).get("identifier")
+
+def preseed_driver(driver, server: str) -> bool:
+    """Install captured settings on a fresh driver via CDP; True if it needs no ensure_server."""
+    with _SITE_SETTINGS_LOCK:
+        cfg = _SITE_SETTINGS.get(_settings_key(server))
+    if not cfg:
+        return False
+    cfg = _settings_subset(cfg.get("localStorage"), cfg.get("cookies"))  # older caches kept everything
+    try:
+        # every reset/ensure_server re-seeds the same driver; the slot keeps that from stacking
+        add_storage_script(driver, cfg.get("localStorage") or {}, "settings")
+        for c in cfg.get("cookies") or []:
+            params = {k: c[k] for k in ("name", "value", "domain", "path", "secure", "httpOnly") if k in c}
+            if "expiry" in c:
+                params["expires"] = c["expiry"]
+            if c.get("sameSite"):
+                params["sameSite"] = c["sameSite"]
+            driver.execute_cdp_cmd("Network.setCookie", params)
+    except Exception as e:
+        print(f"[settings] preseed failed, falling back to ensure_server: {e}")
+        return False
+    driver._preseeded_server = server
+    return True
+
+def _site_settings_applied(driver, server: str) -> bool:
+    """One round trip: does the current page run on `server`, in English, with no cookie banner?"""
+    try:
+        return bool(driver.execute_script("""
+            const want = arguments[0];
+            let stored = [];
+            try {
+              stored = ['umamusume_server', 'u-eh-server', 'u-eh-region', 'server']
+                .map(k => localStorage.getItem(k)).filter(v => v !== null);
+            } catch (e) { return false; }
+            const lang = (document.documentElement.lang || 'en').toLowerCase();
+            return stored.length > 0 && stored.every(v => v === want) && lang.startsWith('en')
+              && !document.querySelector('div[class*=legal_cookie_banner_wrapper__]');
+        """, "global" if server == "global" else "japan"))
+    except Exception:
+        return False
+
+@profiled("ensure_server")
 def ensure_server(driver, server: str = "global", keep_raw_en: bool = True):
+    if getattr(driver, "_preseeded_server", None) == server:
+        if _site_settings_applied(driver, server):
+            return
+        print(f"[settings] pre-seeded {server} settings not in effect on this page; setting them by hand")
+        driver._preseeded_server = None
     accept_cookies(driver); open_settings(driver)
     if server == "global":
         _click_label_by_partial_text(driver, "Global", "EN (Global)", "English (Global)")
@@ -499,20 +1673,35 @@ def ensure_server(driver, server: str = "global", keep_raw_en: bool = True):
     """, "global" if server == "global" else "japan")
     try: driver.find_element(By.TAG_NAME, "body").click()
     except Exception: pass
-    time.sleep(0.15); driver.refresh(); time.sleep(0.3)
+    wait_css_gone(driver, 'div[data-tippy-root]', 0.15, "server")
+    driver.refresh()
+    wait_js(driver, "document.readyState !== 'loading' && document.querySelector('#__next > *')", 0.3, "server")
+    _capture_site_settings(driver, server)
+    preseed_driver(driver, server)  # later reloads/retries on this driver keep the settings too
+
 
+TIPPY_CEILING_S = 0.05
 
 def tippy_show_and_get_popper(driver, ref_el):
+    t0 = time.monotonic()
     try:
-        popper = driver.execute_script("""
-            const el = arguments[0];
-            if (!el || !el._tippy) return null;
+        # show + wait for the popper to have content, in one round trip
+        popper = driver.execute_async_script("""
+            const el = arguments[0], ceilMs = arguments[1], done = arguments[arguments.length - 1];
+            if (!el || !el._tippy) { done(null); return; }
             const t = el._tippy;
             t.setProps({ trigger: 'manual', allowHTML: true, interactive: true, placement: 'bottom' });
             t.show();
-            return t.popper || null;
-        """, ref_el)
-        time.sleep(0.05)
+            const p = t.popper || null;
+            const ready = () => (p.textContent || '').trim().length > 0;
+            if (!p || ready()) { done(p); return; }
+            let finished = false, timer = null;
+            const obs = new MutationObserver(() => { if (ready()) finish(); });
+            const finish = () => { if (finished) return; finished = true; obs.disconnect(); clearTimeout(timer); done(p); };
+            obs.observe(p, {childList: true, subtree: true, characterData: true});
+            timer = setTimeout(finish, ceilMs);
+        """, ref_el, int(TIPPY_CEILING_S * 1000))
+        WAIT_STATS.add("tippy", TIPPY_CEILING_S, time.monotonic() - t0)
         return popper
     except Exception:
         return None
@@ -579,7 +1768,106 @@ def parse_hint_level_from_text(text: str) -> Optional[int]:
     if m: return int(m.group(1))
     return None
 
+HINT_SECTIONS = ("Support hints", "Skills from events")
+
+# One walk of document.body: caption elements open/close sections, skill icons inside an
+# open section become tiles. Tiles without a skill link hand back their tippy anchor so
+# only those few need a popper round trip. Returns null when no section caption exists.
+_HINTS_JS = r"""
+const labels = arguments[0].map(l => l.toLowerCase());
+const isCaption = (el) => {
+  for (const cls of el.classList) if (String(cls).startsWith('supports_infobox_caption__')) return true;
+  return false;
+};
+const visible = (el) => {
+  const r = el.getBoundingClientRect();
+  if (!(r.width > 0 && r.height > 0)) return false;
+  for (let n = el; n && n.nodeType === 1; n = n.parentElement) {
+    const cs = getComputedStyle(n);
+    if (cs.display === 'none' || cs.visibility === 'hidden' || parseFloat(cs.opacity) === 0) return false;
+  }
+  return true;
+};
+const skillId = (href) => {
+  const m = (href || '').split('?')[0].replace(/\/+$/, '').match(/\/umamusume\/skills\/([^/]+)$/);
+  return m ? m[1] : '';
+};
+const out = [], texts = {}, seen = new Set();
+let section = null, sawCaption = false;
+const tw = document.createTreeWalker(document.body, NodeFilter.SHOW_ELEMENT | NodeFilter.SHOW_TEXT);
+let n;
+while ((n = tw.nextNode())) {
+  if (n.nodeType === 3) {
+    if (section !== null) texts[section] += ' ' + n.nodeValue;
+    continue;
+  }
+  if (isCaption(n)) {
+    const t = (n.textContent || '').trim().toLowerCase();
+    const i = labels.findIndex(l => t.includes(l));
+    section = i >= 0 ? arguments[0][i] : null;
+    if (section !== null) { sawCaption = true; texts[section] = texts[section] || ''; }
+    continue;
+  }
+  if (section === null || n.tagName !== 'IMG' || !(n.src || '').includes('/images/umamusume/skill_icons/utx_ico_skill_')) continue;
+  if (!visible(n)) continue;
+  let tile = n;
+  for (let k = 0; k < 6 && tile && !tile.querySelector('b'); k++) tile = tile.parentElement;
+  const b = tile && tile.querySelector('b');
+  const name = b ? (b.innerText || '').trim() : '';
+  if (!name || seen.has(name)) continue;
+  seen.add(name);
+  let sid = '';
+  for (const a of tile.querySelectorAll('a[href*="/umamusume/skills/"]')) { sid = skillId(a.href); if (sid) break; }
+  let anchor = null;
+  if (!sid) {
+    const it = document.createNodeIterator(tile, NodeFilter.SHOW_ELEMENT);
+    let e;
+    while ((e = it.nextNode())) if (e._tippy) { anchor = e; break; }
+  }
+  out.push({name, sid, section, anchor});
+}
+return sawCaption ? {tiles: out, texts} : null;
+"""
+
+@profiled("support_hints")
 def parse_support_hints_on_page(d) -> List[Dict[str, Any]]:
+    """
+    Single-pass hint extraction: one script returns every tile after a 'Support hints' or
+    'Skills from events' caption. Falls back to the per-element legacy walk if the
+    captions are not found (layout change) or the script fails.
+    """
+    try:
+        res = d.execute_script(_HINTS_JS, list(HINT_SECTIONS))
+    except Exception:
+        res = None
+    if not res:
+        return parse_support_hints_on_page_legacy(d)
+
+    levels = {sec: parse_hint_level_from_text(t) for sec, t in (res.get("texts") or {}).items()}
+    hints: List[Dict[str, Any]] = []
+    for t in res.get("tiles") or []:
+        sid = t.get("sid") or ""
+        anchor = t.get("anchor")
+        if not sid and anchor is not None and HINT_TIPPY:
+            pop = tippy_show_and_get_popper(d, anchor)
+            try:
+                if pop:
+                    for l in pop.find_elements(By.CSS_SELECTOR, 'a[href*="/umamusume/skills/"]'):
+                        sid = _skill_id_from_href(l.get_attribute("href") or "")
+                        if sid:
+                            break
+            finally:
+                tippy_hide(d, anchor)
+        hints.append({
+            "SkillId": sid,
+            "Name": t["name"],
+            "HintLevel": levels.get(t["section"]),
+            "Section": t["section"],
+        })
+    return hints
+
+
+def parse_support_hints_on_page_legacy(d) -> List[Dict[str, Any]]:
     """
     Collect tiles that appear after the 'Support hints' or 'Skills from events' captions
     and before the very next caption block (class startswith 'supports_infobox_caption__'),
@@ -589,18 +1877,18 @@ def parse_support_hints_on_page(d) -> List[Dict[str, Any]]:
     seen_names = set()
 
     # Find visible "Support hints" and "Skills from events" captions
-    captions: List[Any] = []
-    for label in ("support hints", "skills from events"):
+    captions: List[Tuple[str, Any]] = []
+    for section in HINT_SECTIONS:
         found = d.find_elements(
             By.XPATH,
             "//*[contains(translate(normalize-space(.),'ABCDEFGHIJKLMNOPQRSTUVWXYZ','abcdefghijklmnopqrstuvwxyz'),"
-            f"'{label}')]"
+            f"'{section.lower()}')]"
         )
-        captions.extend([c for c in found if is_visible(d, c)])
+        captions.extend([(section, c) for c in found if is_visible(d, c)])
     if not captions:
         return hints
 
-    for cap in captions:
+    for section, cap in captions:
         # JS: walk the DOM forward from this caption; collect skill-icon <img>s
         # until the next caption (class startswith supports_infobox_caption__).
         imgs = d.execute_script("""
@@ -696,7 +1984,7 @@ def parse_support_hints_on_page(d) -> List[Dict[str, Any]]:
                 pass
 
             # Fallback: open tooltip on the tile (if any) and look for a link there
-            if not sid:
+            if not sid and HINT_TIPPY:
                 tippy_anchor = _first_tippy_anchor_under(d, tile)
                 pop = None
                 if tippy_anchor is not None:
@@ -714,13 +2002,33 @@ def parse_support_hints_on_page(d) -> List[Dict[str, Any]]:
             hints.append({
                 "SkillId": sid,            # stays "" if no link is exposed
                 "Name": name,
-                "HintLevel": block_hint_lv # None when not shown
+                "HintLevel": block_hint_lv, # None when not shown
+                "Section": section,
             })
             seen_names.add(name)
 
     return hints
 
 
+@profiled("events")
+def extract_elist_events(d) -> List[Tuple[str, Dict[str, str]]]:
+    """(event name, {option: rewards}) for every visible event-list item, via its tippy."""
+    out: List[Tuple[str, Dict[str, str]]] = []
+    for elist in safe_find_all(d, By.CSS_SELECTOR, 'div[class*=eventhelper_elist]'):
+        if not is_visible(d, elist): continue
+        for it in elist.find_elements(By.CSS_SELECTOR, 'div[class*=compatibility_viewer_item]'):
+            if not is_visible(d, it): continue
+            event_name = txt(it)
+            if not event_name: continue
+            pop = tippy_show_and_get_popper(d, it)
+            try:
+                for kv in parse_event_from_tippy_popper(pop):
+                    out.append((event_name, kv))
+            finally:
+                tippy_hide(d, it)
+    return out
+
+
 def make_support_card(event_name: str, opts: Dict[str, str]) -> Dict[str, Any]:
     return {"EventName": event_name, "EventOptions": opts}
 
@@ -750,6 +2058,7 @@ def with_retries(func, *args, **kwargs):
             return func(*args, **kwargs)
         except (TimeoutException, WebDriverException, StaleElementReferenceException, ReadTimeoutError) as e:
             last_exc = e
+            PROFILER.count_retry()
             time.sleep(0.6 + attempt * 0.4)
             continue
     if last_exc:
@@ -757,10 +2066,157 @@ def with_retries(func, *args, **kwargs):
     return None
 
 
-def scrape_characters(save_path: str, server: str, headless: bool = True):
+# ---------- Tiered failure recovery ----------
+RECOVERABLE = (TimeoutException, WebDriverException, StaleElementReferenceException, ReadTimeoutError)
+_DEAD_SESSION_RE = re.compile(r"invalid session id|no such window|session deleted|chrome not reachable|"
+                              r"disconnected|target window already closed|tab crashed", re.I)
+
+class RecoveryPolicy:
+    """
+    Escalating recovery for per-page scrape failures, cheapest first:
+      requery -> re-run the parse on the loaded page (stale / missing element)
+      reload  -> reload the page (timeouts, half-rendered DOM)
+      reset   -> blank tab, cleared cookies/cache, settings re-seeded
+      respawn -> quit Chrome and start a fresh one (dead session)
+    A failure starts at the tier its type calls for and each further failure on the same
+    page moves at least one tier up. Pages that exhaust every tier count toward a circuit
+    breaker shared by the category's workers: after `threshold` consecutive failures it opens
+    for a growing cooldown, and after `max_trips` openings the category stops.
+    """
+    TIERS = ("requery", "reload", "reset", "respawn")
+    BACKOFF_S = (0.0, 0.2, 0.5, 1.0)
+
+    def __init__(self, name: str, headless: bool, prepare, threshold: int = 5,
+                 cooldown_s: float = 30.0, max_trips: int = 3):
+        self.name = name
+        self.headless = headless
+        self.prepare = prepare          # prepare(driver): list page + ensure_server on a fresh session
+        self.threshold = threshold
+        self.cooldown_s = cooldown_s
+        self.max_trips = max_trips
+        self._lock = threading.Lock()
+        self.attempts = [0] * len(self.TIERS)
+        self.recovered = [0] * len(self.TIERS)
+        self.pages_failed = 0
+        self._consecutive = 0
+        self._trips = 0
+        self._open_until = 0.0
+        RECOVERY_POLICIES.append(self)
+
+    def classify(self, exc: BaseException) -> int:
+        if isinstance(exc, (StaleElementReferenceException, NoSuchElementException)):
+            return 0
+        if isinstance(exc, (TimeoutException, ReadTimeoutError)):
+            return 1
+        if isinstance(exc, WebDriverException) and _DEAD_SESSION_RE.search(str(exc) or ""):
+            return 3
+        return 1
+
+    def next_tier(self, exc: BaseException, last_tier: Optional[int]) -> Optional[int]:
+        """Tier to try after `exc`, or None once every tier has been spent on this page."""
+        tier = self.classify(exc)
+        if last_tier is not None:
+            tier = max(tier, last_tier + 1)
+        return tier if tier < len(self.TIERS) else None
+
+    def recover(self, d, tier: int, url: str):
+        """Apply `tier` (escalating if the step itself fails); returns (driver, needs_nav)."""
+        while True:
+            with self._lock:
+                self.attempts[tier] += 1
+            PROFILER.count_retry()
+            time.sleep(self.BACKOFF_S[tier])
+            try:
+                if tier == 0:
+                    return d, False
+                if tier == 1:
+                    if not nav(d, url, "body"):
+                        raise TimeoutException("reload: no body")
+                    return d, False
+                if tier == 2:
+                    self._reset_session(d)
+                    return d, True
+                try: d.quit()
+                except Exception: pass
+                d = new_driver(headless=self.headless)
+                try:
+                    self.prepare(d)
+                except BaseException:
+                    d.quit()  # don't hold a browser slot for a session we can't use
+                    raise
+                return d, True
+            except RECOVERABLE:
+                if tier == len(self.TIERS) - 1:
+                    raise
+                tier += 1
+
+    def _reset_session(self, d) -> None:
+        handles = d.window_handles
+        for h in handles[1:]:
+            d.switch_to.window(h)
+            d.close()
+        d.switch_to.window(handles[0])
+        d.get("about:blank")
+        # about:blank has no site cookies or storage to delete; clear them browser-side instead
+        origin = f"{urlparse(BASE_URL).scheme}://{urlparse(BASE_URL).netloc}"
+        for cmd, params in (("Network.clearBrowserCookies", {}), ("Network.clearBrowserCache", {}),
+                            ("Storage.clearDataForOrigin", {"origin": origin, "storageTypes": "all"})):
+            try: d.execute_cdp_cmd(cmd, params)
+            except Exception: pass
+        if not preseed_driver(d, SITE_SERVER):
+            d._preseeded_server = None
+        self.prepare(d)
+
+    def page_done(self, last_tier: Optional[int]) -> None:
+        with self._lock:
+            if last_tier is not None:
+                self.recovered[last_tier] += 1
+            self._consecutive = 0
+
+    def page_failed(self) -> None:
+        with self._lock:
+            self.pages_failed += 1
+            self._consecutive += 1
+            if self._consecutive < self.threshold:
+                return
+            self._consecutive = 0
+            self._trips += 1
+            pause = self.cooldown_s * (2 ** (self._trips - 1))
+            self._open_until = time.monotonic() + pause
+            print(f"[recovery] {self.name}: {self.threshold} pages failed in a row; "
+                  f"circuit open for {pause:.0f}s (trip {self._trips}/{self.max_trips})")
+
+    def allow(self) -> bool:
+        """Gate before each page: waits out an open circuit; False once it has tripped too often."""
+        with self._lock:
+            if self._trips >= self.max_trips:
+                return False
+            wait = self._open_until - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+        return True
+
+    def report(self) -> str:
+        with self._lock:
+            tiers = "  ".join(f"{t} {r}/{a}" for t, a, r in zip(self.TIERS, self.attempts, self.recovered))
+            return (f"[recovery] {self.name}: {tiers} (recovered/attempted)  "
+                    f"failed pages {self.pages_failed}, circuit trips {self._trips}")
+
+
+RECOVERY_POLICIES: List[RecoveryPolicy] = []
+
+def _prepare_list_session(d, list_url: str, server: str) -> None:
+    """A fresh session only needs the list page when it still has to run the settings dance."""
+    if getattr(d, "_preseeded_server", None) == server:
+        return
+    with_retries(nav, d, list_url, "main main")
+    ensure_server(d, server=server, keep_raw_en=True)
+
+
+def scrape_characters(save_path: str, server: str, headless: bool = True, state: Optional[ScrapeState] = None):
     d = new_driver(headless=headless)
     try:
-        with_retries(nav, d, "https://gametora.com/umamusume/characters", "main main")
+        with_retries(nav, d, site_url("/umamusume/characters"), "main main")
         ensure_server(d, server=server, keep_raw_en=True)
 
         anchors = filter_visible(d, safe_find_all(d, By.CSS_SELECTOR, "main main div:last-child a[href*='/umamusume/characters/']"))
@@ -775,15 +2231,30 @@ def scrape_characters(save_path: str, server: str, headless: bool = True):
 
         urls = list(reversed(urls))
         total = len(urls)
+        list_url = site_url("/umamusume/characters")
+        policy = RecoveryPolicy("characters", headless, lambda drv: _prepare_list_session(drv, list_url, server))
         for i, url in enumerate(urls, 1):
-            for attempt in range(RETRIES + 1):
+            if state and state.recently_done(save_path, url):
+                print(f"[{i}/{total}] UMA skip (recent) {url}")
+                continue
+            if not policy.allow():
+                print(f"[recovery] characters: circuit breaker tripped; stopping at {i}/{total}")
+                break
+            tier: Optional[int] = None
+            needs_nav = True
+            while True:
                 try:
-                    ok = with_retries(nav, d, url, "body")
+                    if needs_nav and not nav(d, url, "body"):
+                        raise TimeoutException("no body")
                     slug, uma_id = _slug_and_id_from_url(url)
-                    if not ok: raise TimeoutException("no body")
 
                     # --- Core identity ---
                     wait_css(d, 'div[class*=characters_infobox_character_name] > a', 8)
+                    fingerprint = section_fingerprint(d, "main")
+                    if state and state.unchanged(save_path, url, fingerprint):
+                        print(f"[{i}/{total}] UMA skip (unchanged) {url}")
+                        policy.page_done(tier)
+                        break
                     name_el = safe_find(d, By.CSS_SELECTOR, 'div[class*=characters_infobox_character_name] > a')
                     name = (txt(name_el) or "").replace("\n","")
                     if not name:
@@ -848,19 +2319,9 @@ def scrape_characters(save_path: str, server: str, headless: bool = True):
                         })
 
                     # --- Events ---
-                    events: List[Dict[str, Any]] = []
-                    for elist in safe_find_all(d, By.CSS_SELECTOR, 'div[class*=eventhelper_elist]'):
-                        if not is_visible(d, elist): continue
-                        for it in elist.find_elements(By.CSS_SELECTOR, 'div[class*=compatibility_viewer_item]'):
-                            if not is_visible(d, it): continue
-                            event_name = txt(it)
-                            if not event_name: continue
-                            pop = tippy_show_and_get_popper(d, it)
-                            try:
-                                for kv in parse_event_from_tippy_popper(pop):
-                                    events.append({"EventName": event_name, "EventOptions": kv})
-                            finally:
-                                tippy_hide(d, it)
+                    events: List[Dict[str, Any]] = [
+                        {"EventName": event_name, "EventOptions": kv} for event_name, kv in extract_elist_events(d)
+                    ]
 
                     # --- Upsert record ---
                     upsert_json_item(save_path, "UmaKey", uma_key, {
@@ -878,23 +2339,26 @@ def scrape_characters(save_path: str, server: str, headless: bool = True):
                         "UmaObjectives": objectives,
                         "UmaEvents": events
                     })
+                    if state: state.mark(save_path, url, fingerprint, [(save_path, ("UmaKey",), [{"UmaKey": uma_key}])])
 
                     print(f"[{i}/{total}] UMA ✓ {name} ({nickname or slug or 'default'})  "
                         f"(★{base_stars} | base:{'/'.join(base_stats.keys()) or '-'} "
                         f"| bonuses:{len(stat_bonuses)} | apt:{len(aptitudes)} "
                         f"| {len(objectives)} objectives, {len(events)} events)")
+                    policy.page_done(tier)
                     break
 
-                except (TimeoutException, WebDriverException, StaleElementReferenceException, ReadTimeoutError) as e:
-                    if attempt < RETRIES:
-                        try: d.quit()
-                        except Exception: pass
-                        d = new_driver(headless=headless)
-                        with_retries(nav, d, "https://gametora.com/umamusume/characters", "main main")
-                        ensure_server(d, server=server, keep_raw_en=True)
-                        continue
-                    else:
+                except RECOVERABLE as e:
+                    tier = policy.next_tier(e, tier)
+                    if tier is None:
                         print(f"[{i}/{total}] UMA ERROR {url}: {e}")
+                        policy.page_failed()
+                        break
+                    try:
+                        d, needs_nav = policy.recover(d, tier, url)
+                    except RECOVERABLE as e2:
+                        print(f"[{i}/{total}] UMA ERROR {url}: recovery failed: {e2}")
+                        policy.page_failed()
                         break
     finally:
         try: d.quit()
@@ -903,7 +2367,7 @@ def scrape_characters(save_path: str, server: str, headless: bool = True):
 
 def scrape_supports(out_events_path: str, out_hints_path: str, server: str, headless: bool = True,
                     thumbs_dir: str = "assets/support_thumbs", workers: int = 2,
-                    min_interval: float = 0.9, jitter: float = 0.25):
+                    state: Optional[ScrapeState] = None):
     return scrape_supports_threaded(
         out_events_path,
         out_hints_path,
@@ -911,12 +2375,11 @@ def scrape_supports(out_events_path: str, out_hints_path: str, server: str, head
         headless=headless,
         thumbs_dir=thumbs_dir,
         workers=workers,
-        min_interval=min_interval,
-        jitter=jitter
+        state=state
     )
     d = new_driver(headless=headless)
     try:
-        with_retries(nav, d, "https://gametora.com/umamusume/supports", "main main")
+        with_retries(nav, d, site_url("/umamusume/supports"), "main main")
         ensure_server(d, server=server, keep_raw_en=True)
 
         # NEW: collect preview thumbnails by slug/id once
@@ -1014,7 +2477,7 @@ def scrape_supports(out_events_path: str, out_hints_path: str, server: str, head
                         try: d.quit()
                         except Exception: pass
                         d = new_driver(headless=headless)
-                        with_retries(nav, d, "https://gametora.com/umamusume/supports", "main main")
+                        with_retries(nav, d, site_url("/umamusume/supports"), "main main")
                         ensure_server(d, server=server, keep_raw_en=True)
                         # rebuild previews after driver restart
                         previews = collect_support_previews(d, thumbs_dir)
@@ -1027,8 +2490,142 @@ def scrape_supports(out_events_path: str, out_hints_path: str, server: str, head
         except Exception: pass
 
 
+# ---------- Post-scrape SkillId resolution ----------
+# Hint tiles rarely expose a skills link; SkillId is filled afterwards from skills_all.json
+# by name, so the per-tile tippy round trip is off unless --hint-tippy asks for it.
+HINT_TIPPY = True
+SKILL_MATCH_MIN_SCORE = 90.0
+_SKILL_MARKS = {"◯": "○", "〇": "○", "⭕": "○"}
+
+def _skill_name_key(name: str) -> str:
+    s = unicodedata.normalize("NFKC", str(name or ""))
+    for a, b in _SKILL_MARKS.items():
+        s = s.replace(a, b)
+    s = s.replace("’", "'").replace("‘", "'")
+    return re.sub(r"\s+", " ", s).strip().lower()
+
+def _skill_mark(key: str) -> str:
+    return key[-1] if key and key[-1] in "○◎×" else ""
+
+def build_skill_name_index(skills_path: str) -> Dict[str, str]:
+    """Normalized name -> skill id. name_en wins over enname; on duplicate names the lowest
+    regular id wins (9xxxxx inherited copies and 1000xxx event variants sort last)."""
+    rows = _read_json_list(skills_path)
+    rank = lambda sid: (str(sid).startswith(("9", "1000")), int(sid) if str(sid).isdigit() else 0)
+    index: Dict[str, str] = {}
+    for field in ("enname", "name_en"):
+        by_name: Dict[str, str] = {}
+        for r in rows:
+            name, sid = r.get(field), r.get("id")
+            if not name or sid is None:
+                continue
+            key = _skill_name_key(name)
+            if key not in by_name or rank(sid) < rank(by_name[key]):
+                by_name[key] = str(sid)
+        index.update(by_name)
+    return index
+
+def resolve_hint_skill_ids(hints_path: str, skills_path: str,
+                           min_score: float = SKILL_MATCH_MIN_SCORE) -> Dict[str, int]:
+    """Fill every empty SupportHints[].SkillId in one pass: exact normalized name first,
+    then one rapidfuzz cdist over the leftovers (same ○/◎ mark required)."""
+    if not os.path.exists(skills_path):
+        print(f"[skills] {skills_path} missing; SkillId resolution skipped")
+        return {}
+    index = build_skill_name_index(skills_path)
+    stats = {"empty": 0, "exact": 0, "fuzzy": 0, "unresolved": 0}
+    with JSON_LOCK:
+        cards = _read_json_list(hints_path)
+        pending: Dict[str, List[Dict[str, Any]]] = {}
+        for card in cards:
+            for h in card.get("SupportHints") or []:
+                if h.get("SkillId") or not h.get("Name"):
+                    continue
+                stats["empty"] += 1
+                key = _skill_name_key(h["Name"])
+                if key in index:
+                    h["SkillId"] = index[key]
+                    stats["exact"] += 1
+                else:
+                    pending.setdefault(key, []).append(h)
+
+        if pending:
+            try:
+                from rapidfuzz import fuzz, process
+            except ImportError:
+                process = None
+                print("[skills] rapidfuzz not installed; fuzzy SkillId fallback skipped")
+            if process is not None:
+                queries, choices = list(pending), list(index)
+                scores = process.cdist(queries, choices, scorer=fuzz.ratio, score_cutoff=min_score, workers=-1)
+                for qi, q in enumerate(queries):
+                    best, best_score = None, 0.0
+                    for ci in scores[qi].nonzero()[0]:
+                        if scores[qi][ci] > best_score and _skill_mark(choices[ci]) == _skill_mark(q):
+                            best, best_score = choices[ci], float(scores[qi][ci])
+                    if best is None:
+                        continue
+                    for h in pending.pop(q):
+                        h["SkillId"] = index[best]
+                        stats["fuzzy"] += 1
+            stats["unresolved"] = sum(len(v) for v in pending.values())
+            for q in list(pending)[:10]:
+                print(f"[skills] unresolved hint name: {pending[q][0]['Name']!r}")
+
+        if stats["exact"] or stats["fuzzy"]:
+            _atomic_write(hints_path, cards)
+    print(f"[skills] SkillId: {stats['empty']} empty -> {stats['exact']} exact, "
+          f"{stats['fuzzy']} fuzzy (>= {min_score:g}), {stats['unresolved']} unresolved")
+    return stats
+
+
+class HintsVerifier:
+    """--verify-hints: run both hint extractors per card, diff them and time the speedup."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.cards = 0
+        self.mismatches = 0
+        self.fast_s = 0.0
+        self.legacy_s = 0.0
+
+    @staticmethod
+    def _key(h: Dict[str, Any]) -> Tuple[str, str, Any]:
+        return (h.get("Name", ""), h.get("SkillId", ""), h.get("HintLevel"))
+
+    def check(self, d, label: str) -> List[Dict[str, Any]]:
+        t0 = time.monotonic()
+        fast = parse_support_hints_on_page(d)
+        t1 = time.monotonic()
+        legacy = parse_support_hints_on_page_legacy(d)
+        t2 = time.monotonic()
+        fast_s, legacy_s = t1 - t0, t2 - t1
+        same = sorted(map(self._key, fast)) == sorted(map(self._key, legacy))
+        with self._lock:
+            self.cards += 1
+            self.mismatches += 0 if same else 1
+            self.fast_s += fast_s
+            self.legacy_s += legacy_s
+        print(f"[hints] {label}: fast {fast_s * 1000:.0f}ms legacy {legacy_s * 1000:.0f}ms "
+              f"({legacy_s / max(fast_s, 1e-6):.1f}x) {'match' if same else 'MISMATCH'}")
+        if not same:
+            print(f"    fast only:   {sorted(set(map(self._key, fast)) - set(map(self._key, legacy)))}")
+            print(f"    legacy only: {sorted(set(map(self._key, legacy)) - set(map(self._key, fast)))}")
+        return fast
+
+    def report(self) -> str:
+        with self._lock:
+            if not self.cards:
+                return ""
+            return (f"[hints] {self.cards} cards, {self.mismatches} mismatches; fast {self.fast_s:.1f}s "
+                    f"vs legacy {self.legacy_s:.1f}s ({self.legacy_s / max(self.fast_s, 1e-6):.1f}x)")
+
+
+HINTS_VERIFIER: Optional[HintsVerifier] = None
+
+
 def _scrape_support_detail(d, url: str, previews: dict, thumbs_dir: str,
-                           out_events_path: str, out_hints_path: str) -> tuple[str, str, Optional[str], int, int]:
+                           out_events_path: str, out_hints_path: str
+                           ) -> tuple[str, str, Optional[str], int, int, ScrapeRecords]:
     slug, sup_id = _slug_and_id_from_url(url)
 
     name_el = safe_find(d, By.CSS_SELECTOR, 'h1, div[class*=supports_infobox_] [class*="name"], [class*="support_name"]')
@@ -1037,9 +2634,7 @@ def _scrape_support_detail(d, url: str, previews: dict, thumbs_dir: str,
     m = re.search(r"\((SSR|SR|R)\)", sname, flags=re.I)
     rarity = m.group(1).upper() if m else "UNKNOWN"
 
-    added = 0
-
-    hints = parse_support_hints_on_page(d)
+    hints = HINTS_VERIFIER.check(d, slug or sname) if HINTS_VERIFIER else parse_support_hints_on_page(d)
 
     img_url = ""
     if slug in previews:
@@ -1051,27 +2646,8 @@ def _scrape_support_detail(d, url: str, previews: dict, thumbs_dir: str,
         src = _abs_url(d, big.get_attribute("src") or "") if big else ""
         img_url = _save_thumb(src, thumbs_dir, slug, sup_id)
 
-    for elist in safe_find_all(d, By.CSS_SELECTOR, 'div[class*=eventhelper_elist]'):
-        if not is_visible(d, elist):
-            continue
-        for it in elist.find_elements(By.CSS_SELECTOR, 'div[class*=compatibility_viewer_item]'):
-            if not is_visible(d, it):
-                continue
-            ev_name = txt(it)
-            if not ev_name:
-                continue
-            pop = tippy_show_and_get_popper(d, it)
-            try:
-                rows = parse_event_from_tippy_popper(pop)
-                for kv in rows:
-                    if append_json_item(
-                        out_events_path,
-                        make_support_card(ev_name, kv),
-                        dedup_key=("EventName", "EventOptions")
-                    ):
-                        added += 1
-            finally:
-                tippy_hide(d, it)
+    events = [make_support_card(ev_name, kv) for ev_name, kv in extract_elist_events(d)]
+    added = extend_json_items(out_events_path, events, dedup_key=("EventName", "EventOptions"))
 
     upsert_json_item(out_hints_path, "SupportSlug", slug or sname, {
         "SupportSlug": slug or sname,
@@ -1082,15 +2658,19 @@ def _scrape_support_detail(d, url: str, previews: dict, thumbs_dir: str,
         "SupportHints": hints,
     })
 
-    return sname, slug, sup_id, added, len(hints)
+    records = [
+        (out_hints_path, ("SupportSlug",), [{"SupportSlug": slug or sname}]),
+        (out_events_path, ("EventName", "EventOptions"), events),
+    ]
+    return sname, slug, sup_id, added, len(hints), records
 
 
 def scrape_supports_threaded(out_events_path: str, out_hints_path: str, server: str, headless: bool = True,
                              thumbs_dir: str = "assets/support_thumbs", workers: int = 2,
-                             min_interval: float = 0.9, jitter: float = 0.25) -> None:
+                             state: Optional[ScrapeState] = None) -> None:
     d = new_driver(headless=headless)
     try:
-        with_retries(nav, d, "https://gametora.com/umamusume/supports", "main main")
+        with_retries(nav, d, site_url("/umamusume/supports"), "main main")
         ensure_server(d, server=server, keep_raw_en=True)
 
         # collect preview thumbnails by slug/id once
@@ -1121,45 +2701,58 @@ def scrape_supports_threaded(out_events_path: str, out_hints_path: str, server:
         except Exception: pass
 
     worker_count = max(1, min(int(workers), total))
-    rate_limiter = RateLimiter(min_interval_s=min_interval, jitter_s=jitter)
     q = queue.Queue()
     for i, url in enumerate(urls, 1):
         q.put((i, url))
+    list_url = site_url("/umamusume/supports")
+    policy = RecoveryPolicy("supports", headless, lambda drv: _prepare_list_session(drv, list_url, server))
 
     def worker_loop(worker_id: int) -> None:
         d_local = new_driver(headless=headless)
         try:
-            with_retries(nav, d_local, "https://gametora.com/umamusume/supports", "main main")
-            ensure_server(d_local, server=server, keep_raw_en=True)
+            _prepare_list_session(d_local, list_url, server)
             while True:
                 try:
                     idx, url = q.get_nowait()
                 except queue.Empty:
                     return
                 try:
-                    for attempt in range(RETRIES + 1):
+                    if state and state.recently_done(out_hints_path, url):
+                        print(f"[{idx}/{total}] SUPPORT skip (recent) {url}")
+                        continue
+                    if not policy.allow():
+                        print(f"[{idx}/{total}] SUPPORT skip (circuit breaker tripped) {url}")
+                        continue
+                    tier: Optional[int] = None
+                    needs_nav = True
+                    while True:
                         try:
-                            rate_limiter.wait()
-                            ok = with_retries(nav, d_local, url, "body")
-                            if not ok:
+                            if needs_nav and not nav(d_local, url, "body"):
                                 raise TimeoutException("no body")
-                            sname, slug, sup_id, added, hint_count = _scrape_support_detail(
+                            fingerprint = section_fingerprint(d_local, "main")
+                            if state and state.unchanged(out_hints_path, url, fingerprint):
+                                print(f"[{idx}/{total}] SUPPORT skip (unchanged) {url}")
+                                policy.page_done(tier)
+                                break
+                            sname, slug, sup_id, added, hint_count, records = _scrape_support_detail(
                                 d_local, url, previews, thumbs_dir, out_events_path, out_hints_path
                             )
+                            if state: state.mark(out_hints_path, url, fingerprint, records)
                             print(f"[{idx}/{total}] SUPPORT {sname} (slug:{slug or '-'} id:{sup_id or '-'} "
                                   f"+{added} events, {hint_count} hints)")
+                            policy.page_done(tier)
                             break
-                        except (TimeoutException, WebDriverException, StaleElementReferenceException, ReadTimeoutError) as e:
-                            if attempt < RETRIES:
-                                try: d_local.quit()
-                                except Exception: pass
-                                d_local = new_driver(headless=headless)
-                                with_retries(nav, d_local, "https://gametora.com/umamusume/supports", "main main")
-                                ensure_server(d_local, server=server, keep_raw_en=True)
-                                time.sleep(0.5 * (2 ** attempt))
-                                continue
-                            else:
+                        except RECOVERABLE as e:
+                            tier = policy.next_tier(e, tier)
+                            if tier is None:
                                 print(f"[{idx}/{total}] SUPPORT ERROR {url}: {e}")
+                                policy.page_failed()
+                                break
+                            try:
+                                d_local, needs_nav = policy.recover(d_local, tier, url)
+                            except RECOVERABLE as e2:
+                                print(f"[{idx}/{total}] SUPPORT ERROR {url}: recovery failed: {e2}")
+                                policy.page_failed()
                                 break
                 finally:
                     q.task_done()
@@ -1178,52 +2771,174 @@ def scrape_supports_threaded(out_events_path: str, out_hints_path: str, server:
         t.join()
 
 
-def scrape_career(save_path: str, server: str, headless: bool = True):
-    d = new_driver(headless=headless)
+CAREER_PATH = "/umamusume/training-event-helper"
+CAREER_DECK = '["Deck 1",106101,1,30024,30024,30009,30024,30009,30008]'
+
+def _open_career_page(d, server: str) -> None:
+    # the deck is seeded like the site settings, before the first document runs, so the
+    # first load already shows it; only without CDP does it cost a reload
     try:
-        with_retries(nav, d, "https://gametora.com/umamusume/training-event-helper", "body")
-        # Pre-set deck
-        d.execute_script('localStorage.setItem("u-eh-d1","[\\"Deck 1\\",106101,1,30024,30024,30009,30024,30009,30008]")')
+        add_storage_script(d, {"u-eh-d1": CAREER_DECK}, "career_deck")
+        seeded = True
+    except Exception as e:
+        print(f"[career] could not pre-seed the deck ({e}); setting it and reloading")
+        seeded = False
+    with_retries(nav, d, site_url(CAREER_PATH), "body")
+    if not seeded:
+        d.execute_script('localStorage.setItem("u-eh-d1", arguments[0])', CAREER_DECK)
         d.refresh()
-        ensure_server(d, server=server, keep_raw_en=True)
+    ensure_server(d, server=server, keep_raw_en=True)
+
+_CAREER_ITEMS_CSS = 'div[class*=eventhelper_elist] > div[class*=compatibility_viewer_item]'
+_CAREER_ITEMS_TEXT_JS = (f"Array.from(document.querySelectorAll({json.dumps(_CAREER_ITEMS_CSS)}))"
+                         ".map(e => e.textContent).join('|')")
+
+def _count_career_scenarios(d) -> int:
+    _click(d, "#boxScenario")
+    wait_css_present(d, 'div[class*=tooltips_tooltip_striped] > div', DELAY, "career")
+    return len(safe_find_all(d, By.CSS_SELECTOR, 'div[class*=tooltips_tooltip_striped] > div'))
+
+def _select_career_scenario(d, idx: int) -> bool:
+    """Pick scenario #idx (0-based) from the #boxScenario dropdown and open its event list."""
+    _click(d, "#boxScenario")
+    wait_css_present(d, f'div[class*=tooltips_tooltip_striped] > div:nth-of-type({idx + 1})', DELAY, "career")
+    entry = safe_find(d, By.CSS_SELECTOR, f'div[class*=tooltips_tooltip_striped] > div:nth-of-type({idx + 1})')
+    if not entry or not is_visible(d, entry): return False
+    try: entry.click()
+    except Exception: pass
+    btn_css = f'[id="{idx + 1}"][class*="filters_viewer_image_"]'
+    wait_css_present(d, btn_css, DELAY, "career")
+
+    btn = safe_find(d, By.CSS_SELECTOR, btn_css)
+    if not btn: return False
+    try: before = d.execute_script(f"return {_CAREER_ITEMS_TEXT_JS};") or ""
+    except Exception: before = ""
+    try: btn.click()
+    except Exception: pass
+    # done once the event list has (re)rendered with different content
+    wait_js(d, f"(() => {{ const now = {_CAREER_ITEMS_TEXT_JS}; return now && now !== arg; }})()",
+            DELAY, "career", arg=before)
+    return True
+
+def _career_rows_on_page(d) -> List[Dict[str, Any]]:
+    return [make_career(name, kv) for name, kv in extract_elist_events(d)]
+
+
+def _career_key(idx: int) -> str:
+    return f"{site_url(CAREER_PATH)}#scenario-{idx + 1}"
 
-        _click(d, "#boxScenario"); time.sleep(DELAY)
-        scenario_entries = safe_find_all(d, By.CSS_SELECTOR, 'div[class*=tooltips_tooltip_striped] > div')
-        total = len(scenario_entries)
+_CAREER_LIST_CSS = "div[class*=eventhelper_elist]"
+
+
+def scrape_career(save_path: str, server: str, headless: bool = True, workers: int = 1,
+                  state: Optional[ScrapeState] = None):
+    if workers > 1:
+        return scrape_career_parallel(save_path, server=server, headless=headless, workers=workers, state=state)
+    d = new_driver(headless=headless)
+    try:
+        _open_career_page(d, server)
+        total = _count_career_scenarios(d)
 
         for idx in range(total):
-            _click(d, "#boxScenario"); time.sleep(DELAY)
-            entry = safe_find(d, By.CSS_SELECTOR, f'div[class*=tooltips_tooltip_striped] > div:nth-of-type({idx + 1})')
-            if not entry or not is_visible(d, entry): continue
-            try: entry.click()
-            except Exception: pass
-            time.sleep(DELAY)
+            key = _career_key(idx)
+            if state and state.recently_done(save_path, key):
+                print(f"[{idx + 1}/{total}] CAREER skip (recent)"); continue
+            if not _select_career_scenario(d, idx):
+                print(f"[{idx + 1}/{total}] CAREER scenario {idx + 1} could not be selected; skipped"); continue
+            fingerprint = section_fingerprint(d, _CAREER_LIST_CSS)
+            if state and state.unchanged(save_path, key, fingerprint):
+                print(f"[{idx + 1}/{total}] CAREER skip (unchanged)"); continue
+            rows = _career_rows_on_page(d)
+            added = extend_json_items(save_path, rows, dedup_key=("EventName","EventOptions"))
+            if state: state.mark(save_path, key, fingerprint, [(save_path, ("EventName","EventOptions"), rows)])
+            print(f"[{idx + 1}/{total}] CAREER +{added} rows")
+    finally:
+        try: d.quit()
+        except Exception: pass
 
-            btn = safe_find(d, By.CSS_SELECTOR, f'[id="{idx + 1}"][class*="filters_viewer_image_"]')
-            if btn:
-                try: btn.click()
-                except Exception: pass
-                time.sleep(DELAY)
-
-                added = 0
-                for it in safe_find_all(d, By.CSS_SELECTOR,
-                        'div[class*=eventhelper_elist] > div[class*=compatibility_viewer_item]'):
-                    if not is_visible(d, it): continue
-                    name = txt(it)
-                    if not name: continue
-                    pop = tippy_show_and_get_popper(d, it)
-                    try:
-                        for kv in parse_event_from_tippy_popper(pop):
-                            if append_json_item(save_path, make_career(name, kv),
-                                                dedup_key=("EventName","EventOptions")):
-                                added += 1
-                    finally:
-                        tippy_hide(d, it)
-
-                print(f"[{idx + 1}/{total}] CAREER +{added} rows")
+
+def scrape_career_parallel(save_path: str, server: str, headless: bool = True, workers: int = 2,
+                           state: Optional[ScrapeState] = None) -> None:
+    """
+    One browser session per scenario index. Workers only collect rows in memory;
+    the merge into save_path happens once, in scenario order, so the file is
+    identical to a sequential run regardless of worker count.
+    """
+    d = new_driver(headless=headless)
+    try:
+        _open_career_page(d, server)
+        total = _count_career_scenarios(d)
     finally:
         try: d.quit()
         except Exception: pass
+    if total == 0:
+        print("[career] No scenarios found; site layout may have changed.")
+        return
+
+    q = queue.Queue()
+    for idx in range(total):
+        if state and state.recently_done(save_path, _career_key(idx)):
+            print(f"[{idx + 1}/{total}] CAREER skip (recent)"); continue
+        q.put(idx)
+    results: Dict[int, Tuple[str, List[Dict[str, Any]]]] = {}
+    results_lock = threading.Lock()
+
+    def worker_loop(worker_id: int) -> None:
+        d_local = None
+        try:
+            while True:
+                try:
+                    idx = q.get_nowait()
+                except queue.Empty:
+                    return
+                try:
+                    for attempt in range(RETRIES + 1):
+                        try:
+                            if d_local is None:
+                                d_local = new_driver(headless=headless)
+                            _open_career_page(d_local, server)
+                            if not _select_career_scenario(d_local, idx):
+                                print(f"[{idx + 1}/{total}] CAREER (w{worker_id}) scenario {idx + 1} could not be selected; skipped")
+                                break
+                            fingerprint = section_fingerprint(d_local, _CAREER_LIST_CSS)
+                            if state and state.unchanged(save_path, _career_key(idx), fingerprint):
+                                print(f"[{idx + 1}/{total}] CAREER skip (unchanged)")
+                                break
+                            rows = _career_rows_on_page(d_local)
+                            with results_lock:
+                                results[idx] = (fingerprint, rows)
+                            print(f"[{idx + 1}/{total}] CAREER (w{worker_id}) {len(rows)} rows collected")
+                            break
+                        except (TimeoutException, WebDriverException, StaleElementReferenceException, ReadTimeoutError) as e:
+                            try: d_local.quit()
+                            except Exception: pass
+                            d_local = None
+                            if attempt < RETRIES:
+                                time.sleep(0.5 * (2 ** attempt))
+                                continue
+                            print(f"[{idx + 1}/{total}] CAREER ERROR scenario {idx + 1}: {e}")
+                finally:
+                    q.task_done()
+        finally:
+            if d_local is not None:
+                try: d_local.quit()
+                except Exception: pass
+
+    threads = []
+    for wid in range(max(1, min(int(workers), total))):
+        t = threading.Thread(target=worker_loop, args=(wid,), daemon=True)
+        t.start()
+        threads.append(t)
+    q.join()
+    for t in threads:
+        t.join()
+
+    for idx in range(total):
+        if idx not in results: continue
+        fingerprint, rows = results[idx]
+        added = extend_json_items(save_path, rows, dedup_key=("EventName","EventOptions"))
+        if state: state.mark(save_path, _career_key(idx), fingerprint, [(save_path, ("EventName","EventOptions"), rows)])
+        print(f"[{idx + 1}/{total}] CAREER +{added} rows")
 
 
 def _parse_schedule(year_label: str, month_label: str) -> str:
@@ -1238,14 +2953,39 @@ def _parse_schedule(year_label: str, month_label: str) -> str:
         month_text = month_label
     return f"{year_text} {month_text}"
 
-def scrape_races(save_path: str, server: str, headless: bool = True):
+def scrape_races(save_path: str, server: str, headless: bool = True, http_fast: bool = False,
+                 state: Optional[ScrapeState] = None):
+    url = site_url("/umamusume/races")
+    if state and state.recently_done(save_path, url):
+        print("[races] skip (recent)")
+        return
+    if http_fast and not NEXT_RACES_VERIFIED:
+        print("[fast] races: page-data mapping not yet verified against the live site; using Selenium")
+    elif http_fast:
+        data = fetch_next_data(url)
+        rows = races_from_next_data(data)
+        if rows is not None:
+            fingerprint = data_fingerprint(_next_page_props(data))
+            if state and state.unchanged(save_path, url, fingerprint):
+                print("[races] skip (unchanged)")
+                return
+            added = extend_json_items(save_path, rows, dedup_key=RACE_KEY)
+            if state: state.mark(save_path, url, fingerprint, [(save_path, RACE_KEY, rows)])
+            print(f"[fast] races: {len(rows)} rows from page data (+{added} new)")
+            return
+        print("[fast] races: page data missing expected keys; using Selenium")
     d = new_driver(headless=headless)
     try:
-        with_retries(nav, d, "https://gametora.com/umamusume/races", "body")
+        with_retries(nav, d, url, "body")
         ensure_server(d, server=server, keep_raw_en=True)
+        fingerprint = section_fingerprint(d, 'div[class*="races_race_list"]')
+        if state and state.unchanged(save_path, url, fingerprint):
+            print("[races] skip (unchanged)")
+            return
 
         rows = filter_visible(d, safe_find_all(d, By.CSS_SELECTOR, 'div[class*="races_race_list"] > div[class*="races_row"]'))
         total = len(rows)
+        written: List[Dict[str, Any]] = []
         for idx, row in enumerate(rows, 1):
             name_el = safe_find(row, By.CSS_SELECTOR, 'div[class*="races_name"] > div[class*="races_item"]')
             if name_el and not is_visible(d, name_el): continue
@@ -1258,7 +2998,8 @@ def scrape_races(save_path: str, server: str, headless: bool = True):
                     race_name, "Junior Year Pre-Debut", "Pre Debut",
                     "Varies", "Varies", "Varies", "Varies", "Varies", "Varies"
                 )
-                append_json_item(save_path, item, dedup_key=("RaceName","Schedule","DistanceMeter"))
+                append_json_item(save_path, item, dedup_key=RACE_KEY)
+                written.append(item)
                 print(f"[{idx}/{total}] {race_name} (special) ✓")
                 continue
 
@@ -1288,7 +3029,7 @@ def scrape_races(save_path: str, server: str, headless: bool = True):
             if details and is_visible(d, details):
                 try: details.click()
                 except Exception: pass
-                time.sleep(DELAY)
+                wait_css_present(d, 'div[role="dialog"]', DELAY, "races")
 
             dialog = safe_find(d, By.CSS_SELECTOR, 'div[role="dialog"]')
             if not dialog:
@@ -1310,7 +3051,7 @@ def scrape_races(save_path: str, server: str, headless: bool = True):
                 if close_btn:
                     try: close_btn.click()
                     except Exception: pass
-                time.sleep(DELAY)
+                wait_css_gone(d, 'div[role="dialog"]', DELAY, "races")
                 continue
 
             fans_required = (txt(schedule_items[0]) or "").replace("Fans required", "").strip()
@@ -1321,21 +3062,254 @@ def scrape_races(save_path: str, server: str, headless: bool = True):
                 distance_type, distance_meter, season_text,
                 fans_required, fans_gained
             )
-            append_json_item(save_path, item, dedup_key=("RaceName","Schedule","DistanceMeter"))
+            append_json_item(save_path, item, dedup_key=RACE_KEY)
+            written.append(item)
 
             close_btn = safe_find(dialog, By.CSS_SELECTOR, "img")
             if close_btn:
                 try: close_btn.click()
                 except Exception: pass
-            time.sleep(DELAY)
+            wait_css_gone(d, 'div[role="dialog"]', DELAY, "races")
 
             print(f"[{idx}/{total}] {race_name} ✓")
+        if state: state.mark(save_path, url, fingerprint, [(save_path, RACE_KEY, written)])
+    finally:
+        try: d.quit()
+        except Exception: pass
+
+
+def measure_blocking(urls: List[str], server: str, headless: bool = True, samples: int = 5) -> None:
+    """Load each detail page with and without the blocklist (cache disabled) and compare."""
+    d = new_driver(headless=headless)
+    try:
+        if not urls:
+            with_retries(nav, d, site_url("/umamusume/supports"), "main main")
+            ensure_server(d, server=server, keep_raw_en=True)
+            urls = [a.get_attribute("href") or "" for a in _wait_support_cards(d)[:samples]]
+            urls = [u for u in urls if u]
+        else:
+            with_retries(nav, d, urls[0], "body", lean=False)
+            ensure_server(d, server=server, keep_raw_en=True)
+        try: d.execute_cdp_cmd("Network.setCacheDisabled", {"cacheDisabled": True})
+        except Exception: pass
+        totals = {False: [0, 0.0], True: [0, 0.0]}
+        for url in urls:
+            row = []
+            for lean in (False, True):
+                nav(d, url, "body", lean=lean)
+                wait_css(d, "main", 10)
+                b, t = page_weight(d)
+                totals[lean][0] += b; totals[lean][1] += t
+                row.append(f"{b / 1024:8.1f} KiB {t:6.2f}s")
+            print(f"[block] full {row[0]} | lean {row[1]} | {url}")
+        n = max(1, len(urls))
+        full, lean_ = totals[False], totals[True]
+        print(f"[block] avg/page: full {full[0] / n / 1024:.1f} KiB {full[1] / n:.2f}s, "
+              f"lean {lean_[0] / n / 1024:.1f} KiB {lean_[1] / n:.2f}s "
+              f"({100 * (1 - lean_[0] / max(1, full[0])):.0f}% fewer bytes)")
     finally:
         try: d.quit()
         except Exception: pass
 
 
+# Relative cost of each category, used to hand out spare browser slots.
+CATEGORY_WEIGHTS = {"supports": 3, "career": 1}
+
+def allocate_workers(max_browsers: int) -> Dict[str, int]:
+    """
+    One session each for characters/supports/career/races; spare slots go to the
+    categories that can use them (supports, career) in proportion to their weight.
+    """
+    alloc = {"uma": 1, "supports": 1, "career": 1, "races": 1}
+    spare = max(0, max_browsers - len(alloc))
+    cycle = [k for k, w in CATEGORY_WEIGHTS.items() for _ in range(w)]
+    for i in range(spare):
+        alloc[cycle[i % len(cycle)]] += 1
+    return alloc
+
+def scrape_all_concurrently(args, headless: bool, state: Optional[ScrapeState]) -> bool:
+    """
+    Run all four categories at once under the global browser budget and the shared
+    RATE_LIMITER. A failing category is reported without stopping the others.
+    Returns True if every category finished.
+    """
+    alloc = allocate_workers(args.max_browsers)
+    print(f"[orchestrator] {args.max_browsers} browsers: " + ", ".join(f"{k}={v}" for k, v in alloc.items()))
+    jobs = {
+        "uma": lambda: scrape_characters(args.out_uma, server=args.server, headless=headless, state=state),
+        "supports": lambda: scrape_supports(args.out_supports, args.out_support_hints, server=args.server,
+                                            headless=headless, thumbs_dir=args.thumb_dir,
+                                            workers=alloc["supports"], state=state),
+        "career": lambda: scrape_career(args.out_career, server=args.server, headless=headless,
+                                        workers=alloc["career"], state=state),
+        "races": lambda: scrape_races(args.out_races, server=args.server, headless=headless,
+                                      http_fast=args.http_fast, state=state),
+    }
+    timings: Dict[str, float] = {}
+    failures: Dict[str, str] = {}
+
+    def run(name: str) -> None:
+        t0 = time.monotonic()
+        try:
+            jobs[name]()
+        except Exception as e:
+            failures[name] = f"{type(e).__name__}: {e}"
+            print(f"[orchestrator] {name} failed: {failures[name]}", file=sys.stderr)
+        finally:
+            timings[name] = time.monotonic() - t0
+
+    t0 = time.monotonic()
+    threads = [threading.Thread(target=run, args=(name,), name=f"cat-{name}", daemon=True) for name in jobs]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.monotonic() - t0
+
+    for name in jobs:
+        status = "FAILED" if name in failures else "ok"
+        print(f"[orchestrator] {name:<9} {timings.get(name, 0.0):8.1f}s  {status}")
+    serial = sum(timings.values())
+    print(f"[orchestrator] wall {wall:.1f}s vs {serial:.1f}s sequential sum "
+          f"({serial / max(wall, 1e-6):.2f}x)")
+    return not failures
+
+
+RACE_KEY = ("RaceName", "Schedule", "DistanceMeter")
+# fixture layout: a --record directory plus the Selenium output for the same page
+RACE_FIXTURE_EXPECTED = "races_selenium.json"
+
+def diff_race_rows(label: str, got: List[Dict[str, Any]], expected: List[Dict[str, Any]]) -> bool:
+    """Field-by-field diff of race rows keyed like the races output; True when they agree."""
+    key = lambda r: tuple(r.get(k) for k in RACE_KEY)
+    want, have = {key(r): r for r in expected}, {key(r): r for r in got}
+    bad = 0
+    for k in sorted(want.keys() - have.keys(), key=str):
+        print(f"[verify] {label}: missing {k}"); bad += 1
+    for k in sorted(have.keys() - want.keys(), key=str):
+        print(f"[verify] {label}: extra   {k}"); bad += 1
+    for k in sorted(want.keys() & have.keys(), key=str):
+        for field in want[k]:
+            if want[k][field] == have[k].get(field):
+                continue
+            print(f"[verify] {label}: {k[0]} ({k[1]}) {field}: expected {want[k][field]!r}, got {have[k].get(field)!r}")
+            bad += 1
+    print(f"[verify] {label}: {len(have)} rows vs {len(want)} expected, {bad} differences")
+    return bad == 0
+
+def verify_races_fast_path(server: str, headless: bool = True, expected_path: Optional[str] = None,
+                           save_expected: Optional[str] = None) -> bool:
+    """
+    Scrape races via Selenium and via __NEXT_DATA__ and diff them. With `expected_path`
+    (saved Selenium rows for the page being served, e.g. a --replay fixture) both paths
+    are diffed against it; a Selenium run that can't start a browser or render the page
+    is then reported and skipped instead of failing the check. `save_expected` keeps the
+    Selenium rows (with --record, next to the recorded page: that directory is then a
+    fixture for --replay).
+    """
+    import tempfile
+    fast = races_from_next_data(fetch_next_data(site_url("/umamusume/races")))
+    if fast is None:
+        print("[verify] fast path unavailable (no usable __NEXT_DATA__)")
+        return False
+    with tempfile.TemporaryDirectory() as tmp:
+        slow_path = os.path.join(tmp, "races_selenium.json")
+        try:
+            scrape_races(slow_path, server=server, headless=headless)
+            slow: Optional[List[Dict[str, Any]]] = _read_json_list(slow_path)
+            if save_expected and slow:
+                os.makedirs(os.path.dirname(save_expected) or ".", exist_ok=True)
+                shutil.copyfile(slow_path, save_expected)
+                print(f"[verify] saved {len(slow)} Selenium rows to {save_expected}")
+        except Exception as e:
+            if not expected_path:
+                raise
+            print(f"[verify] selenium path skipped: {e.__class__.__name__}: {str(e).splitlines()[0] if str(e) else ''}")
+            slow = None
+    if not expected_path:
+        return diff_race_rows("fast vs selenium", fast, slow or [])
+    expected = _read_json_list(expected_path)
+    ok = diff_race_rows("fast", fast, expected)
+    if slow:
+        ok = diff_race_rows("selenium", slow, expected) and ok
+    elif slow is not None:
+        print("[verify] selenium: page rendered no race rows (data-only fixture); skipped")
+    return ok
+
+
+def run_pipeline(args, headless: bool, state: Optional[ScrapeState]) -> bool:
+    """Scrape the categories selected by --what; False if any category failed."""
+    if args.what == "all" and args.concurrent:
+        return scrape_all_concurrently(args, headless, state)
+    if args.what in ("uma","all"):
+        print("\n=== Characters (objectives/events only) ===")
+        scrape_characters(args.out_uma, server=args.server, headless=headless, state=state)
+    if args.what in ("supports","all"):
+        print("\n=== Supports (events + support hints) ===")
+        scrape_supports(
+            args.out_supports,
+            args.out_support_hints,
+            server=args.server,
+            headless=headless,
+            thumbs_dir=args.thumb_dir,
+            workers=args.supports_workers,
+            state=state
+        )
+    if args.what in ("career","all"):
+        print("\n=== Career ===")
+        scrape_career(args.out_career, server=args.server, headless=headless, workers=args.career_workers, state=state)
+    if args.what in ("races","all"):
+        print("\n=== Races ===")
+        scrape_races(args.out_races, server=args.server, headless=headless, http_fast=args.http_fast, state=state)
+    return True
+
+
+# output arg -> (golden file name, record identity) for the replay benchmark diff
+GOLDEN_OUTPUTS = {
+    "out_uma": ("uma_data.json", ("UmaKey",)),
+    "out_supports": ("support_card.json", ("EventName", "EventOptions")),
+    "out_support_hints": ("support_hints.json", ("SupportSlug",)),
+    "out_career": ("career.json", ("EventName", "EventOptions")),
+    "out_races": ("races.json", ("RaceName", "Schedule", "DistanceMeter")),
+}
+
+def diff_against_golden(got_path: str, golden_path: str, key: Tuple[str, ...]) -> Dict[str, int]:
+    def index(rows: List[Any]) -> Dict[str, str]:
+        return {json.dumps([_pluck(r, k) for k in key], ensure_ascii=False): json.dumps(r, sort_keys=True, ensure_ascii=False)
+                for r in rows if isinstance(r, dict)}
+    got, gold = index(_read_json_list(got_path)), index(_read_json_list(golden_path))
+    return {
+        "golden": len(gold), "scraped": len(got),
+        "missing": len(gold.keys() - got.keys()), "extra": len(got.keys() - gold.keys()),
+        "changed": sum(1 for k in gold.keys() & got.keys() if gold[k] != got[k]),
+    }
+
+def run_replay_benchmark(args, headless: bool) -> bool:
+    """Run the selected pipeline offline into a temp dir; report pages/s and diffs vs golden assets."""
+    with tempfile.TemporaryDirectory() as tmp:
+        bench = argparse.Namespace(**vars(args))
+        for attr, (fname, _) in GOLDEN_OUTPUTS.items():
+            setattr(bench, attr, os.path.join(tmp, fname))
+        bench.thumb_dir = os.path.join(tmp, "support_thumbs")
+        navs_before = RATE_LIMITER.total_requests()
+        t0 = time.monotonic()
+        ok = run_pipeline(bench, headless, None)
+        wall = time.monotonic() - t0
+        pages = RATE_LIMITER.total_requests() - navs_before
+        print(f"[bench] {pages} pages in {wall:.1f}s = {pages / max(wall, 1e-6):.2f} pages/s")
+        for attr, (fname, key) in GOLDEN_OUTPUTS.items():
+            got = getattr(bench, attr)
+            if not os.path.exists(got):
+                continue
+            d = diff_against_golden(got, os.path.join(args.golden_dir, fname), key)
+            print(f"[bench] {fname:<19} golden {d['golden']:>5}  scraped {d['scraped']:>5}  "
+                  f"missing {d['missing']:>4}  extra {d['extra']:>4}  changed {d['changed']:>4}")
+    return ok
+
+
 def main():
+    global BASE_URL, BLOCK_PATTERNS, BROWSER_BUDGET, RECORDER, HINTS_VERIFIER
+    global SITE_SERVER, SETTINGS_CACHE_PATH, CHROME_PROFILE_TEMPLATE, HINT_TIPPY, THUMBS_META_PATH
     ap = argparse.ArgumentParser(description="GameTora scraper (robust + accurate Support hints; UMA skills removed)")
     ap.add_argument("--out-uma", default="Assets/uma_data.json", help="Output JSON for characters (objectives/events only)")
     ap.add_argument("--out-supports", default="Assets/support_card.json", help="Output JSON for support events")
@@ -1343,39 +3317,136 @@ def main():
     ap.add_argument("--out-career", default="Assets/career.json", help="Output JSON for career events")
     ap.add_argument("--out-races", default="Assets/races.json", help="Output JSON for races")
     ap.add_argument("--thumb-dir", default="assets/support_thumbs", help="Where to save support thumbnails")
+    ap.add_argument("--thumb-meta", default=".thumbs_meta.json",
+                    help="Thumbnail ETag/hash cache, kept outside the deployed thumbnail dir ('' disables)")
     ap.add_argument("--what", choices=["uma","supports","career","races","all"], default="all")
     ap.add_argument("--server", choices=["global","japan"], default="global")
     ap.add_argument("--headful", action="store_true")
     ap.add_argument("--supports-workers", type=int, default=2, help="Parallel workers for support scraping (1 disables threading)")
-    ap.add_argument("--supports-min-interval", type=float, default=0.9, help="Min seconds between support page navigations across workers")
-    ap.add_argument("--supports-jitter", type=float, default=0.25, help="Random jitter added to support navigation delays")
+    ap.add_argument("--min-interval", "--supports-min-interval", dest="min_interval", type=float, default=0.9,
+                    help="Starting seconds between page loads per host, shared by all scrapers (fixed with --fixed-rate)")
+    ap.add_argument("--jitter", "--supports-jitter", dest="jitter", type=float, default=0.25, help="Random jitter added to every navigation delay")
+    ap.add_argument("--max-rate", type=float, default=4.0, help="Upper bound (req/s per host) for the adaptive rate limiter")
+    ap.add_argument("--fixed-rate", action="store_true", help="Disable AIMD tuning and keep --min-interval fixed")
+    ap.add_argument("--base-url", default=BASE_URL, help="Site origin to scrape (e.g. a local fixture server)")
+    ap.add_argument("--http-fast", action="store_true", help="Read records from embedded __NEXT_DATA__ over plain HTTP where possible (races: only once NEXT_RACES_VERIFIED is set)")
+    ap.add_argument("--verify-fast-path", action="store_true", help="Scrape races via Selenium and the HTTP fast path, diff, and exit (with --record DIR: save the page and DIR/races_selenium.json as a fixture; with --replay DIR: diff both against that file)")
+    ap.add_argument("--state-file", default=".scrape_state.json", help="Per-server, per-output page fingerprints/checkpoints for incremental runs ('' disables)")
+    ap.add_argument("--since", type=_parse_since, default=None, help="Skip pages already scraped since this time (e.g. 12h, 3d, 2025-01-31)")
+    ap.add_argument("--force", action="store_true", help="Ignore fingerprints/checkpoints and re-scrape everything")
+    ap.add_argument("--no-block", action="store_true", help="Load images/fonts/media/third-party scripts on detail pages too")
+    ap.add_argument("--block-file", default=None, help="File of CDP URL patterns (one per line) replacing the default blocklist")
+    ap.add_argument("--measure-blocking", nargs="*", default=None, metavar="URL",
+                    help="Compare bytes/load time with and without blocking on these detail pages (default: 5 supports) and exit")
+    ap.add_argument("--profile", action="store_true", help="Record per-phase timings and WebDriver command counts")
+    ap.add_argument("--profile-out", default="scrape_profile", help="Report path prefix (writes .json and .txt)")
+    ap.add_argument("--concurrent", action="store_true", help="With --what all, scrape all categories at once")
+    ap.add_argument("--max-browsers", type=int, default=4, help="Global cap on simultaneous Chrome sessions")
+    ap.add_argument("--record", default=None, metavar="DIR", help="Save every same-origin response + DOM snapshots for offline replay")
+    ap.add_argument("--replay", default=None, metavar="DIR", help="Serve a --record directory locally and scrape it instead of the site")
+    ap.add_argument("--bench", action="store_true", help="With --replay: scrape into a temp dir, report pages/s and diffs vs --golden-dir")
+    ap.add_argument("--golden-dir", default="assets", help="Reference outputs for --bench")
+    ap.add_argument("--verify-hints", action="store_true", help="Also run the legacy support hint parser per card; report mismatches and speedup")
+    ap.add_argument("--settings-cache", default=".site_settings.json",
+                    help="Where captured site settings are cached for pre-seeding new browsers ('' = in-memory only)")
+    ap.add_argument("--chrome-profile-dir", default=None,
+                    help="Template Chrome user-data-dir with server/language already set; copied per browser")
+    ap.add_argument("--build-assets", action="store_true", help="After scraping, run build_assets.py (hashed/minified/compressed copies in assets/dist)")
+    ap.add_argument("--skills-file", default="assets/skills_all.json", help="skills_all.json used to resolve hint SkillIds by name")
+    ap.add_argument("--no-resolve-skill-ids", action="store_true", help="Don't fill empty SupportHints SkillIds from --skills-file after scraping")
+    ap.add_argument("--skill-match-min-score", type=float, default=SKILL_MATCH_MIN_SCORE, help="rapidfuzz ratio needed for a fuzzy SkillId match")
+    ap.add_argument("--hint-tippy", action="store_true", help="Still open each hint tile's tooltip to read its skill link (slow)")
+    ap.add_argument("--resolve-skill-ids-only", action="store_true", help="Only run SkillId resolution on --out-support-hints, no scraping")
+    ap.add_argument("--career-workers", type=int, default=1, help="Parallel browser sessions for career scenarios (1 disables threading)")
     args = ap.parse_args()
     headless = not args.headful
+    BASE_URL = args.base_url.rstrip("/")
+    if args.bench and not args.replay:
+        ap.error("--bench needs --replay DIR")
+    replay = None
+    if args.replay:
+        replay = ReplayServer(args.replay)
+        BASE_URL = replay.origin
+        # local server: no politeness pacing at all, it would only distort the benchmark
+        args.state_file = ""
+    if args.record:
+        RECORDER = Recorder(args.record)
+    if args.verify_hints:
+        HINTS_VERIFIER = HintsVerifier()
+    SITE_SERVER = args.server
+    SETTINGS_CACHE_PATH = "" if args.replay else args.settings_cache
+    THUMBS_META_PATH = "" if args.replay else args.thumb_meta
+    if SETTINGS_CACHE_PATH:
+        load_site_settings(SETTINGS_CACHE_PATH)
+    CHROME_PROFILE_TEMPLATE = args.chrome_profile_dir
+    resolve_ids = not args.no_resolve_skill_ids and os.path.exists(args.skills_file)
+    HINT_TIPPY = args.hint_tippy or not resolve_ids
+    if args.resolve_skill_ids_only:
+        resolve_hint_skill_ids(args.out_support_hints, args.skills_file, args.skill_match_min_score)
+        return
+
+    if args.profile:
+        PROFILER.enable()
+    BROWSER_BUDGET = threading.BoundedSemaphore(max(1, args.max_browsers))
+    configure_rate_limiter(min_interval_s=args.min_interval, jitter_s=args.jitter,
+                           adaptive=not args.fixed_rate, max_rate=args.max_rate, pace=replay is None)
+
+    if args.no_block:
+        BLOCK_PATTERNS = ()
+    elif args.block_file:
+        BLOCK_PATTERNS = load_blocklist(args.block_file)
+
+    if args.measure_blocking is not None:
+        if not BLOCK_PATTERNS:
+            BLOCK_PATTERNS = DEFAULT_BLOCKLIST
+        measure_blocking(args.measure_blocking, args.server, headless=headless)
+        return
+
+    if args.verify_fast_path:
+        expected = os.path.join(args.replay, RACE_FIXTURE_EXPECTED) if args.replay else None
+        if expected and not os.path.exists(expected):
+            expected = None
+        save = os.path.join(args.record, RACE_FIXTURE_EXPECTED) if args.record else None
+        try:
+            ok = verify_races_fast_path(args.server, headless=headless, expected_path=expected, save_expected=save)
+        finally:
+            if RECORDER is not None:
+                RECORDER.save()
+        sys.exit(0 if ok else 1)
+
+    state = ScrapeState(args.state_file, args.server, since=args.since, force=args.force) if args.state_file else None
 
     try:
-        if args.what in ("uma","all"):
-            print("\n=== Characters (objectives/events only) ===")
-            scrape_characters(args.out_uma, server=args.server, headless=headless)
-        if args.what in ("supports","all"):
-            print("\n=== Supports (events + support hints) ===")
-            scrape_supports(
-                args.out_supports,
-                args.out_support_hints,
-                server=args.server,
-                headless=headless,
-                thumbs_dir=args.thumb_dir,
-                workers=args.supports_workers,
-                min_interval=args.supports_min_interval,
-                jitter=args.supports_jitter
-            )
-        if args.what in ("career","all"):
-            print("\n=== Career ===")
-            scrape_career(args.out_career, server=args.server, headless=headless)
-        if args.what in ("races","all"):
-            print("\n=== Races ===")
-            scrape_races(args.out_races, server=args.server, headless=headless)
+        if args.bench:
+            ok = run_replay_benchmark(args, headless)
+        else:
+            ok = run_pipeline(args, headless, state)
+            if ok and state: state.finish()
+            if resolve_ids and args.what in ("supports", "all"):
+                resolve_hint_skill_ids(args.out_support_hints, args.skills_file, args.skill_match_min_score)
+            if ok and args.build_assets:
+                import build_assets
+                build_assets.build()
+        if not ok:
+            sys.exit(2)
     except WebDriverException as e:
         print(f"[fatal] WebDriver error: {e}", file=sys.stderr); sys.exit(2)
+    finally:
+        close_thumb_downloader()
+        if RATE_LIMITER.report():
+            print(RATE_LIMITER.report())
+        if WAIT_STATS.report():
+            print(WAIT_STATS.report())
+        if PROFILER.enabled:
+            PROFILER.write_report(args.profile_out)
+        for policy in RECOVERY_POLICIES:
+            print(policy.report())
+        if HINTS_VERIFIER is not None and HINTS_VERIFIER.report():
+            print(HINTS_VERIFIER.report())
+        if RECORDER is not None:
+            RECORDER.save()
+        if replay is not None:
+            replay.close()
 
 if __name__ == "__main__":
     main()
@@ -1,7 +1,5 @@
 (async function () {
-  const DATA_URL = "/assets/support_hints.json";
-  const res = await fetch(DATA_URL, { cache: "no-store" });
-  const data = await res.json();
+  const data = await UmaAssets.json("support_hints.json");
 
   // Normalizer used for fuzzy matching (unchanged behavior)
   const norm = (s) =>
@@ -58,8 +56,9 @@
     const img  = c?.SupportImage || c?.Image || c?.Thumb || null;  // thumbnail if present
     const slug = c?.SupportSlug || c?.slug || null;                 // unique key per card
     const id   = c?.SupportId ?? null;
+    const atlas = c?.SupportAtlas || null;                          // sprite sheet coords (build_assets.py)
 
-    return { name, rawName, rarity, hints, img, slug, id };
+    return { name, rawName, rarity, hints, img, atlas, slug, id };
   });
 
   const allHints = Array.from(new Set(cards.flatMap((c) => c.hints))).sort(
@@ -171,10 +170,11 @@
   }
 
   function renderResults(list) {
-    results.innerHTML = list.map((card) => {
+    const thumbs = UmaAssets.pickThumbs(list);  // a few matches: standalone thumbnails, many: sheets
+    results.innerHTML = list.map((card, i) => {
       const rarityClass = `badge-${card.rarity}`; // badge-SSR | badge-SR | badge-R
-      const thumb = card.img
-        ? `<img src="${card.img}" alt="${card.name}" loading="lazy">`
+      const thumb = card.img || thumbs[i]
+        ? UmaAssets.thumbHtml(thumbs[i], card.img, card.name)
         : `<span>${initialsOf(card.name)}</span>`;
       return `
         <div class="card card-support">
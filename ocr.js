@@ -164,6 +164,39 @@ function matchTemplateInRegion(frameImgData, probeRect, tplObj) {
   return best;
 }
 
+// Optional: let /api/ocr/locate (FFT match, several scales) find the probe instead of the
+// loops above. Only the probe strip is sent, capped at 1080p-equivalent height.
+const SERVER_LOCATE_KEY = "umasearch-server-locate";
+function useServerLocate() { return localStorage.getItem(SERVER_LOCATE_KEY) === "1"; }
+
+function _grayBase64(gray) {
+  let bin = "";
+  for (let i = 0; i < gray.length; i += 0x8000) bin += String.fromCharCode.apply(null, gray.subarray(i, i + 0x8000));
+  return btoa(bin);
+}
+
+async function matchTemplateViaApi(probeRect, frameHeight) {
+  const k = Math.min(1, 1080 / frameHeight);
+  const sw = Math.max(1, Math.round(probeRect.w * k)), sh = Math.max(1, Math.round(probeRect.h * k));
+  const sub = document.createElement("canvas");
+  sub.width = sw; sub.height = sh;
+  const sctx = sub.getContext("2d", { willReadFrequently: true });
+  sctx.drawImage(canvas, probeRect.x, probeRect.y, probeRect.w, probeRect.h, 0, 0, sw, sh);
+  const { gray } = toGray(sctx.getImageData(0, 0, sw, sh));
+
+  const res = await fetch("/api/ocr/locate", {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify({ width: sw, height: sh, data: _grayBase64(gray), downscale: k,
+                           search: { x: 0, y: 0, w: 1, h: 1 }, threshold: MATCH_THRESHOLD })
+  });
+  if (!res.ok) throw new Error(`locate HTTP ${res.status}`);
+  const out = await res.json();
+  const m = out.original && out.original.match;
+  if (!m) return { score: -1, x: probeRect.x, y: probeRect.y };
+  return { score: out.score, x: probeRect.x + m.x, y: probeRect.y + m.y };
+}
+
 function setSuggestion(msg) { if (suggestions) suggestions.textContent = msg || ""; }
 function mayTrigger() {
   const now = performance.now();
@@ -241,7 +274,15 @@ async function scanFrame() {
     h: Math.round(EVENT_REGION.h * vh)
   };
 
-  const match = matchTemplateInRegion(frameData, probeRectPx, tpl);
+  let match = null;
+  if (useServerLocate()) {
+    try {
+      match = await matchTemplateViaApi(probeRectPx, vh);
+    } catch (err) {
+      console.warn("[ocr] server locate failed, matching locally:", err);
+    }
+  }
+  if (!match) match = matchTemplateInRegion(frameData, probeRectPx, tpl);
 
   if (match.score >= MATCH_THRESHOLD) {
     setSuggestion(`UI found (${Math.round(match.score*100)}%). Reading title…`);
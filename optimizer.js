@@ -216,12 +216,11 @@
   }
 
   async function loadSkillCostsJSON() {
-    const candidates = ['/assets/skills_all.json', './assets/skills_all.json'];
+    // slim build projection (id/name/cost/parents/versions only); raw skills_all.json without a build
+    const candidates = ['skills_costs.json'];
     for (const url of candidates) {
       try {
-        const res = await fetch(url, { cache: 'no-store' });
-        if (!res.ok) throw new Error(`HTTP ${res.status}`);
-        const list = await res.json();
+        const list = await UmaAssets.json(url, 'skills_all.json');
         if (!Array.isArray(list) || !list.length) continue;
         list.forEach(entry => {
           const name = entry?.name_en || entry?.enname;
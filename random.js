@@ -81,7 +81,8 @@ function getSpeedFactorUma(){ return (els.speed2xUma && els.speed2xUma.checked)
       const img  = c?.SupportImage || c?.SupportImageLocal || c?.Image || c?.Thumb || null;
       const slug = c?.SupportSlug || c?.slug || null;
       const id   = c?.SupportId ?? null;
-      return { name, rawName, rarity, img, slug, id };
+      const atlas = c?.SupportAtlas || null;
+      return { name, rawName, rarity, img, atlas, slug, id };
     }).filter(s => s.slug); // require slug for uniqueness
   }
 
@@ -152,13 +153,14 @@ function getSpeedFactorUma(){ return (els.speed2xUma && els.speed2xUma.checked)
     const pool = supports.filter(s => allowedR.has(s.rarity) && !ex.has(s.slug));
     const pick = pickNRandom(pool, Math.min(5, pool.length));
 
-    els.deckResults.innerHTML = pick.length ? pick.map(cardMarkup).join("") :
+    const thumbs = UmaAssets.pickThumbs(pick);   // 5 cards: standalone thumbnails beat a whole sheet
+    els.deckResults.innerHTML = pick.length ? pick.map((s, i) => cardMarkup(s, "", thumbs[i])).join("") :
       `<div class="inline-note">No cards available. Adjust filters or exclusions.</div>`;
   }
 
-  function cardMarkup(s, extraClass=""){
-    const img = s.img
-      ? `<img src="${s.img}" alt="${s.name}" loading="lazy">`
+  function cardMarkup(s, extraClass="", atlas=s.atlas){
+    const img = s.img || atlas
+      ? UmaAssets.thumbHtml(atlas, s.img, s.name)
       : `<span>${initialsOf(s.name)}</span>`;
     return `
       <div class="card card-support ${extraClass}">
@@ -210,6 +212,9 @@ function getSpeedFactorUma(){ return (els.speed2xUma && els.speed2xUma.checked)
     rolling = true;
 
     const finalPick = pickNRandom(pool, N);
+    // the spin flashes cards from the whole pool, so it is costed as the pool
+    const spinThumbs = UmaAssets.pickThumbs(pool);
+    const finalThumbs = UmaAssets.pickThumbs(finalPick);
 
     const SPIN_MS_BASE = 140;   // slower default spin (was 90)
 const BASE_SETTLE_BASE = 1600; // slower default settle (was 900)
@@ -228,11 +233,12 @@ for (let i = 0; i < N; i++){
       const thumbEl = qs(".card-thumb", slot);
 
       const cycle = setInterval(() => {
-        const s = pool[Math.floor(Math.random() * pool.length)];
+        const j = Math.floor(Math.random() * pool.length);
+        const s = pool[j];
         titleEl.textContent = s.name;
         badgeEl.className = `badge ${rarityClass(s.rarity)}`;
         badgeEl.textContent = s.rarity;
-        const live = s.img ? `<img src="${s.img}" alt="${s.name}" loading="lazy">` : `<span>${initialsOf(s.name)}</span>`;
+        const live = s.img || spinThumbs[j] ? UmaAssets.thumbHtml(spinThumbs[j], s.img, s.name) : `<span>${initialsOf(s.name)}</span>`;
         thumbEl.innerHTML = live;
       }, SPIN_MS);
       cycles.push(cycle);
@@ -241,7 +247,7 @@ for (let i = 0; i < N; i++){
       const t = setTimeout(() => {
         clearInterval(cycle);
         const s = finalPick[i];
-        slot.outerHTML = cardMarkup(s, "reveal");
+        slot.outerHTML = cardMarkup(s, "reveal", finalThumbs[i]);
       }, settleAt);
       settleTimers.push(t);
     }
@@ -417,8 +423,8 @@ const duration = Math.max(600, Math.round(durationBase * getSpeedFactorUma()));
   (async () => {
     try{
       const [hints, umas] = await Promise.all([
-        fetchJSON(HINTS_URL, "/support_hints.json"),
-        fetchJSON(UMA_URL, "/uma_data.json")
+        UmaAssets.json("support_hints.json").catch(() => fetchJSON(HINTS_URL, "/support_hints.json")),
+        UmaAssets.json("uma_slim.json", "uma_data.json").catch(() => fetchJSON(UMA_URL, "/uma_data.json"))
       ]);
       supports = mapSupports(hints);
       umaList = mapUmas(umas);
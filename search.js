@@ -173,6 +173,11 @@ async function fetchEventByName(q, { limit = 5, min_score = 0 } = {}) {
     cleanQ
   )}&limit=${limit}&min_score=${min_score}`;
   const res = await fetch(url);
+  if (res.status === 503 || res.status === 429) {
+    // shed by the API's admission control; the next scan/search can simply retry
+    const wait = Number(res.headers.get("Retry-After")) || 1;
+    throw new Error(`Server busy, try again in ${wait}s.`);
+  }
   if (!res.ok)
     throw new Error(
       `API error ${res.status}: ${
@@ -1,4 +1,4 @@
-const DATA_URL = "/assets/uma_data.json";
+const DATA_NAME = "uma_slim.json"; // projection of uma_data.json (build_assets.py)
 
 const STAT_KEYS = ["Speed", "Stamina", "Power", "Guts", "Wit"];
 const GRADE_ORDER = { S:7, A:6, B:5, C:4, D:3, E:2, F:1, G:0 };
@@ -109,8 +109,7 @@ function renderGuess(rowsWrap, g, target) {
 }
 
 (function init(){
-  fetch(DATA_URL, {cache:"no-store"})
-    .then(r=>r.json())
+  UmaAssets.json(DATA_NAME, "uma_data.json")
     .then(data=>{
       const byLabel = {};
       const labels = data.map(u => buildLabel(u)).sort((a,b)=>a.localeCompare(b));